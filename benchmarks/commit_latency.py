@@ -0,0 +1,318 @@
+"""
+End-to-end latency benchmark of `penifycli commit`.
+
+For every diff size a throwaway repository with that many staged changed
+lines is created and `CommitDocGenHook.run` commits it, talking to a fake
+OpenAI-compatible model server on localhost and a fake JIRA, both with
+configurable latency. Nothing leaves the machine. Each LLM backend is
+measured separately: "openai" posts to the server directly, "litellm" goes
+through litellm's OpenAI provider. Wall time is broken down into phases:
+
+    startup  importing the commit code path and the backend in a fresh interpreter
+    git      git commands reading the index and the repository
+    jira     time the commit waits for JIRA issue context
+    prompt   routing, token counting and packing the diff into the prompt
+    model    requests to the (fake) model, including the backend's own overhead
+    commit   `git commit`
+    total    startup plus the whole `run`
+
+Usage:
+    python benchmarks/commit_latency.py --sizes 10,500,5000 --runs 20 --llm-latency-ms 400 --jira-latency-ms 150
+    python benchmarks/commit_latency.py --backend openai
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+PHASES = ("startup", "git", "jira", "prompt", "model", "commit", "total")
+BACKENDS = ("litellm", "openai")
+LINES_PER_FILE = 50
+STARTUP_CODE = "import penify_hook.commands.commit_commands, penify_hook.commit_analyzer, penify_hook.llm_client"
+# The litellm backend needs litellm for every commit that asks the model
+BACKEND_STARTUP_CODE = {
+    "litellm": "; penify_hook.llm_client.get_litellm()",
+    "openai": "; import penify_hook.openai_backend",
+}
+MODEL_NAME = "bench"
+
+
+class PhaseTimer:
+    """Collects the time intervals spent in each phase.
+
+    Intervals of a phase may overlap (e.g. parallel chunk summaries), so a
+    phase's time is the length of the union of its intervals.
+    """
+
+    def __init__(self):
+        self.intervals = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.intervals.setdefault(name, []).append((start, time.perf_counter()))
+
+    def wrap(self, obj, attribute, name):
+        """Time every call of a method of `obj` as phase `name`."""
+        method = getattr(obj, attribute)
+
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return method(*args, **kwargs)
+
+        setattr(obj, attribute, timed)
+
+    def seconds(self, name) -> float:
+        total, end = 0.0, None
+        for start, stop in sorted(self.intervals.get(name, [])):
+            if end is not None and start < end:
+                start = end
+            if stop > start:
+                total += stop - start
+                end = stop
+        return total
+
+
+class TimedGit:
+    """Proxy of `repo.git` timing each git command as the git or commit phase."""
+
+    def __init__(self, git, timer):
+        self._git = git
+        self._timer = timer
+
+    def __getattr__(self, name):
+        method = getattr(self._git, name)
+        if not callable(method):
+            return method
+
+        def timed(*args, **kwargs):
+            with self._timer.phase("commit" if name == "commit" else "git"):
+                return method(*args, **kwargs)
+
+        return timed
+
+
+class FakeModelServer:
+    """OpenAI-compatible chat completion server on localhost, answering after a fixed latency."""
+
+    def __init__(self, latency_ms):
+        latency = latency_ms / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, delayed ACKs add ~40 ms per request
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._send("application/json", json.dumps(
+                    {"object": "list", "data": [{"id": MODEL_NAME, "object": "model", "max_model_len": 32768}]}).encode())
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(latency)
+                if "Summarize part" in request["messages"][-1]["content"]:
+                    content = "- changed several files"
+                else:
+                    content = json.dumps({"title": "feat(bench): add generated modules",
+                                          "description": "Adds generated modules for the benchmark."})
+                common = {"id": "chatcmpl-bench", "created": int(time.time()), "model": MODEL_NAME}
+                if not request.get("stream"):
+                    self._send("application/json", json.dumps(dict(
+                        common, object="chat.completion",
+                        choices=[{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2})).encode())
+                    return
+                chunks = [
+                    dict(common, object="chat.completion.chunk",
+                         choices=[{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": None}]),
+                    dict(common, object="chat.completion.chunk",
+                         choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]),
+                ]
+                events = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+                self._send("text/event-stream", events.encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, name="fake-model-server", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeJira:
+    """Stands in for JiraClient, answering issue context after a fixed latency."""
+
+    jira_url = "https://jira.invalid"
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+
+    def is_connected(self):
+        return True
+
+    def extract_issue_keys(self, text):
+        return []
+
+    def extract_issue_keys_from_branch(self, branch):
+        return ["BENCH-1"]
+
+    def get_commit_context_from_issues(self, issue_keys):
+        time.sleep(self.latency)
+        return {"primary_issue": {"key": "BENCH-1", "summary": "Benchmark", "type": "Task", "status": "Open"}}
+
+
+def make_repo(path, changed_lines):
+    """Create a repository on a JIRA-style branch with `changed_lines` staged added lines."""
+    from git import Repo
+
+    repo = Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Benchmark")
+        config.set_value("user", "email", "bench@example.com")
+    with open(os.path.join(path, "README.md"), "w") as f:
+        f.write("benchmark\n")
+    repo.index.add(["README.md"])
+    repo.index.commit("initial commit")
+    repo.git.checkout("-b", "feature/BENCH-1-benchmark")
+
+    files = []
+    for index in range(math.ceil(changed_lines / LINES_PER_FILE)):
+        lines = min(LINES_PER_FILE, changed_lines - index * LINES_PER_FILE)
+        name = f"module_{index}.py"
+        with open(os.path.join(path, name), "w") as f:
+            f.writelines(f"value_{index}_{line} = compute({line}, 'benchmark')\n" for line in range(lines))
+        files.append(name)
+    repo.index.add(files)
+
+
+def measure_startup(backend) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", STARTUP_CODE + BACKEND_STARTUP_CODE[backend]], check=True, cwd=REPO_ROOT,
+                   env=dict(os.environ, PENIFY_NO_DAEMON="1"))
+    return time.perf_counter() - start
+
+
+def run_once(backend, model_server, changed_lines, jira_latency_ms, jira_deadline_ms) -> dict:
+    """Commit one throwaway repository and return the seconds spent in each phase."""
+    from penify_hook import commit_analyzer, diff_plan
+    from penify_hook.api_client import APIClient
+    from penify_hook.commit_analyzer import CommitDocGenHook
+    from penify_hook.llm_client import LLMClient
+
+    startup = measure_startup(backend)
+    timer = PhaseTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_path = os.path.join(tmp, "repo")
+        make_repo(repo_path, changed_lines)
+        os.environ["PENIFY_CACHE_DIR"] = os.path.join(tmp, "cache")
+        # JIRA comments stay in the outbox: no worker is started
+        commit_analyzer.spawn_flush_worker = lambda *args, **kwargs: None
+
+        api_client = APIClient("http://penify.invalid")
+        api_client.get_supported_file_types = lambda: ["py"]
+        llm_client = LLMClient(model=f"openai/{MODEL_NAME}", api_base=model_server.api_base, api_key="bench",
+                               backend=backend)
+        for method in ("route", "prepare_diff", "_build_summary_prompt"):
+            timer.wrap(llm_client, method, "prompt")
+        timer.wrap(llm_client, "_complete", "model")
+        # The staged diff is streamed from git after the diff command returns
+        commit_analyzer.read_staged_diff = diff_plan.read_staged_diff
+        timer.wrap(commit_analyzer, "read_staged_diff", "git")
+
+        # The hook reports progress on stdout
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            hook = CommitDocGenHook(repo_path, api_client, llm_client, FakeJira(jira_latency_ms),
+                                    jira_config={"deadline_ms": jira_deadline_ms})
+            hook.repo.git = TimedGit(hook.repo.git, timer)
+            timer.wrap(hook, "wait_for_jira_context", "jira")
+
+            start = time.perf_counter()
+            hook.run("benchmark", False, True, regenerate=True)
+            elapsed = time.perf_counter() - start
+
+    result = {phase: timer.seconds(phase) for phase in PHASES if phase not in ("startup", "total")}
+    result["startup"] = startup
+    result["total"] = startup + elapsed
+    return result
+
+
+def percentile(values, fraction) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark penifycli commit latency against fake backends.")
+    parser.add_argument("--sizes", default="10,500,5000", help="Comma-separated numbers of changed lines.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per size.")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Latency of each fake model request.")
+    parser.add_argument("--jira-latency-ms", type=float, default=150, help="Latency of the fake JIRA context fetch.")
+    parser.add_argument("--jira-deadline-ms", type=int, default=None, help="JIRA deadline of the commit.")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=list(BACKENDS),
+                        help="LLM backends to measure (default: both).")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args(argv)
+
+    if "litellm" in args.backend:
+        # Imported once up front: its cost is part of startup, not of the commit phases of the first run
+        from penify_hook.llm_client import get_litellm
+        get_litellm()
+    model_server = FakeModelServer(args.llm_latency_ms)
+    report = {}
+    try:
+        for backend in args.backend:
+            report[backend] = {}
+            for size in (int(size) for size in args.sizes.split(",")):
+                runs = [run_once(backend, model_server, size, args.jira_latency_ms, args.jira_deadline_ms)
+                        for _ in range(args.runs)]
+                report[backend][size] = {
+                    phase: {"p50_ms": round(percentile([run[phase] for run in runs], 0.5) * 1000, 1),
+                            "p95_ms": round(percentile([run[phase] for run in runs], 0.95) * 1000, 1)}
+                    for phase in PHASES
+                }
+    finally:
+        model_server.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{args.runs} run(s) per size, model latency {args.llm_latency_ms:g} ms, JIRA latency {args.jira_latency_ms:g} ms")
+    for backend, sizes in report.items():
+        for size, phases in sizes.items():
+            print(f"\n{backend} backend, {size} changed lines")
+            print(f"  {'phase':<8} {'p50 ms':>10} {'p95 ms':>10}")
+            for phase, stats in phases.items():
+                print(f"  {phase:<8} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,42 @@
+import contextlib
 import json
 import os
+import queue
+import threading
+from typing import TYPE_CHECKING
 import requests
-from .llm_client import LLMClient
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing it pulls in litellm, which the
+    # documentation commands never use.
+    from .llm_client import LLMClient
+
+
+class HedgeAbandoned(Exception):
+    """Raised inside a hedged request once the other backend has answered."""
+
 
 class APIClient:
-    def __init__(self, api_url, api_token: str = None, bearer_token: str = None):
+    def __init__(self, api_url, api_token: str = None, bearer_token: str = None, request_limiter=None):
+        """
+        Args:
+            api_url: Base URL of the Penify API
+            api_token: API key for the Penify API
+            bearer_token: Bearer token used to fetch the API key after login
+            request_limiter: Optional semaphore bounding concurrent generation requests,
+                e.g. shared between the worker processes of a workspace run
+        """
         self.api_url = api_url
         self.AUTH_TOKEN = api_token
         self.BEARER_TOKEN = bearer_token
+        self.request_limiter = request_limiter
+        # A shared session keeps HTTP connections pooled across requests
+        self.session = requests.Session()
+        self._supported_file_types = None
+
+    def _limit(self):
+        """Return a context manager that holds a slot of the request limiter, if any."""
+        return self.request_limiter if self.request_limiter is not None else contextlib.nullcontext()
 
     def send_file_for_docstring_generation(self, file_name, content, line_numbers, repo_details = None):
         """Send file content and modified lines to the API and return modified
@@ -37,7 +66,8 @@ class APIClient:
         if repo_details:
             payload['git_repo'] = repo_details
         url = self.api_url+"/v1/hook/file/generate/doc"
-        response = requests.post(url, json=payload,headers={"api-key": f"{self.AUTH_TOKEN}"}, timeout=60*10)
+        with self._limit():
+            response = self.session.post(url, json=payload,headers={"api-key": f"{self.AUTH_TOKEN}"}, timeout=60*10)
         if response.status_code == 200:
             response = response.json()
             return response.get('modified_content')
@@ -79,8 +109,9 @@ class APIClient:
 
         url = self.api_url+"/v1/hook/commit/summary"
         try:
-            response = requests.post(url, json=payload, headers
-            ={"api-key": f"{self.AUTH_TOKEN}"}, timeout=60*10)
+            with self._limit():
+                response = self.session.post(url, json=payload, headers
+                ={"api-key": f"{self.AUTH_TOKEN}"}, timeout=60*10)
             if response.status_code == 200:
                 response = response.json()
                 return response
@@ -104,17 +135,27 @@ class APIClient:
             list[str]: A list of supported file types, either from the API or a default set.
         """
 
+        if self._supported_file_types is not None:
+            return self._supported_file_types
+
         url = self.api_url+"/v1/file/supported_languages"
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200:
             response = response.json()
+            self._supported_file_types = response
             return response
         else:
             return ["py", "js", "ts", "java", "kt", "cs", "c"]
 
-    def generate_commit_summary_with_llm(self, diff, message, generate_description: bool, repo_details, llm_client : LLMClient, jira_context=None):
+    def generate_commit_summary_with_llm(self, diff, message, generate_description: bool, repo_details, llm_client : 'LLMClient', jira_context=None,
+                                         on_stream=None, hedge_delay_ms=None):
         """
         Generate a commit summary using a local LLM client instead of the API.
+
+        Without `hedge_delay_ms` the Penify API is only asked after the local
+        LLM failed. With it, the API request is sent as well once the local
+        LLM has not answered within that delay (or failed earlier); the first
+        valid summary is used and the other request is abandoned.
         
         Args:
             diff: Git diff of changes
@@ -122,21 +163,76 @@ class APIClient:
             repo_details: Details about the repository
             llm_client: Instance of LLMClient
             jira_context: Optional JIRA issue context to enhance the summary
+            on_stream: Optional callback receiving (field, text) while the summary is streamed
+            hedge_delay_ms: Milliseconds to wait for the local LLM before also asking
+                the Penify API; requires an API token
             
         Returns:
             Dict with title and description for the commit
         """
+        if hedge_delay_ms is not None and self.AUTH_TOKEN:
+            return self._hedged_commit_summary(diff, message, generate_description, repo_details, llm_client,
+                                               jira_context, on_stream, hedge_delay_ms)
         try:
-            return llm_client.generate_commit_summary(diff, message, generate_description, repo_details, jira_context)
+            return llm_client.generate_commit_summary(diff, message, generate_description, repo_details, jira_context,
+                                                      on_stream=on_stream)
         except Exception as e:
             print(f"Error using local LLM: {e}")
             # Fall back to API for commit summary
             return self.generate_commit_summary(diff, message, repo_details, jira_context)
 
+    def _hedged_commit_summary(self, diff, message, generate_description, repo_details, llm_client,
+                               jira_context, on_stream, hedge_delay_ms):
+        results = queue.Queue()
+        llm_abandoned = threading.Event()
+
+        def stream(field, text):
+            # Raising from the stream callback stops a local generation that lost the race
+            if llm_abandoned.is_set():
+                raise HedgeAbandoned()
+            if on_stream:
+                on_stream(field, text)
+
+        def run(backend, generate):
+            try:
+                results.put((backend, generate(), None))
+            except Exception as e:
+                results.put((backend, None, e))
+
+        def start(backend, generate):
+            # Daemon threads: the losing request must not keep the command alive
+            threading.Thread(target=run, args=(backend, generate), name=f"penify-summary-{backend}", daemon=True).start()
+
+        start("llm", lambda: llm_client.generate_commit_summary(
+            diff, message, generate_description, repo_details, jira_context, on_stream=stream))
+        started, finished = 1, 0
+        try:
+            while True:
+                try:
+                    timeout = hedge_delay_ms / 1000 if started == 1 else None
+                    backend, summary, error = results.get(timeout=timeout)
+                except queue.Empty:
+                    backend = None
+                else:
+                    finished += 1
+                    if isinstance(summary, dict) and summary.get('title'):
+                        return summary
+                    print(f"Error using {'local LLM' if backend == 'llm' else 'Penify API'}: {error or 'no summary'}")
+
+                if started == 1:
+                    if backend is None:
+                        print(f"Local LLM did not answer within {hedge_delay_ms} ms, asking the Penify API as well")
+                    start("api", lambda: self.generate_commit_summary(diff, message, repo_details, jira_context))
+                    started += 1
+                elif finished == started:
+                    return None
+        finally:
+            llm_abandoned.set()
+
     def get_api_key(self):
 
         url = self.api_url+"/v1/apiToken/get"
-        response = requests.get(url, headers={"Authorization": f"Bearer {self.BEARER_TOKEN}"}, timeout=60*10)
+        response = self.session.get(url, headers={"Authorization": f"Bearer {self.BEARER_TOKEN}"}, timeout=60*10)
         if response.status_code == 200:
             response = response.json()
             return response.get('key')
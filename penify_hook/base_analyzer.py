@@ -1,7 +1,7 @@
 import os
 from git import Repo
 from .api_client import APIClient
-from penify_hook.utils import get_repo_details, recursive_search_git_folder
+from penify_hook.utils import get_cached_repo_details, recursive_search_git_folder
 
 
 class BaseAnalyzer:
@@ -13,7 +13,7 @@ class BaseAnalyzer:
         self.repo_details = None
         if self.folder_path:
             self.repo = Repo(self.repo_path)
-            self.repo_details = get_repo_details(self.repo)
+            self.repo_details = get_cached_repo_details(self.repo)
 
         self.relative_file_path = os.path.relpath(folder_path)
         self.api_client = api_client
@@ -5,15 +5,19 @@ import argparse
 from penify_hook.ui_utils import print_info, print_warning
 
 
-def commit_code(api_url, token, message, open_terminal, generate_description,
-               llm_model=None, llm_api_base=None, llm_api_key=None,
-               jira_url=None, jira_user=None, jira_api_token=None):
+def commit_code(api_url, token, message, open_terminal, generate_description, llm_config=None, jira_config=None,
+                regenerate=False):
     """
     Enhance Git commits with AI-powered commit messages.
+
+    Args:
+        llm_config (dict): The "llm" section of the Penify config, see `get_llm_config`
+        jira_config (dict): The "jira" section of the Penify config, see `get_jira_config`
+        regenerate (bool): Ignore the cached commit message for the staged changes
     """
 
     from penify_hook.ui_utils import print_error
-    from penify_hook.utils import recursive_search_git_folder
+    from penify_hook.utils import evict_cached_client, get_cached_client, recursive_search_git_folder
     from ..commit_analyzer import CommitDocGenHook
     from ..api_client import APIClient
 
@@ -24,22 +28,42 @@ def commit_code(api_url, token, message, open_terminal, generate_description,
         LLMClient = None
 
     try:
-        from ..jira_client import JiraClient
+        from ..jira_cache import DEFAULT_TTL
+        from ..jira_client import DEFAULT_MAX_COMMENTS, JiraClient
     except ImportError:
         JiraClient = None
-    # Create API client
-    api_client = APIClient(api_url, token)
+
+    llm_config = llm_config or {}
+    jira_config = jira_config or {}
+    llm_model = llm_config.get('model')
+    jira_url = jira_config.get('url')
+    jira_user = jira_config.get('username')
+    jira_api_token = jira_config.get('api_token')
+
+    # Create API client (reused across runs when served by the daemon)
+    api_client = get_cached_client(APIClient, api_url, token)
     
     # Initialize LLM client if LLM parameters are provided and LLMClient is available
     llm_client = None
     if LLMClient is not None and llm_model:
         try:
-            llm_client = LLMClient(
+            llm_client = get_cached_client(
+                LLMClient,
                 model=llm_model,
-                api_base=llm_api_base,
-                api_key=llm_api_key
+                api_base=llm_config.get('api_base'),
+                api_key=llm_config.get('api_key'),
+                diff_ignore=llm_config.get('diff_ignore'),
+                keep_alive=llm_config.get('keep_alive'),
+                routes=llm_config.get('routes'),
+                title_first=llm_config.get('title_first', False),
+                title_model=llm_config.get('title_model'),
+                endpoints=llm_config.get('endpoints'),
+                backend=llm_config.get('backend')
             )
             print_info(f"Using LLM model: {llm_model}")
+            if llm_config.get('prewarm', False):
+                # Load the model while the diff and JIRA context are collected
+                llm_client.start_warm_up()
         except Exception as e:
             print_error(f"Error initializing LLM client: {e}")
             print_error("Falling back to API for commit summary generation")
@@ -51,15 +75,21 @@ def commit_code(api_url, token, message, open_terminal, generate_description,
     jira_client = None
     if JiraClient is not None and jira_url and jira_user and jira_api_token:
         try:
-            jira_client = JiraClient(
+            jira_client = get_cached_client(
+                JiraClient,
                 jira_url=jira_url,
                 jira_user=jira_user,
-                jira_api_token=jira_api_token
+                jira_api_token=jira_api_token,
+                cache_ttl=jira_config.get('cache_ttl', DEFAULT_TTL),
+                max_comments=jira_config.get('max_comments', DEFAULT_MAX_COMMENTS)
             )
+            # No request is made here: JIRA is only asked when the summary and issue caches cannot answer
             if jira_client.is_connected():
-                print_info(f"Connected to JIRA: {jira_url}")
+                jira_client.reset_run_cache()
+                print_info(f"Using JIRA: {jira_url}")
             else:
-                print_warning(f"Failed to connect to JIRA: {jira_url}")
+                print_warning(f"Cannot use JIRA: {jira_url}")
+                evict_cached_client(jira_client)
                 jira_client = None
         except Exception as e:
             print_warning(f"Error initializing JIRA client: {e}")
@@ -68,8 +98,9 @@ def commit_code(api_url, token, message, open_terminal, generate_description,
     try:
         # Pass the LLM client and JIRA client to CommitDocGenHook
         gf_path = recursive_search_git_folder(os.getcwd())
-        analyzer = CommitDocGenHook(gf_path, api_client, llm_client, jira_client)
-        analyzer.run(message, open_terminal, generate_description)
+        analyzer = CommitDocGenHook(gf_path, api_client, llm_client, jira_client, llm_config=llm_config,
+                                    jira_config=jira_config)
+        analyzer.run(message, open_terminal, generate_description, regenerate=regenerate)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -93,6 +124,7 @@ It generates smart commit messages. By default, it will just generate just the T
     parser.add_argument("-m", "--message", required=False, help="Commit with contextual commit message.", default="N/A")
     parser.add_argument("-e", "--terminal", action="store_true", help="Open edit terminal before committing.")
     parser.add_argument("-d", "--description", action="store_false", help="It will generate commit message with title and description.", default=False)
+    parser.add_argument("--regenerate", action="store_true", help="Ignore the cached commit message for the staged changes and generate a new one.")
     
 def handle_commit(args):
     from penify_hook.commands.commit_commands import commit_code
@@ -103,22 +135,5 @@ def handle_commit(args):
     open_terminal = args.terminal
     generate_description = args.description
     print_info(f"Generate Commit Description: {generate_description}")        
-    # Try to get from config
-    llm_config = get_llm_config()
-    llm_model = llm_config.get('model')
-    llm_api_base = llm_config.get('api_base') 
-    llm_api_key = llm_config.get('api_key')
-    token = get_token()
-
-
-
-    # Try to get from config
-    jira_config = get_jira_config()
-    jira_url = jira_config.get('url')
-    jira_user = jira_config.get('username')
-    jira_api_token = jira_config.get('api_token')
-
-
-    commit_code(API_URL, token, args.message, open_terminal, generate_description,
-                llm_model, llm_api_base, llm_api_key,
-                jira_url, jira_user, jira_api_token)
\ No newline at end of file
+    commit_code(API_URL, get_token(), args.message, open_terminal, generate_description,
+                llm_config=get_llm_config(), jira_config=get_jira_config(), regenerate=args.regenerate)
@@ -1,15 +1,11 @@
 import json
 import os
-import random
-import webbrowser
-import http.server
-import socketserver
-import pkg_resources
 from pathlib import Path
-from threading import Thread
 import logging
 from penify_hook.utils import recursive_search_git_folder
 
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
 
 def get_penify_config() -> Path:
     """
@@ -141,6 +137,12 @@ def config_llm_web():
     """
     Open a web browser interface for configuring LLM settings.
     """
+    import random
+    import webbrowser
+    import http.server
+    import socketserver
+    from threading import Thread
+
     redirect_port = random.randint(30000, 50000)
     server_url = f"http://localhost:{redirect_port}"
     
@@ -154,9 +156,7 @@ def config_llm_web():
                 self.end_headers()
                 
                 # Read the template HTML file
-                template_path = pkg_resources.resource_filename(
-                    "penify_hook", "templates/llm_config.html"
-                )
+                template_path = os.path.join(TEMPLATES_DIR, "llm_config.html")
                 
                 with open(template_path, 'r') as f:
                     content = f.read()
@@ -243,6 +243,12 @@ def config_jira_web():
     """
     Open a web browser interface for configuring JIRA settings.
     """
+    import random
+    import webbrowser
+    import http.server
+    import socketserver
+    from threading import Thread
+
     redirect_port = random.randint(30000, 50000)
     server_url = f"http://localhost:{redirect_port}"
     
@@ -256,9 +262,7 @@ def config_jira_web():
                 self.end_headers()
                 
                 # Read the template HTML file
-                template_path = pkg_resources.resource_filename(
-                    "penify_hook", "templates/jira_config.html"
-                )
+                template_path = os.path.join(TEMPLATES_DIR, "jira_config.html")
                 
                 with open(template_path, 'r') as f:
                     content = f.read()
@@ -0,0 +1,124 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def start_daemon(wait_seconds: float = 10.0):
+    """
+    Start the penifycli daemon as a detached background process.
+    """
+    from penify_hook.daemon import get_socket_path, send_control
+    from penify_hook.utils import get_penify_cache_dir
+
+    socket_path = get_socket_path()
+    status = send_control("ping", socket_path)
+    if status and not status.get("responding", True):
+        print("penifycli daemon is already running but not responding.")
+        return 1
+    if status:
+        print(f"penifycli daemon is already running (pid {status['pid']}).")
+        return 0
+
+    log_path = os.path.join(get_penify_cache_dir(), "daemon.log")
+    with open(log_path, "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, "-m", "penify_hook.main", "daemon", "run"],
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            start_new_session=True,
+            close_fds=True,
+        )
+
+    # Wait until the daemon has imported everything and accepts connections
+    deadline = time.time() + wait_seconds
+    while time.time() < deadline:
+        status = send_control("ping", socket_path)
+        if status and status.get("responding", True):
+            print(f"penifycli daemon started (pid {status['pid']}) on {socket_path}")
+            return 0
+        time.sleep(0.1)
+
+    print(f"penifycli daemon did not start within {wait_seconds:.0f}s. See {log_path} for details.")
+    return 1
+
+
+def stop_daemon():
+    """
+    Stop the running penifycli daemon.
+    """
+    from penify_hook.daemon import send_control
+
+    reply = send_control("shutdown")
+    if reply is None:
+        print("penifycli daemon is not running.")
+        return 1
+    if not reply.get("responding", True):
+        print("penifycli daemon is busy and did not respond.")
+        return 1
+    print(f"penifycli daemon (pid {reply['pid']}) stopped.")
+    return 0
+
+
+def daemon_status():
+    """
+    Print the status of the penifycli daemon.
+    """
+    from penify_hook.daemon import send_control
+
+    status = send_control("ping")
+    if status is None:
+        print("penifycli daemon is not running.")
+        return 1
+    if not status.get("responding", True):
+        print("penifycli daemon is busy and did not respond.")
+        return 1
+    print(f"penifycli daemon is running (pid {status['pid']})")
+    print(f"  Socket: {status['socket']}")
+    print(f"  Uptime: {status['uptime']}s")
+    print(f"  Requests served: {status['requests_served']}")
+    if status.get("running_command"):
+        print("  Running a command")
+    return 0
+
+
+def run_daemon():
+    """
+    Run the penifycli daemon in the foreground.
+    """
+    import logging
+    from penify_hook.daemon import PenifyDaemon
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        PenifyDaemon().serve_forever()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+def setup_daemon_parser(parser):
+    daemon_parser_description = """
+Keeps penifycli warm between invocations.
+1. While the daemon is running, 'penifycli commit' and 'penifycli docgen' are served by it over a Unix socket.
+2. Imports, HTTP sessions, repository details and the JIRA connection are reused across commands.
+3. Set PENIFY_NO_DAEMON=1 to bypass a running daemon for a single command.
+"""
+    parser.description = daemon_parser_description
+    parser.formatter_class = argparse.RawDescriptionHelpFormatter
+    parser.add_argument("action", choices=["start", "stop", "status", "run"],
+                        help="start/stop the background daemon, show its status, or run it in the foreground.")
+
+
+def handle_daemon(args):
+    if args.action == "start":
+        return start_daemon()
+    elif args.action == "stop":
+        return stop_daemon()
+    elif args.action == "status":
+        return daemon_status()
+    else:
+        return run_daemon()
@@ -3,13 +3,14 @@ import argparse
 import logging
 import os
 
-def generate_doc(api_url, token, location=None):
+def generate_doc(api_url, token, location=None, watch=None):
     import os
     import sys
     from ..folder_analyzer import FolderAnalyzerGenHook
     from ..file_analyzer import FileAnalyzerGenHook
     from ..git_analyzer import GitDocGenHook
     from ..api_client import APIClient
+    from ..utils import get_cached_client
     """Generates documentation based on the given parameters.
 
     This function initializes an API client using the provided API URL and
@@ -24,9 +25,20 @@ def generate_doc(api_url, token, location=None):
         token (str): The authentication token for accessing the API.
         location (str?): The path to a specific file or folder to analyze.
             If not provided, the current working directory is used.
+        watch (str?): A file or folder to watch; changed regions are documented
+            on every save until interrupted.
     """
-    api_client = APIClient(api_url, token)
-    if location is None:
+    api_client = get_cached_client(APIClient, api_url, token)
+    if watch:
+        from ..watch_analyzer import WatchDocGenHook
+        try:
+            analyzer = WatchDocGenHook(watch, api_client)
+            analyzer.run()
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    elif location is None:
         current_folder_path = os.getcwd()
         try:
             analyzer = GitDocGenHook(current_folder_path, api_client)
@@ -53,6 +65,106 @@ def generate_doc(api_url, token, location=None):
             sys.exit(1)
 
 
+def generate_workspace_doc(api_url, token, workspace, jobs=None, max_api_requests=None):
+    """Generate documentation for every git repository under a workspace directory.
+
+    Each repository is documented in its own worker process; the number of
+    documentation requests in flight is capped across all workers.
+
+    Args:
+        api_url (str): The URL of the API to connect to for documentation generation.
+        token (str): The authentication token for accessing the API.
+        workspace (str): Directory containing the repositories.
+        jobs (int?): Number of worker processes. Defaults to the CPU count.
+        max_api_requests (int?): Maximum concurrent API requests across all workers.
+    """
+    import sys
+    from ..workspace_analyzer import DEFAULT_MAX_API_REQUESTS, WorkspaceDocGenHook
+
+    if not os.path.isdir(workspace):
+        print(f"Error: Workspace directory {workspace} does not exist.")
+        sys.exit(1)
+
+    analyzer = WorkspaceDocGenHook(workspace, api_url, token, jobs, max_api_requests or DEFAULT_MAX_API_REQUESTS)
+    results = analyzer.run()
+    if any(result['status'] != 'success' for result in results):
+        sys.exit(1)
+
+
+def enqueue_docgen(location, commit_sha=None, max_workers=None):
+    """Queue documentation generation for a commit and start the background worker.
+
+    Args:
+        location (str): Path inside the git repository.
+        commit_sha (str?): The commit to document. Defaults to HEAD.
+        max_workers (int?): Maximum number of repositories the worker processes in parallel.
+    """
+    from git import Repo
+    from ..docgen_queue import DEFAULT_MAX_WORKERS, DocGenQueue, spawn_worker
+    from ..utils import find_git_parent
+
+    repo_path = find_git_parent(location)
+    if not commit_sha:
+        commit_sha = Repo(repo_path).head.commit.hexsha
+
+    DocGenQueue().enqueue(repo_path, commit_sha)
+    spawn_worker(max_workers or DEFAULT_MAX_WORKERS)
+    print(f"Queued documentation generation for {commit_sha[:12]} in {repo_path}")
+
+
+def drain_docgen_queue(api_url, token, max_workers):
+    """Process queued documentation jobs until the queue is empty.
+
+    Args:
+        api_url (str): The URL of the API to connect to for documentation generation.
+        token (str): The authentication token for accessing the API.
+        max_workers (int): Maximum number of repositories processed in parallel.
+    """
+    from ..api_client import APIClient
+    from ..docgen_queue import DocGenQueue, document_commits
+
+    api_client = APIClient(api_url, token)
+    processed = DocGenQueue().drain(
+        lambda repo_path, commits: document_commits(api_client, repo_path, commits),
+        max_workers=max_workers
+    )
+    if processed < 0:
+        print("Another docgen worker is already draining the queue.")
+    else:
+        print(f"Docgen queue drained: {processed} batch(es) processed.")
+
+
+def docgen_status(limit=10):
+    """Print queued, running and recently finished documentation jobs."""
+    import time
+    from ..docgen_queue import DocGenQueue
+
+    queue = DocGenQueue()
+    now = time.time()
+
+    running = queue.running_jobs()
+    pending = queue.pending_jobs()
+    print(f"Running: {len(running)}  Pending: {len(pending)}")
+    for state, jobs in (("running", running), ("pending", pending)):
+        for job in jobs:
+            age = int(now - job.get("enqueued_at", now))
+            print(f"  [{state}] {job['commit'][:12]} {job['repo_path']} (queued {age}s ago)")
+
+    results = queue.recent_results(limit)
+    if results:
+        print("Recent results:")
+    for result in results:
+        commits = result["commits"]
+        label = commits[-1][:12] if len(commits) == 1 else f"{commits[0][:12]}..{commits[-1][:12]}"
+        finished = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["finished_at"]))
+        if result["status"] == "success":
+            summary = result.get("summary", {})
+            detail = f"{summary.get('updated', 0)} updated, {summary.get('failed', 0)} failed of {summary.get('processed', 0)} files"
+        else:
+            detail = result.get("error") or "failed"
+        print(f"  [{result['status']}] {label} {result['repo_path']} at {finished}: {detail}")
+
+
 # Define the docgen description text
 docgen_description = """Generate code documentation using Penify.
 
@@ -80,12 +192,18 @@ It generates Documentation for the Git diff, file or folder.
 
     # Docgen main options (for direct documentation generation)
     parser.add_argument("-l", "--location", help="[Optional] Path to the folder or file to Generate Documentation. By default it will pick the root directory.", default=None)
+    parser.add_argument("--watch", metavar="PATH", help="[Optional] Watch a file or folder and document changed regions on every save.", default=None)
+    parser.add_argument("--workspace", metavar="DIR", help="[Optional] Generate documentation for every Git repository under DIR in parallel.", default=None)
+    parser.add_argument("-j", "--jobs", type=int, help="[Optional] Number of worker processes for --workspace. Defaults to the CPU count.", default=None)
+    parser.add_argument("--max-api-requests", type=int, help="[Optional] Maximum concurrent API requests across all --workspace workers.", default=None)
 
     # Subcommand: install-hook (as part of docgen)
     install_hook_parser = docgen_subparsers.add_parser("install-hook", help="Install the Git post-commit hook.")
     install_hook_parser.add_argument("-l", "--location", required=False, 
                                     help="Location in which to install the Git hook. Defaults to current directory.",
                                     default=os.getcwd())
+    install_hook_parser.add_argument("--mode", choices=["sync", "async"], default="sync",
+                                    help="'sync' documents inside the hook; 'async' queues the commit and returns immediately.")
 
     # Subcommand: uninstall-hook (as part of docgen)
     uninstall_hook_parser = docgen_subparsers.add_parser("uninstall-hook", help="Uninstall the Git post-commit hook.")
@@ -93,24 +211,57 @@ It generates Documentation for the Git diff, file or folder.
                                       help="Location from which to uninstall the Git hook. Defaults to current directory.", 
                                       default=os.getcwd())
 
+    # Subcommand: enqueue (used by the asynchronous post-commit hook)
+    enqueue_parser = docgen_subparsers.add_parser("enqueue", help="Queue documentation generation for a commit.")
+    enqueue_parser.add_argument("-l", "--location", required=False,
+                                help="Path inside the Git repository. Defaults to current directory.",
+                                default=os.getcwd())
+    enqueue_parser.add_argument("--commit", required=False, help="Commit SHA to document. Defaults to HEAD.")
+    enqueue_parser.add_argument("--max-workers", type=int, default=None,
+                                help="Maximum number of repositories the background worker processes in parallel.")
+
+    # Subcommand: drain (run by the background worker)
+    drain_parser = docgen_subparsers.add_parser("drain", help="Process queued documentation jobs.")
+    drain_parser.add_argument("--max-workers", type=int, default=2,
+                              help="Maximum number of repositories processed in parallel.")
+
+    # Subcommand: status
+    docgen_subparsers.add_parser("status", help="Show queued and recent background documentation jobs.")
+
 def handle_docgen(args):
     # Only import dependencies needed for docgen functionality here
     from penify_hook.commands.config_commands import get_token
     import sys
     from penify_hook.commands.doc_commands import generate_doc
-    from penify_hook.commands.hook_commands import install_git_hook, uninstall_git_hook
+    from penify_hook.commands.hook_commands import install_async_git_hook, install_git_hook, uninstall_git_hook
     from penify_hook.constants import API_URL
 
+    if args.docgen_subcommand == "status":
+        docgen_status()
+        return
+
     token = get_token()
     if not token:
         logging.error("Error: Unable to authenticate. Please run 'penifycli login'.")
         sys.exit(1)
 
     if args.docgen_subcommand == "install-hook":
-        install_git_hook(args.location, token)
+        if args.mode == "async":
+            install_async_git_hook(args.location)
+        else:
+            install_git_hook(args.location, token)
 
     elif args.docgen_subcommand == "uninstall-hook":
         uninstall_git_hook(args.location)
 
+    elif args.docgen_subcommand == "enqueue":
+        enqueue_docgen(args.location, args.commit, args.max_workers)
+
+    elif args.docgen_subcommand == "drain":
+        drain_docgen_queue(API_URL, token, args.max_workers)
+
+    elif args.workspace:
+        generate_workspace_doc(API_URL, token, args.workspace, args.jobs, args.max_api_requests)
+
     else:  # Direct documentation generation
-        generate_doc(API_URL, token, args.location)
\ No newline at end of file
+        generate_doc(API_URL, token, args.location, args.watch)
\ No newline at end of file
@@ -8,12 +8,15 @@ HOOK_TEMPLATE = """#!/bin/sh
 
 penifycli docgen -gf {git_folder_path} -t {token}
 """
+ASYNC_HOOK_TEMPLATE = """#!/bin/sh
+# This is a post-commit hook generated by penifycli.
+# Queues documentation generation for the new commit and returns immediately.
+# A background worker processes the queue; check it with `penifycli docgen status`.
 
-def install_git_hook(location, token):
-    """
-    Install a post-commit hook in the specified location that generates documentation
-    for changed files after each commit.
-    """
+penifycli docgen enqueue -l "{git_folder_path}" --commit "$(git rev-parse HEAD)"
+"""
+
+def _write_hook(location, hook_content):
     hooks_dir = Path(location) / ".git/hooks"
     hook_path = hooks_dir / HOOK_FILENAME
     
@@ -21,13 +24,32 @@ def install_git_hook(location, token):
         print(f"Error: The hooks directory {hooks_dir} does not exist.")
         sys.exit(1)
     
-    hook_content = HOOK_TEMPLATE.format(token=token, git_folder_path=location)
     hook_path.write_text(hook_content)
     hook_path.chmod(0o755)  # Make the hook script executable
+    return hook_path
+
+def install_git_hook(location, token):
+    """
+    Install a post-commit hook in the specified location that generates documentation
+    for changed files after each commit.
+    """
+    hook_content = HOOK_TEMPLATE.format(token=token, git_folder_path=location)
+    hook_path = _write_hook(location, hook_content)
 
     print(f"Post-commit hook installed in {hook_path}")
     print(f"Documentation will now be automatically generated after each commit.")
 
+def install_async_git_hook(location):
+    """
+    Install a post-commit hook that queues documentation generation for each commit
+    and returns immediately, leaving the work to a background worker.
+    """
+    hook_content = ASYNC_HOOK_TEMPLATE.format(git_folder_path=location)
+    hook_path = _write_hook(location, hook_content)
+
+    print(f"Asynchronous post-commit hook installed in {hook_path}")
+    print(f"Documentation will be generated in the background after each commit. Run 'penifycli docgen status' to follow it.")
+
 def uninstall_git_hook(location):
     """
     Uninstalls the post-commit hook from the specified location.
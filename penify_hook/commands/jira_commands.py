@@ -0,0 +1,87 @@
+import argparse
+
+
+def flush_jira_outbox(max_workers):
+    """Post the queued JIRA updates, waiting for retries that are due soon.
+
+    Args:
+        max_workers (int): Maximum number of issues posted to in parallel.
+    """
+    import logging
+    from ..jira_outbox import JiraOutbox, client_for_repository
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    sent = JiraOutbox().run_worker(client_for_repository, max_workers)
+    if sent < 0:
+        print("Another JIRA worker is already flushing the outbox.")
+        return 1
+    print(f"JIRA outbox flushed: {sent} update(s) posted.")
+    return 0
+
+
+def jira_outbox_status():
+    """Print queued JIRA updates and the ones given up on."""
+    import time
+    from ..jira_outbox import JiraOutbox
+
+    outbox = JiraOutbox()
+    now = time.time()
+
+    pending = outbox.pending_ops()
+    failed = outbox.failed_ops()
+    print(f"Pending: {len(pending)}  Failed: {len(failed)}")
+    for op in pending:
+        wait = int(op["next_attempt_at"] - now)
+        due = f"retry in {wait}s" if wait > 0 else "due"
+        error = f": {op['last_error']}" if op.get("last_error") else ""
+        print(f"  [pending] {op['action']} on {op['issue_key']} ({op['attempts']} attempt(s), {due}){error}")
+    for op in failed:
+        print(f"  [failed] {op['action']} on {op['issue_key']} ({op['attempts']} attempts): {op['last_error']}")
+    if failed:
+        print("Run 'penifycli jira retry' to queue the failed updates again.")
+    return 0
+
+
+def retry_jira_outbox(max_workers):
+    """Queue the failed JIRA updates again and start the background worker."""
+    from ..jira_outbox import JiraOutbox, spawn_flush_worker
+
+    retried = JiraOutbox().retry_failed()
+    if retried:
+        spawn_flush_worker(max_workers)
+    print(f"Queued {retried} failed JIRA update(s) again.")
+    return 0
+
+
+def setup_jira_parser(parser):
+    jira_parser_description = """
+Manage the JIRA updates of 'penifycli commit'.
+1. Comments on the related issues are queued and posted by a background worker after the commit.
+2. Updates that fail are retried with exponential backoff and given up on after a number of attempts.
+3. Use 'status' to see queued and failed updates and 'retry' to queue the failed ones again.
+"""
+    parser.description = jira_parser_description
+    parser.formatter_class = argparse.RawDescriptionHelpFormatter
+    jira_subparsers = parser.add_subparsers(title="jira_subcommand", dest="jira_subcommand", required=True)
+
+    # Subcommand: flush (run by the background worker)
+    flush_parser = jira_subparsers.add_parser("flush", help="Post the queued JIRA updates.")
+    flush_parser.add_argument("--max-workers", type=int, default=4,
+                              help="Maximum number of issues posted to in parallel (default: 4).")
+
+    # Subcommand: status
+    jira_subparsers.add_parser("status", help="Show queued and failed JIRA updates.")
+
+    # Subcommand: retry
+    retry_parser = jira_subparsers.add_parser("retry", help="Queue the failed JIRA updates again.")
+    retry_parser.add_argument("--max-workers", type=int, default=4,
+                              help="Maximum number of issues posted to in parallel (default: 4).")
+
+
+def handle_jira(args):
+    if args.jira_subcommand == "flush":
+        return flush_jira_outbox(args.max_workers)
+    elif args.jira_subcommand == "retry":
+        return retry_jira_outbox(args.max_workers)
+    else:
+        return jira_outbox_status()
@@ -0,0 +1,61 @@
+import argparse
+
+
+def warm_llm(keep_alive=None):
+    """Load the configured LLM on its backend so the next commit does not wait for it.
+
+    Args:
+        keep_alive (str?): How long the backend keeps the model loaded. Defaults to
+            `keep_alive` in the LLM config.
+    """
+    from penify_hook.commands.config_commands import get_llm_config
+    from penify_hook.llm_client import LLMClient
+    from penify_hook.ui_utils import print_error, print_info, print_success
+
+    llm_config = get_llm_config()
+    model = llm_config.get('model')
+    if not model:
+        print_error("No LLM configured. Run 'penifycli config llm' first.")
+        return 1
+
+    llm_client = LLMClient(
+        model=model,
+        api_base=llm_config.get('api_base'),
+        api_key=llm_config.get('api_key'),
+        endpoints=llm_config.get('endpoints'),
+        backend=llm_config.get('backend'),
+        keep_alive=keep_alive if keep_alive is not None else llm_config.get('keep_alive')
+    )
+    print_info(f"Warming up {model}...")
+    try:
+        elapsed = llm_client.warm_up()
+    except Exception as e:
+        print_error(f"Could not warm up {model}: {e}")
+        return 1
+
+    kept = f", kept loaded for {llm_client.keep_alive}" if llm_client.keep_alive is not None else ""
+    print_success(f"{model} is ready ({elapsed:.1f}s{kept})")
+    return 0
+
+
+def setup_llm_parser(parser):
+    llm_parser_description = """
+Manage the local LLM used for commit messages.
+1. 'warm' loads the model on its backend (e.g. Ollama) so the next commit does not wait for it.
+2. Set "keep_alive" in the llm section of .penify/config.json to keep the model loaded between commits.
+3. Set "prewarm": true to warm the model up automatically whenever 'penifycli commit' starts.
+"""
+    parser.description = llm_parser_description
+    parser.formatter_class = argparse.RawDescriptionHelpFormatter
+    llm_subparsers = parser.add_subparsers(title="llm_subcommand", dest="llm_subcommand")
+
+    warm_parser = llm_subparsers.add_parser("warm", help="Load the configured model so the next commit starts fast.")
+    warm_parser.add_argument("--keep-alive", default=None,
+                             help="How long the backend keeps the model loaded, e.g. 30m or -1 (overrides the config).")
+
+
+def handle_llm(args):
+    if args.llm_subcommand == "warm":
+        return warm_llm(args.keep_alive)
+    print("Please specify an llm subcommand: warm")
+    return 1
@@ -1,34 +1,138 @@
 import os
 import re
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 from typing import Optional, List
 from git import Repo
 from tqdm import tqdm
 
 from penify_hook.base_analyzer import BaseAnalyzer
+from penify_hook.diff_plan import read_staged_diff
 from penify_hook.jira_client import JiraClient
-from penify_hook.ui_utils import print_info, print_success, print_warning
+from penify_hook.jira_outbox import JiraOutbox, spawn_flush_worker
+from penify_hook.summary_cache import CommitSummaryCache, hash_context
+from penify_hook.ui_utils import SummaryStreamPrinter, print_info, print_success, print_warning
 from .api_client import APIClient
 
+# How long a commit waits for JIRA issue context before going ahead without it
+DEFAULT_JIRA_DEADLINE_MS = 3000
+
 class CommitDocGenHook(BaseAnalyzer):
-    def __init__(self, repo_path: str, api_client: APIClient, llm_client=None, jira_client=None):
+    def __init__(self, repo_path: str, api_client: APIClient, llm_client=None, jira_client=None,
+                 llm_config: dict = None, jira_config: dict = None):
+        """
+        Args:
+            repo_path: Path of the git repository
+            api_client: Client of the Penify API
+            llm_client: Optional LLMClient generating the summary instead of the Penify API
+            jira_client: Optional JiraClient providing issue context and receiving comments
+            llm_config: The "llm" section of the Penify config; hedge_delay_ms and max_diff_mb are used here
+            jira_config: The "jira" section of the Penify config; deadline_ms is used here
+        """
         super().__init__(repo_path, api_client)
+        llm_config = llm_config or {}
+        jira_config = jira_config or {}
 
         self.llm_client = llm_client  # Add LLM client as an optional parameter
         self.jira_client: JiraClient = jira_client  # Add JIRA client as an optional parameter
+        self.jira_deadline_ms = jira_config.get('deadline_ms') or DEFAULT_JIRA_DEADLINE_MS
+        # Delay after which the Penify API is asked in parallel to a slow local LLM, None to only fall back on errors
+        self.hedge_delay_ms = llm_config.get('hedge_delay_ms')
+        # Ceiling on the staged diff text read into memory, None for the default
+        max_diff_mb = llm_config.get('max_diff_mb')
+        self.max_diff_bytes = int(max_diff_mb * 1024 * 1024) if max_diff_mb else None
+
+    def branch_issue_keys(self) -> List[str]:
+        """Return the JIRA issue keys named in the current branch, or an empty list without JIRA."""
+        if not (self.jira_client and self.jira_client.is_connected()):
+            return []
+        try:
+            return self.jira_client.extract_issue_keys_from_branch(self.repo.active_branch.name) or []
+        except Exception as e:
+            print(f"Could not get JIRA context: {e}")
+            return []
+
+    def start_jira_context_fetch(self, issue_keys: List[str] = None):
+        """Start fetching JIRA context for the issues named in the current branch.
+
+        The fetch runs in a background thread so that it overlaps with
+        collecting the diff and preparing the prompt.
+
+        Args:
+            issue_keys (List[str]): The issues to fetch, defaults to `branch_issue_keys`.
+
+        Returns:
+            tuple: (thread, result dict, deadline) to pass to `wait_for_jira_context`,
+                or None if JIRA is not connected or the branch names no issue.
+        """
+        if issue_keys is None:
+            issue_keys = self.branch_issue_keys()
+        if not issue_keys:
+            return None
+
+        result = {}
+
+        def fetch():
+            try:
+                result['context'] = self.jira_client.get_commit_context_from_issues(issue_keys)
+            except Exception as e:
+                result['error'] = e
+
+        deadline = time.monotonic() + self.jira_deadline_ms / 1000
+        # Daemon thread: a JIRA request that outlives the deadline must not keep the process alive
+        thread = threading.Thread(target=fetch, name="penify-jira-context", daemon=True)
+        thread.start()
+        return thread, result, deadline
 
-    def get_summary(self, instruction: str, generate_description: bool) -> dict:
+    def wait_for_jira_context(self, fetch):
+        """Wait for a fetch started by `start_jira_context_fetch`, at most until its deadline.
+
+        Returns:
+            dict: The JIRA context, or None if there is none or JIRA was too slow.
+        """
+        if fetch is None:
+            return None
+        thread, result, deadline = fetch
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            print_warning(f"JIRA did not respond within {self.jira_deadline_ms} ms, continuing without issue context")
+            return None
+        if 'error' in result:
+            print(f"Could not get JIRA context: {result['error']}")
+        return result.get('context')
+
+    def summary_model_key(self) -> Optional[str]:
+        """Identify the models that may generate the summary, for the summary cache."""
+        if not self.llm_client:
+            return None
+        routes = getattr(self.llm_client, "routes", None)
+        return f"{self.llm_client.model}|{hash_context(routes)}" if routes else self.llm_client.model
+
+    def get_summary(self, instruction: str, generate_description: bool, regenerate: bool = False) -> dict:
         """Generate a summary for the commit based on the staged changes.
 
         This function retrieves the differences of the staged changes in the
         repository and generates a commit summary using the provided
-        instruction. If there are no changes staged for commit, an exception is
+        instruction. The staged changes are planned from their line counts
+        first, and only the diffs of the files worth describing are streamed
+        from git, up to `max_diff_bytes`; see `penify_hook.diff_plan`. If there are no changes staged for commit, an exception is
         raised. If an LLM client is provided, it will use that for generating
-        the summary, otherwise it will use the API client.
+        the summary, otherwise it will use the API client. Summaries are cached
+        by staged tree, instruction, model and the branch's JIRA issues. The
+        cache is looked up before anything else, so a retry on an unchanged
+        index reads no diff, fetches no JIRA context and does not call the
+        model again.
+
+        On a cache miss JIRA context is fetched in the background while the
+        diff is collected and packed for the model; the model call waits for
+        it at most `jira_deadline_ms`.
 
         Args:
             instruction (str): A string containing instructions for generating the commit summary.
+            regenerate (bool): Ignore a cached summary and ask the model again.
 
         Returns:
             str: The generated commit summary based on the staged changes and provided
@@ -37,35 +141,67 @@ class CommitDocGenHook(BaseAnalyzer):
         Raises:
             Exception: If there are no changes staged for commit.
         """
-        diff = self.repo.git.diff('--cached')
+        tree = self.repo.git.write_tree()
+        if self.repo.head.is_valid() and self.repo.head.commit.tree.hexsha == tree:
+            raise ValueError("No changes to commit")
+
+        # Everything the summary depends on is known before the diff is read, so a
+        # retry on an unchanged index returns right away. Routing is decided by the
+        # staged tree, so the configured model and routes stand for the routed model;
+        # JIRA is represented by the branch's issue keys rather than the fetched context.
+        issue_keys = self.branch_issue_keys()
+        cache = CommitSummaryCache()
+        cache_key = cache.make_key(tree, instruction, self.summary_model_key(), issue_keys, generate_description)
+        if not regenerate:
+            summary = cache.get(cache_key)
+            if summary:
+                print_info("Using cached commit summary for the staged changes (use --regenerate to ask again)")
+                return summary
+
+        # Get JIRA context if available, concurrently with the local work below
+        jira_fetch = self.start_jira_context_fetch(issue_keys)
+        if self.llm_client:
+            self.llm_client.preload_backend()
+
+        # Only the diffs of files worth reading: lockfiles, generated and huge files are just noted
+        noise_globs = self.llm_client.diff_ignore if self.llm_client else None
+        diff = read_staged_diff(self.repo, noise_globs, self.max_diff_bytes)
         if not diff:
             raise ValueError("No changes to commit")
-        
-        # Get JIRA context if available
-        jira_context = None
-        if self.jira_client and self.jira_client.is_connected():
-            try:
-                # Check branch name for JIRA issues
-                current_branch = self.repo.active_branch.name
-                issue_keys = self.jira_client.extract_issue_keys_from_branch(current_branch)
-                
-                # If issues found in branch, get context
-                if issue_keys:
-                    jira_context = self.jira_client.get_commit_context_from_issues(issue_keys)
-            except Exception as e:
-                print(f"Could not get JIRA context: {e}")
-        
+        llm_client = self.llm_client
+        if llm_client:
+            # Routing rules in the LLM config may send this diff to another model
+            llm_client = llm_client.route(diff)
+            if llm_client is not self.llm_client:
+                print_info(f"Using LLM model {llm_client.model} ({llm_client.route_name}) for this diff")
+            llm_client.prepare_diff(diff)
+
+        jira_context = self.wait_for_jira_context(jira_fetch)
+
         # Use LLM client if provided, otherwise use API client
         print_info("Fetching commit summary from LLM...")
-        if self.llm_client:
-            return self.api_client.generate_commit_summary_with_llm(
-                diff, instruction, generate_description, self.repo_details, self.llm_client, jira_context
-            )
+        if llm_client:
+            # Show the title and description while they are generated on interactive terminals
+            stream_printer = SummaryStreamPrinter() if sys.stdout.isatty() else None
+            summary = None
+            try:
+                summary = self.api_client.generate_commit_summary_with_llm(
+                    diff, instruction, generate_description, self.repo_details, llm_client, jira_context,
+                    on_stream=stream_printer, hedge_delay_ms=self.hedge_delay_ms
+                )
+            finally:
+                if stream_printer:
+                    # Repairs and hedging can replace what was streamed
+                    stream_printer.finish(summary)
         else:
-            return self.api_client.generate_commit_summary(diff, instruction, self.repo_details, jira_context)
+            summary = self.api_client.generate_commit_summary(diff, instruction, self.repo_details, jira_context)
+
+        if summary:
+            cache.set(cache_key, summary)
+        return summary
     
    
-    def run(self, msg: Optional[str], edit_commit_message: bool, generate_description: bool):
+    def run(self, msg: Optional[str], edit_commit_message: bool, generate_description: bool, regenerate: bool = False):
         """Run the post-commit hook.
 
         This method retrieves the list of modified files from the last commit
@@ -79,26 +215,26 @@ class CommitDocGenHook(BaseAnalyzer):
             msg (Optional[str]): An optional message to include in the commit.
             edit_commit_message (bool): A flag indicating whether to open the
                 git commit edit terminal after committing.
+            regenerate (bool): Ignore a cached summary for the staged changes.
 
         Raises:
             Exception: If there is an error generating the commit summary.
         """
-        summary: dict = self.get_summary(msg, True)
+        summary: dict = self.get_summary(msg, True, regenerate)
         if not summary:
             raise Exception("Error generating commit summary")
         
         title = summary.get('title', "")
         description = summary.get('description', "")
         
-        # If JIRA client is available, integrate JIRA information
-        if self.jira_client and self.jira_client.is_connected():
-            # Add JIRA information to commit message
-            self.process_jira_integration(title, description, msg)
-            
         # commit the changes to the repository with above details
         commit_msg = f"{title}\n\n{description}" if generate_description else title
         self.repo.git.commit('-m', commit_msg)
         print_success(f"Commit: {commit_msg}")
+
+        # If JIRA client is available, queue comments on the related issues
+        if self.jira_client and self.jira_client.is_connected():
+            self.process_jira_integration(title, description, msg)
         
         if edit_commit_message:
             # Open the git commit edit terminal
@@ -139,16 +275,20 @@ class CommitDocGenHook(BaseAnalyzer):
             if issue_keys:
                 print_info(f"Found JIRA issues: {', '.join(issue_keys)}")
                 
-                # Format commit message with JIRA info
-                
-                # Add comments to JIRA issues
+                # Queue comments on the JIRA issues; a background worker posts them
+                outbox = JiraOutbox()
                 for issue_key in issue_keys:
                     comment = (
                         f"Commit related to this issue:\n\n"
                         f"**{title}**\n\n"
                         f"{description}\n\n"
                     )
-                    self.jira_client.add_comment(issue_key, comment)
+                    outbox.enqueue_comment(self.repo_path, self.jira_client.jira_url, issue_key, comment)
+                spawn_flush_worker()
+                failed = len(outbox.failed_ops())
+                if failed:
+                    print_warning(f"{failed} earlier JIRA update(s) could not be posted. "
+                                  f"See 'penifycli jira status' and 'penifycli jira retry'.")
             else:
                 print_warning("No JIRA issues found in commit message or branch name")
                 
@@ -29,7 +29,6 @@ def setup_config_parser(parent_parser):
 def handle_config(args):
     # Only import dependencies needed for config functionality here
     from penify_hook.commands.config_commands import save_llm_config
-    from penify_hook.jira_client import JiraClient  # Import moved here
     from penify_hook.commands.config_commands import config_jira_web, config_llm_web, save_jira_config
 
     if args.config_type == "llm":
@@ -45,13 +44,15 @@ def handle_config(args):
 
         # Verify connection if requested
         if args.verify:
+            # The jira package is heavy, so only import it when verifying
+            from penify_hook.jira_client import JiraClient
             if JiraClient:
                 jira_client = JiraClient(
                     jira_url=args.url,
                     jira_user=args.username,
                     jira_api_token=args.api_token
                 )
-                if jira_client.is_connected():
+                if jira_client.verify_connection():
                     print("JIRA connection verified successfully!")
                 else:
                     print("Failed to connect to JIRA. Please check your credentials.")
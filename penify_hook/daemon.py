@@ -0,0 +1,373 @@
+"""
+Background daemon for Penify CLI.
+
+The daemon keeps heavy dependencies (GitPython, litellm, jira, requests, tqdm,
+colorama) imported and holds warm API, LLM and JIRA clients between
+invocations. When it is running, the `penifycli` entry point forwards
+supported commands to it over a Unix socket instead of executing them in a
+fresh interpreter.
+
+This module is imported on every CLI start-up, so the client side must only
+depend on the standard library.
+"""
+import contextlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV_VAR = "PENIFY_DAEMON_SOCKET"
+DISABLE_ENV_VAR = "PENIFY_NO_DAEMON"
+
+# Commands that can run inside the daemon. Anything that needs an interactive
+# terminal or a browser round trip (login, web config, editing the commit
+# message) or runs for a long time (watch mode, workspace runs) always runs
+# locally.
+FORWARDABLE_COMMANDS = {"commit", "docgen"}
+LOCAL_ONLY_FLAGS = {"-e", "--terminal", "--watch", "--workspace"}
+
+CONNECT_TIMEOUT = 0.2
+# How long control messages and the start of a forwarded command wait for the daemon's answer
+REPLY_TIMEOUT = 2.0
+
+
+def get_socket_path() -> str:
+    """Return the Unix socket path the daemon listens on.
+
+    Returns:
+        str: ``PENIFY_DAEMON_SOCKET`` if set, otherwise a per-user path in the
+            system temp directory.
+    """
+    path = os.environ.get(SOCKET_ENV_VAR)
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(tempfile.gettempdir(), f"penifycli-{uid}.sock")
+
+
+def is_forwardable(argv) -> bool:
+    """Check whether a command line can be served by the daemon.
+
+    Args:
+        argv (list): Command line arguments without the program name.
+
+    Returns:
+        bool: True if the command is non-interactive and supported by the daemon.
+    """
+    if not argv or argv[0] not in FORWARDABLE_COMMANDS:
+        return False
+    if any(arg.split("=", 1)[0] in LOCAL_ONLY_FLAGS for arg in argv[1:]):
+        return False
+    return True
+
+
+def _connect(socket_path: str):
+    """Open a connection to the daemon, or return None if it is not running."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(REPLY_TIMEOUT)
+    return sock
+
+
+def _send(sock, message: dict):
+    sock.sendall((json.dumps(message) + "\n").encode())
+
+
+def send_control(action: str, socket_path: str = None):
+    """Send a control message (``ping`` or ``shutdown``) to the daemon.
+
+    Args:
+        action (str): The control action to perform.
+        socket_path (str?): Socket to connect to. Defaults to :func:`get_socket_path`.
+
+    Returns:
+        dict: The daemon's reply, ``{"responding": False}`` if it did not answer
+            within REPLY_TIMEOUT, or None if the daemon is not running.
+    """
+    sock = _connect(socket_path or get_socket_path())
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("r", encoding="utf-8") as reader:
+            _send(sock, {"control": action})
+            line = reader.readline()
+    except socket.timeout:
+        return {"responding": False}
+    return json.loads(line) if line else None
+
+
+def forward_command(argv, socket_path: str = None):
+    """Forward a CLI invocation to the running daemon.
+
+    Output produced by the command is relayed to this process's stdout and
+    stderr as it arrives. If the daemon is busy with another command or does
+    not accept the command within REPLY_TIMEOUT, the command runs locally.
+
+    Args:
+        argv (list): Command line arguments without the program name.
+        socket_path (str?): Socket to connect to. Defaults to :func:`get_socket_path`.
+
+    Returns:
+        int: The command's exit code, or None if the command was not forwarded
+            and should run locally.
+    """
+    if os.environ.get(DISABLE_ENV_VAR) or not is_forwardable(argv):
+        return None
+
+    sock = _connect(socket_path or get_socket_path())
+    if sock is None:
+        return None
+
+    request = {
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "isatty": sys.stdout.isatty(),
+    }
+    with sock, sock.makefile("r", encoding="utf-8") as reader:
+        try:
+            _send(sock, request)
+            reply = reader.readline()
+        except socket.timeout:
+            return None
+        if not reply or not json.loads(reply).get("accepted"):
+            return None
+        # Commands take as long as they take once they have started
+        sock.settimeout(None)
+        for line in reader:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+                sys.stderr.flush()
+            elif "exit" in message:
+                return message["exit"]
+
+    sys.stderr.write("penifycli daemon closed the connection unexpectedly\n")
+    return 1
+
+
+class _StreamRelay:
+    """File-like object that relays writes to the client as JSON lines."""
+
+    def __init__(self, sock, channel: str, isatty: bool):
+        self.sock = sock
+        self.channel = channel
+        self._isatty = isatty
+
+    def write(self, text):
+        if text:
+            _send(self.sock, {self.channel: text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self._isatty
+
+
+@contextlib.contextmanager
+def _client_context(cwd: str, env: dict):
+    """Temporarily adopt the client's working directory and environment.
+
+    Subprocesses of the command, such as git hooks that run penifycli, must
+    not forward to this daemon, which is busy serving the command.
+    """
+    saved_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    os.environ[DISABLE_ENV_VAR] = "1"
+    try:
+        os.chdir(cwd)
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+class PenifyDaemon:
+    """Unix socket server that executes penifycli commands in a warm process.
+
+    Each connection is served by a thread of its own, so control messages are
+    answered while a command runs. Commands run one at a time: they depend on
+    the current working directory and environment, which are process-wide. A
+    command arriving while another one runs is declined and runs locally.
+    """
+
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or get_socket_path()
+        self.started_at = None
+        self.requests_served = 0
+        self._server = None
+        self._stop = threading.Event()
+        self._command_lock = threading.Lock()
+
+    def warm_up(self):
+        """Import the heavy modules used by commit and docgen up front."""
+        modules = [
+            "penify_hook.main",
+            "penify_hook.commands.commit_commands",
+            "penify_hook.commands.doc_commands",
+            "penify_hook.commands.config_commands",
+            "penify_hook.commit_analyzer",
+            "penify_hook.git_analyzer",
+            "penify_hook.file_analyzer",
+            "penify_hook.folder_analyzer",
+            "penify_hook.api_client",
+            "penify_hook.llm_client",
+            "penify_hook.jira_client",
+            "penify_hook.ui_utils",
+            # Imported lazily by the modules above, so load them explicitly
+            "git",
+            "tqdm",
+        ]
+        for module in modules:
+            try:
+                __import__(module)
+            except ImportError as e:
+                logger.warning(f"Could not pre-import {module}: {e}")
+        try:
+            from penify_hook.llm_client import get_litellm
+            get_litellm()
+        except ImportError as e:
+            logger.warning(f"Could not pre-import litellm: {e}")
+
+    def serve_forever(self):
+        """Bind the socket and serve requests until shutdown is requested."""
+        if os.path.exists(self.socket_path):
+            if send_control("ping", self.socket_path) is not None:
+                raise RuntimeError(f"A penifycli daemon is already running on {self.socket_path}")
+            # Stale socket left behind by a daemon that did not exit cleanly
+            os.unlink(self.socket_path)
+
+        self.warm_up()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen(8)
+        self._server.settimeout(0.5)
+        self.started_at = time.time()
+        logger.info(f"penifycli daemon listening on {self.socket_path}")
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), name="penify-daemon-request",
+                                 daemon=True).start()
+        finally:
+            self._server.close()
+            # Let a running command finish before the daemon exits
+            with self._command_lock:
+                pass
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Ask the serving loop to stop after the current request."""
+        self._stop.set()
+
+    def _serve_connection(self, conn):
+        with conn:
+            # Only the accepted command may take long; the request itself must arrive promptly
+            conn.settimeout(REPLY_TIMEOUT)
+            try:
+                self.handle_connection(conn)
+            except Exception as e:
+                logger.error(f"Error handling daemon request: {e}")
+
+    def handle_connection(self, conn):
+        """Read one request from ``conn`` and reply to it."""
+        with conn.makefile("r", encoding="utf-8") as reader:
+            line = reader.readline()
+        if not line:
+            return
+        request = json.loads(line)
+
+        control = request.get("control")
+        if control == "ping":
+            _send(conn, self.status())
+        elif control == "shutdown":
+            _send(conn, {"stopping": True, "pid": os.getpid()})
+            self.shutdown()
+        elif "argv" in request:
+            if not self._command_lock.acquire(blocking=False):
+                _send(conn, {"busy": True})
+                return
+            try:
+                _send(conn, {"accepted": True})
+                conn.settimeout(None)
+                exit_code = self.execute(request, conn)
+                _send(conn, {"exit": exit_code})
+            finally:
+                self._command_lock.release()
+        else:
+            _send(conn, {"error": "Unknown request"})
+
+    def status(self) -> dict:
+        """Return basic information about the running daemon."""
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "uptime": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "requests_served": self.requests_served,
+            "running_command": self._command_lock.locked(),
+        }
+
+    def execute(self, request: dict, conn) -> int:
+        """Run a forwarded command with its output relayed to the client.
+
+        Args:
+            request (dict): The request holding ``argv``, ``cwd``, ``env`` and ``isatty``.
+            conn (socket.socket): Connection to the client.
+
+        Returns:
+            int: The command's exit code.
+        """
+        from penify_hook.main import build_parser, run_command
+
+        # Built before redirecting output: modules imported here (colorama in
+        # particular) must bind to the daemon's own streams, not the client's.
+        parser = build_parser()
+        isatty = bool(request.get("isatty"))
+        stdout = _StreamRelay(conn, "out", isatty)
+        stderr = _StreamRelay(conn, "err", isatty)
+        self.requests_served += 1
+
+        with _client_context(request["cwd"], request.get("env", {})), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                args = parser.parse_args(request["argv"])
+                result = run_command(args, parser)
+                return result if isinstance(result, int) else 0
+            except SystemExit as e:
+                if e.code is None:
+                    return 0
+                if isinstance(e.code, int):
+                    return e.code
+                print(e.code, file=sys.stderr)
+                return 1
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
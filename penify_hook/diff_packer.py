@@ -0,0 +1,276 @@
+"""
+Token-budgeted packing of git diffs for commit message prompts.
+
+Lockfiles, vendored and generated code, minified assets and binary changes
+are reduced to a one-line note. The remaining hunks are ranked by how much
+reviewable change they carry per token and packed until the token budget of
+the target model is used up, so that the prompt keeps the changes that
+actually describe the commit.
+"""
+import fnmatch
+import math
+import os
+import re
+from typing import Callable, List, Optional, Tuple
+
+# Paths whose diffs say little about the intent of a commit
+DEFAULT_NOISE_GLOBS = [
+    # Lockfiles
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+    "Pipfile.lock", "uv.lock", "Cargo.lock", "go.sum", "composer.lock", "Gemfile.lock", "*.lock",
+    # Vendored and build output
+    "vendor/*", "node_modules/*", "third_party/*", "dist/*",
+    # Generated code and minified assets
+    "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.generated.*",
+    "*.snap",
+]
+
+# First line of the note naming files left out of a diff
+OMITTED_HEADER = "Omitted from the diff (lockfiles, generated, vendored, binary or very large files):"
+
+# Relative weight of a changed line, by kind of file
+DOC_EXTENSIONS = {"md", "rst", "txt", "adoc"}
+CONFIG_EXTENSIONS = {"json", "yaml", "yml", "toml", "ini", "cfg", "xml", "lock"}
+
+# Characters per token assumed when estimating token counts
+CHARS_PER_TOKEN = 4
+# Longer hunks (typically whole new files) are ranked and packed in pieces of this many lines
+MAX_SEGMENT_LINES = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, without the model's tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _matches_any(path: str, globs: List[str]) -> bool:
+    name = os.path.basename(path)
+    for pattern in globs:
+        if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, f"*/{pattern}"):
+            return True
+    return False
+
+
+def matches_noise(path: str, noise_globs: Optional[List[str]] = None) -> bool:
+    """Check whether a path matches DEFAULT_NOISE_GLOBS or one of `noise_globs`, at any depth."""
+    return _matches_any(path, DEFAULT_NOISE_GLOBS + list(noise_globs or []))
+
+
+def split_preamble(diff: str) -> Tuple[str, str]:
+    """Split text preceding the first file of a diff, such as the note of `DiffPlan.notes`, from the diff."""
+    match = re.search(r'(?m)^diff --git ', diff)
+    if match is None:
+        return (diff, "") if diff.startswith(OMITTED_HEADER) else ("", diff)
+    return diff[:match.start()], diff[match.start():]
+
+
+class FileDiff:
+    """The diff of a single file, split into its header and hunks.
+
+    Long hunks are stored as several segments, see `split_hunk`.
+    """
+
+    def __init__(self, path: str, header: str, hunks: List[str]):
+        self.path = path
+        self.header = header
+        self.hunks = hunks
+        self.binary = "Binary files " in header or "GIT binary patch" in header
+
+    @property
+    def added(self) -> int:
+        return sum(1 for hunk in self.hunks for line in hunk.splitlines() if line.startswith("+"))
+
+    @property
+    def removed(self) -> int:
+        return sum(1 for hunk in self.hunks for line in hunk.splitlines() if line.startswith("-"))
+
+
+def split_hunk(hunk: str, max_lines: int = MAX_SEGMENT_LINES) -> List[str]:
+    """Split a hunk into consecutive segments of at most `max_lines` lines."""
+    lines = hunk.splitlines(keepends=True)
+    return ["".join(lines[start:start + max_lines]) for start in range(0, len(lines), max_lines)] or [hunk]
+
+
+def header_path(header: str) -> str:
+    """Return the path a file header of a unified diff names; the old path for deleted files."""
+    match = re.search(r'(?m)^\+\+\+ b/(.*)$', header) or re.search(r'^diff --git a/.* b/(.*)$', header, re.M)
+    path = match.group(1).strip() if match else header.splitlines()[0]
+    if path == "/dev/null":
+        # Deleted file: the old path is the one worth naming
+        old = re.search(r'(?m)^--- a/(.*)$', header)
+        path = old.group(1).strip() if old else path
+    return path
+
+
+def parse_diff(diff: str) -> List[FileDiff]:
+    """
+    Split a unified diff (as produced by `git diff`) into per-file diffs.
+
+    Args:
+        diff: The diff text
+
+    Returns:
+        List of FileDiff in the order they appear in the diff
+    """
+    files = []
+    for file_diff in re.split(r'(?m)^(?=diff --git )', diff):
+        if not file_diff.strip():
+            continue
+        parts = re.split(r'(?m)^(?=@@ )', file_diff)
+        header = parts[0]
+        hunks = [segment for hunk in parts[1:] for segment in split_hunk(hunk)]
+        files.append(FileDiff(header_path(header), header, hunks))
+    return files
+
+
+class DiffPacker:
+    """
+    Packs a diff into a token budget.
+
+    Args:
+        token_budget: Maximum number of tokens of the packed diff
+        count_tokens: Callable returning the token count of a string for the
+            target model; defaults to a character based estimate
+        noise_globs: Extra glob patterns of paths to leave out, added to DEFAULT_NOISE_GLOBS
+    """
+
+    def __init__(self, token_budget: int, count_tokens: Optional[Callable[[str], int]] = None,
+                 noise_globs: Optional[List[str]] = None):
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens or estimate_tokens
+        self.noise_globs = DEFAULT_NOISE_GLOBS + list(noise_globs or [])
+
+    def is_noise(self, path: str) -> bool:
+        """Check whether a path matches one of the noise globs, at any depth."""
+        return _matches_any(path, self.noise_globs)
+
+    @staticmethod
+    def file_weight(path: str) -> float:
+        """Weight of a changed line in this file relative to one in regular source code."""
+        extension = os.path.splitext(path)[1].lower()[1:]
+        name = os.path.basename(path).lower()
+        if extension in DOC_EXTENSIONS:
+            return 0.5
+        if extension in CONFIG_EXTENSIONS:
+            return 0.6
+        if name.startswith("test") or "/tests/" in f"/{path}" or name.endswith(("_test.py", ".spec.js", ".test.js")):
+            return 0.8
+        return 1.0
+
+    @staticmethod
+    def informative_lines(hunk: str) -> int:
+        """Count added and removed lines that change more than whitespace."""
+        return sum(
+            1 for line in hunk.splitlines()
+            if line[:1] in "+-" and not line.startswith(("+++", "---")) and line[1:].strip()
+        )
+
+    def pack(self, diff: str) -> dict:
+        """
+        Pack a diff into the token budget.
+
+        Every non-noise file first gets its header and its most informative
+        hunk, in order of importance, so that as many files as possible are
+        represented. The rest of the budget is filled with the remaining hunks
+        ranked by informative lines per token. The packed diff keeps the
+        original order of files and hunks. A note preceding the diff on files
+        left out when it was read (see `DiffPlan.notes`) is kept with the
+        notes on noise files.
+
+        Args:
+            diff: The diff text
+
+        Returns:
+            Dict with:
+                diff: The packed diff, with notes about omitted content
+                tokens: Token count of the packed diff
+                omitted_files: Non-noise files that did not fit at all
+                omitted_hunks: Number of hunks left out of included files
+                noise_files: Paths reduced to a one-line note
+        """
+        preamble, diff = split_preamble(diff)
+        files = parse_diff(diff)
+        noise = [f for f in files if f.binary or self.is_noise(f.path)]
+        code = [f for f in files if not (f.binary or self.is_noise(f.path))]
+
+        # Files already left out when the diff was read are noted together with the noise
+        notes = preamble.splitlines()
+        if noise:
+            if not notes or notes[0] != OMITTED_HEADER:
+                notes.append(OMITTED_HEADER)
+            notes.extend(f"  {f.path} (binary)" if f.binary else f"  {f.path} (+{f.added} -{f.removed})"
+                         for f in noise)
+        notes_text = "\n".join(notes) + "\n" if notes else ""
+        used = self.count_tokens(notes_text) if notes_text else 0
+
+        # Candidate hunks: (score, file index, hunk index, tokens)
+        candidates = []
+        header_tokens = {}
+        for i, f in enumerate(code):
+            header_tokens[i] = self.count_tokens(f.header)
+            weight = self.file_weight(f.path)
+            for j, hunk in enumerate(f.hunks):
+                tokens = max(self.count_tokens(hunk), 1)
+                candidates.append((weight * self.informative_lines(hunk) / tokens, i, j, tokens))
+
+        selected = {i: set() for i in range(len(code))}
+        included_files = set()
+
+        def take(i, j, tokens):
+            nonlocal used
+            cost = tokens + (0 if i in included_files else header_tokens[i])
+            if used + cost > self.token_budget:
+                return False
+            used += cost
+            included_files.add(i)
+            if j is not None:
+                selected[i].add(j)
+            return True
+
+        # Coverage pass: the best hunk of each file, files with the most change first
+        best_per_file = {}
+        for score, i, j, tokens in candidates:
+            if i not in best_per_file or score > best_per_file[i][0]:
+                best_per_file[i] = (score, i, j, tokens)
+        for i, f in enumerate(code):
+            if not f.hunks:
+                # Renames, mode changes and empty files are described by their header
+                take(i, None, 0)
+        importance = {
+            i: self.file_weight(f.path) * sum(self.informative_lines(hunk) for hunk in f.hunks)
+            for i, f in enumerate(code)
+        }
+        for score, i, j, tokens in sorted(best_per_file.values(), key=lambda c: (-importance[c[1]], c[1])):
+            take(i, j, tokens)
+
+        # Fill pass: everything else by density
+        for score, i, j, tokens in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+            if i in included_files and j not in selected[i]:
+                take(i, j, tokens)
+
+        parts = []
+        omitted_hunks = 0
+        for i, f in enumerate(code):
+            if i not in included_files:
+                continue
+            parts.append(f.header)
+            for j, hunk in enumerate(f.hunks):
+                if j in selected[i]:
+                    parts.append(hunk)
+            skipped = len(f.hunks) - len(selected[i])
+            if skipped:
+                omitted_hunks += skipped
+                parts.append(f"... {skipped} more hunk(s) of {f.path} omitted\n")
+
+        omitted_files = [f.path for i, f in enumerate(code) if i not in included_files]
+        if omitted_files:
+            parts.append(f"... {len(omitted_files)} more file(s) omitted: {', '.join(omitted_files)}\n")
+        packed = "".join(part if part.endswith("\n") else part + "\n" for part in parts) + notes_text
+
+        return {
+            "diff": packed,
+            "tokens": used,
+            "omitted_files": omitted_files,
+            "omitted_hunks": omitted_hunks,
+            "noise_files": [f.path for f in noise],
+        }
@@ -0,0 +1,201 @@
+"""
+Planning which staged changes are read for a commit message.
+
+`git diff --cached --numstat` is cheap even on huge commits: it reports the
+added and removed lines of every file without producing the diff text. From
+it a plan is made of the files whose diff is read in full and the ones only
+noted with their line counts (lockfiles, generated, vendored, binary and very
+large files). Only the diffs of the included files are then requested from
+git, so a regenerated lockfile or a vendor drop is never held in memory or
+packed into a prompt.
+"""
+import itertools
+from typing import List, Optional
+
+from penify_hook.diff_packer import OMITTED_HEADER, matches_noise
+from penify_hook.diff_reader import DEFAULT_MAX_BYTES, iter_diff_lines, iter_file_diffs
+
+# Files with more changed lines than this are only noted
+MAX_FILE_LINES = 20_000
+# Changed lines read in total; files beyond that are only noted, smaller files are read first
+MAX_TOTAL_LINES = 100_000
+# Files named in the note; further ones are only counted
+MAX_NOTED_FILES = 50
+# Paths passed to one `git diff` call, keeping command lines short
+PATHS_PER_COMMAND = 200
+
+
+class PlannedFile:
+    """A staged file as reported by `git diff --numstat`.
+
+    `added` and `removed` are None for binary files. `old_path` is set for renames and copies.
+    """
+
+    def __init__(self, path: str, added: Optional[int], removed: Optional[int], old_path: str = None):
+        self.path = path
+        self.added = added
+        self.removed = removed
+        self.old_path = old_path
+
+    @property
+    def binary(self) -> bool:
+        return self.added is None
+
+    @property
+    def changed(self) -> int:
+        return 0 if self.binary else self.added + self.removed
+
+    def note(self) -> str:
+        return f"  {self.path} (binary)" if self.binary else f"  {self.path} (+{self.added} -{self.removed})"
+
+
+def parse_numstat(output: str) -> List[PlannedFile]:
+    """
+    Parse the output of `git diff --numstat -z`.
+
+    Each record is `added<TAB>removed<TAB>path<NUL>`, or for renames and copies
+    `added<TAB>removed<TAB><NUL>old path<NUL>new path<NUL>`; binary files have
+    `-` as counts.
+    """
+    files = []
+    fields = output.split("\0")
+    index = 0
+    while index < len(fields):
+        record = fields[index].lstrip("\n")
+        index += 1
+        if not record:
+            continue
+        added, removed, path = record.split("\t", 2)
+        old_path = None
+        if not path:
+            old_path, path = fields[index], fields[index + 1]
+            index += 2
+        counts = (None, None) if added == "-" else (int(added), int(removed))
+        files.append(PlannedFile(path, *counts, old_path=old_path))
+    return files
+
+
+class DiffPlan:
+    """
+    Which staged files are read in full and which are only noted.
+
+    Attributes:
+        files: Every staged file, in git's order
+        included: Files whose diff is read
+        noted: Files only named in the note, with their line counts
+        unlisted: Number of further noted files left out of the note
+    """
+
+    def __init__(self, files: List[PlannedFile], included: List[PlannedFile], noted: List[PlannedFile]):
+        self.files = files
+        self.included = included
+        self.noted = noted
+
+    @property
+    def unlisted(self) -> int:
+        return max(len(self.noted) - MAX_NOTED_FILES, 0)
+
+    def notes(self) -> str:
+        """The note naming the files left out of the diff, empty if there are none."""
+        if not self.noted:
+            return ""
+        lines = [OMITTED_HEADER] + [f.note() for f in self.noted[:MAX_NOTED_FILES]]
+        if self.unlisted:
+            lines.append(f"  ... and {self.unlisted} more file(s)")
+        return "\n".join(lines) + "\n"
+
+    def read_diff(self, repo, *args: str, max_bytes: int = DEFAULT_MAX_BYTES) -> str:
+        """
+        Read the diffs of the included files.
+
+        The diffs are streamed from git and at most `max_bytes` of diff text
+        is kept, see `penify_hook.diff_reader`. Files of which nothing could
+        be kept are moved to `noted`.
+
+        Args:
+            repo: The git.Repo
+            *args: Arguments selecting what to diff, e.g. "--cached"
+            max_bytes: Diff text kept in total
+
+        Returns:
+            The diff text of the included files
+        """
+        paths = []
+        for f in self.included:
+            # Both names of a rename, so that git still detects it
+            paths.extend([f.old_path, f.path] if f.old_path else [f.path])
+        batches = ([f":(literal){path}" for path in paths[start:start + PATHS_PER_COMMAND]]
+                   for start in range(0, len(paths), PATHS_PER_COMMAND))
+        lines = itertools.chain.from_iterable(iter_diff_lines(repo, *args, "--", *batch) for batch in batches)
+
+        parts = []
+        for file_diff in iter_file_diffs(lines, max_bytes=max_bytes):
+            if file_diff.truncated and not file_diff.hunks:
+                self.noted.append(PlannedFile(file_diff.path, file_diff.added, file_diff.removed))
+            else:
+                parts.append(file_diff.text())
+        return "".join(parts)
+
+
+def plan_diff(files: List[PlannedFile], noise_globs: List[str] = None, max_file_lines: int = MAX_FILE_LINES,
+              max_total_lines: int = MAX_TOTAL_LINES) -> DiffPlan:
+    """
+    Decide which files are read in full.
+
+    Binary files, files matching the noise globs and files with more than
+    `max_file_lines` changed lines are noted. The remaining files are
+    included, smallest first, as long as the total number of changed lines
+    stays within `max_total_lines`; the rest are noted as well.
+
+    Args:
+        files: The staged files, see `parse_numstat`
+        noise_globs: Extra glob patterns of paths to note only, added to DEFAULT_NOISE_GLOBS
+        max_file_lines: Changed lines of a file above which it is noted
+        max_total_lines: Changed lines read in total
+
+    Returns:
+        The DiffPlan, keeping git's order of files
+    """
+    candidates = []
+    noted = set()
+    for index, f in enumerate(files):
+        if f.binary or f.changed > max_file_lines or matches_noise(f.path, noise_globs):
+            noted.add(index)
+        else:
+            candidates.append(index)
+
+    total = 0
+    for index in sorted(candidates, key=lambda i: files[i].changed):
+        if total + files[index].changed > max_total_lines:
+            noted.add(index)
+            continue
+        total += files[index].changed
+
+    return DiffPlan(
+        files,
+        [f for index, f in enumerate(files) if index not in noted],
+        [f for index, f in enumerate(files) if index in noted],
+    )
+
+
+def plan_staged_changes(repo, noise_globs: List[str] = None) -> DiffPlan:
+    """Plan the staged changes of a repository from `git diff --cached --numstat`."""
+    return plan_diff(parse_numstat(repo.git.diff("--cached", "--numstat", "-z")), noise_globs)
+
+
+def read_staged_diff(repo, noise_globs: List[str] = None, max_bytes: int = None) -> str:
+    """
+    Read the staged diff for a commit message prompt.
+
+    Args:
+        repo: The git.Repo
+        noise_globs: Extra glob patterns of paths to note only
+        max_bytes: Diff text kept in total, defaults to DEFAULT_MAX_BYTES
+
+    Returns:
+        The note on left out files followed by the diffs of the included
+        files, or an empty string if nothing is staged
+    """
+    plan = plan_staged_changes(repo, noise_globs)
+    diff = plan.read_diff(repo, "--cached", max_bytes=max_bytes or DEFAULT_MAX_BYTES)
+    return plan.notes() + diff
@@ -0,0 +1,159 @@
+"""
+Streaming reader of `git diff` output.
+
+The diff is read from git's pipe line by line and split into files as it
+arrives, so a commit with a huge vendor drop never has to fit in memory.
+Text beyond a per-file and a total ceiling is skipped: skipped lines are
+still counted, but not kept. Overlong lines, as in minified assets, are cut.
+"""
+from typing import Iterable, Iterator, List
+
+from penify_hook.diff_packer import FileDiff, header_path
+
+# Diff text kept per file and in total, in bytes of (mostly ASCII) text
+DEFAULT_MAX_FILE_BYTES = 1024 * 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Longer lines are cut to this length
+MAX_LINE_BYTES = 16 * 1024
+
+
+def iter_diff_lines(repo, *args: str) -> Iterator[str]:
+    """
+    Run `git diff` and yield its output line by line as git produces it.
+
+    Every line ends with a newline; lines longer than MAX_LINE_BYTES are cut.
+    Closing the iterator early stops git.
+
+    Args:
+        repo: The git.Repo
+        *args: Arguments of `git diff`
+
+    Raises:
+        git.GitCommandError: If git fails
+    """
+    process = repo.git.diff(*args, as_process=True)
+    finished = False
+    try:
+        stdout = process.stdout
+        while True:
+            line = stdout.readline(MAX_LINE_BYTES)
+            if not line:
+                break
+            if not line.endswith(b"\n"):
+                # Skip the rest of an overlong line
+                rest = line
+                while len(rest) == MAX_LINE_BYTES and not rest.endswith(b"\n"):
+                    rest = stdout.readline(MAX_LINE_BYTES)
+                line += b"\n"
+            yield line.decode("utf-8", errors="replace")
+        finished = True
+    finally:
+        if finished:
+            process.wait()
+        elif process.proc is not None:
+            process.proc.kill()
+            process.proc.wait()
+
+
+class StreamedFileDiff(FileDiff):
+    """
+    A file of a streamed diff.
+
+    `added` and `removed` count every changed line of the file, including the
+    ones that were skipped. `skipped_lines` is the number of diff lines not kept.
+    """
+
+    def __init__(self, path: str, header: str, hunks: List[str], added: int, removed: int, skipped_lines: int):
+        super().__init__(path, header, hunks)
+        self._added = added
+        self._removed = removed
+        self.skipped_lines = skipped_lines
+
+    @property
+    def added(self) -> int:
+        return self._added
+
+    @property
+    def removed(self) -> int:
+        return self._removed
+
+    @property
+    def truncated(self) -> bool:
+        return self.skipped_lines > 0
+
+    def text(self) -> str:
+        """The kept diff text, with a note on the skipped lines."""
+        text = self.header + "".join(self.hunks)
+        if self.truncated:
+            text += f"... {self.skipped_lines} more line(s) of the diff of {self.path} not read\n"
+        return text
+
+
+class _FileBuilder:
+    def __init__(self, first_line: str, limit: int):
+        self.header = [first_line]
+        self.hunks = []
+        self.limit = limit
+        self.kept = len(first_line)
+        self.added = 0
+        self.removed = 0
+        self.skipped = 0
+        self.in_hunk = False
+
+    def add(self, line: str):
+        if line.startswith("@@"):
+            self.in_hunk = True
+        elif self.in_hunk:
+            # Header lines such as "--- a/x" only come before the first hunk
+            if line.startswith("+"):
+                self.added += 1
+            elif line.startswith("-"):
+                self.removed += 1
+        if self.skipped or self.kept + len(line) > self.limit:
+            # Once over the limit the rest of the file is skipped, so kept hunks stay contiguous
+            self.skipped += 1
+            return
+        self.kept += len(line)
+        if line.startswith("@@"):
+            self.hunks.append([line])
+        elif self.hunks:
+            self.hunks[-1].append(line)
+        else:
+            self.header.append(line)
+
+    def build(self) -> StreamedFileDiff:
+        header = "".join(self.header)
+        hunks = ["".join(hunk) for hunk in self.hunks]
+        return StreamedFileDiff(header_path(header), header, hunks, self.added, self.removed, self.skipped)
+
+
+def iter_file_diffs(lines: Iterable[str], max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                    max_bytes: int = DEFAULT_MAX_BYTES) -> Iterator[StreamedFileDiff]:
+    """
+    Split streamed diff lines into files.
+
+    Each file keeps at most `max_file_bytes` of text, and all files together
+    at most `max_bytes`; once that is used up, files are yielded with their
+    header and line counts only.
+
+    Args:
+        lines: Lines of `git diff` output, see `iter_diff_lines`
+        max_file_bytes: Text kept per file
+        max_bytes: Text kept in total
+
+    Returns:
+        Iterator of StreamedFileDiff, in the order of the diff
+    """
+    remaining = max_bytes
+    current = None
+    for line in lines:
+        if line.startswith("diff --git "):
+            if current is not None:
+                remaining -= current.kept
+                yield current.build()
+            # The header line is always kept so every file is named
+            current = _FileBuilder(line, min(max_file_bytes, max(remaining, 0)))
+        elif current is not None:
+            current.add(line)
+    if current is not None:
+        yield current.build()
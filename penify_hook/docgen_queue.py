@@ -0,0 +1,277 @@
+"""
+Local spool for asynchronous documentation generation.
+
+The asynchronous post-commit hook only records a small job (repository and
+commit SHA) in the spool and returns. A detached worker drains the spool,
+coalescing queued commits of the same repository into a single docgen pass and
+processing different repositories concurrently up to a configurable limit.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from penify_hook.utils import get_penify_cache_dir
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 2
+MAX_RESULTS = 50
+
+
+class DocGenQueue:
+    """
+    File-based queue of docgen jobs.
+
+    Layout of the spool directory:
+        pending/   jobs waiting to be processed, one JSON file per commit
+        running/   jobs claimed by the worker
+        results/   outcome of processed batches, most recent kept
+    """
+
+    def __init__(self, spool_dir: str = None):
+        self.spool_dir = spool_dir or os.path.join(get_penify_cache_dir(), "docgen-queue")
+        self.pending_dir = os.path.join(self.spool_dir, "pending")
+        self.running_dir = os.path.join(self.spool_dir, "running")
+        self.results_dir = os.path.join(self.spool_dir, "results")
+        for directory in (self.pending_dir, self.running_dir, self.results_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._lock_file = None
+
+    def _write_json(self, path: str, data: dict):
+        """Write JSON atomically so readers never see a partial record."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_jobs(self, directory: str) -> list:
+        jobs = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r") as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable docgen job {path}: {e}")
+                continue
+            job["_file"] = name
+            jobs.append(job)
+        return jobs
+
+    def enqueue(self, repo_path: str, commit_sha: str) -> str:
+        """
+        Add a docgen job for a commit.
+
+        Args:
+            repo_path: Root of the git repository
+            commit_sha: The commit to document
+
+        Returns:
+            Path of the job record
+        """
+        job = {
+            "repo_path": os.path.abspath(repo_path),
+            "commit": commit_sha,
+            "enqueued_at": time.time(),
+        }
+        path = os.path.join(self.pending_dir, f"{time.time_ns()}-{commit_sha[:12]}.json")
+        self._write_json(path, job)
+        return path
+
+    def pending_jobs(self) -> list:
+        """Return queued jobs, oldest first."""
+        return self._read_jobs(self.pending_dir)
+
+    def running_jobs(self) -> list:
+        """Return jobs currently claimed by the worker."""
+        return self._read_jobs(self.running_dir)
+
+    def claim(self, jobs: list) -> list:
+        """Move jobs from pending to running. Jobs claimed elsewhere are skipped."""
+        claimed = []
+        for job in jobs:
+            try:
+                os.replace(os.path.join(self.pending_dir, job["_file"]),
+                           os.path.join(self.running_dir, job["_file"]))
+                claimed.append(job)
+            except FileNotFoundError:
+                continue
+        return claimed
+
+    def complete(self, jobs: list):
+        """Remove finished jobs from the running directory."""
+        for job in jobs:
+            try:
+                os.remove(os.path.join(self.running_dir, job["_file"]))
+            except FileNotFoundError:
+                pass
+
+    def requeue_stale(self):
+        """Return jobs left in running/ by a worker that died back to pending/."""
+        for name in os.listdir(self.running_dir):
+            os.replace(os.path.join(self.running_dir, name), os.path.join(self.pending_dir, name))
+
+    @staticmethod
+    def coalesce(jobs: list) -> dict:
+        """
+        Group jobs by repository, keeping enqueue order and dropping duplicate commits.
+
+        Returns:
+            Dict mapping repository path to its list of jobs
+        """
+        batches = {}
+        for job in jobs:
+            batch = batches.setdefault(job["repo_path"], [])
+            if job["commit"] not in [queued["commit"] for queued in batch]:
+                batch.append(job)
+        return batches
+
+    def record_result(self, repo_path: str, commits: list, status: str, summary: dict = None, error: str = None):
+        """Store the outcome of a processed batch and prune old results."""
+        result = {
+            "repo_path": repo_path,
+            "commits": commits,
+            "status": status,
+            "summary": summary or {},
+            "error": error,
+            "finished_at": time.time(),
+        }
+        path = os.path.join(self.results_dir, f"{time.time_ns()}-{commits[-1][:12]}.json")
+        self._write_json(path, result)
+
+        results = sorted(name for name in os.listdir(self.results_dir) if name.endswith(".json"))
+        for name in results[:-MAX_RESULTS]:
+            os.remove(os.path.join(self.results_dir, name))
+
+    def recent_results(self, limit: int = 10) -> list:
+        """Return the most recent results, newest first."""
+        return list(reversed(self._read_jobs(self.results_dir)))[:limit]
+
+    def acquire_worker_lock(self) -> bool:
+        """Try to become the single worker draining this spool."""
+        self._lock_file = open(os.path.join(self.spool_dir, "worker.lock"), "w")
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def release_worker_lock(self):
+        if self._lock_file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def drain(self, process_batch, max_workers: int = DEFAULT_MAX_WORKERS) -> int:
+        """
+        Process queued jobs until the spool is empty.
+
+        Commits of the same repository are coalesced into one batch. Batches of
+        different repositories run concurrently, at most `max_workers` at a time.
+
+        Args:
+            process_batch: Callable taking (repo_path, commits) and returning a summary dict
+            max_workers: Maximum number of repositories processed in parallel
+
+        Returns:
+            Number of batches processed, or -1 if another worker holds the lock
+        """
+        if not self.acquire_worker_lock():
+            return -1
+
+        processed = 0
+        while True:
+            try:
+                self.requeue_stale()
+                while True:
+                    jobs = self.claim(self.pending_jobs())
+                    if not jobs:
+                        break
+                    batches = self.coalesce(jobs)
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        for repo_path, batch in batches.items():
+                            executor.submit(self._run_batch, process_batch, repo_path, batch)
+                    self.complete(jobs)
+                    processed += len(batches)
+            finally:
+                self.release_worker_lock()
+
+            # A job enqueued while we were releasing the lock would otherwise
+            # wait for the next commit: its own worker gave up on the lock.
+            if not self.pending_jobs() or not self.acquire_worker_lock():
+                return processed
+
+    def _run_batch(self, process_batch, repo_path: str, batch: list):
+        commits = [job["commit"] for job in batch]
+        try:
+            summary = process_batch(repo_path, commits)
+            self.record_result(repo_path, commits, "success", summary)
+        except Exception as e:
+            logger.error(f"Docgen failed for {repo_path} at {commits[-1]}: {e}")
+            self.record_result(repo_path, commits, "failed", error=str(e))
+
+
+def document_commits(api_client, repo_path: str, commits: list) -> dict:
+    """
+    Generate documentation for a batch of queued commits of one repository.
+
+    When the commits form a linear history they are documented in a single
+    pass over the combined range; otherwise each commit is documented on its own.
+
+    Returns:
+        Combined counts of processed, updated and failed files
+    """
+    from git import Repo
+    from penify_hook.git_analyzer import GitDocGenHook
+
+    repo = Repo(repo_path)
+    oldest, newest = repo.commit(commits[0]), repo.commit(commits[-1])
+    linear = len(commits) == 1 or all(
+        repo.is_ancestor(previous, current) for previous, current in zip(commits, commits[1:])
+    )
+
+    if linear:
+        base = oldest.parents[0].hexsha if oldest.parents else None
+        ranges = [(base, newest.hexsha)]
+    else:
+        ranges = [(None, commit) for commit in commits]
+
+    totals = {"processed": 0, "updated": 0, "failed": 0}
+    for base, head in ranges:
+        summary = GitDocGenHook(repo_path, api_client, base_commit=base, head_commit=head).run()
+        for key in totals:
+            totals[key] += summary.get(key, 0)
+    return totals
+
+
+def spawn_worker(max_workers: int = DEFAULT_MAX_WORKERS):
+    """Start a detached worker process that drains the docgen queue."""
+    log_path = os.path.join(get_penify_cache_dir(), "docgen-worker.log")
+    # The worker must never be forwarded to the daemon: it runs for minutes
+    env = dict(os.environ, PENIFY_NO_DAEMON="1")
+    with open(log_path, "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, "-m", "penify_hook.main", "docgen", "drain", "--max-workers", str(max_workers)],
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            env=env,
+            start_new_session=True,
+            close_fds=True,
+        )
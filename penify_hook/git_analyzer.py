@@ -4,6 +4,7 @@ from git import Repo
 from tqdm import tqdm
 
 from penify_hook.base_analyzer import BaseAnalyzer
+from penify_hook.diff_reader import iter_diff_lines
 from penify_hook.utils import get_repo_details, recursive_search_git_folder
 from .api_client import APIClient
 import logging
@@ -17,24 +18,44 @@ from .ui_utils import (
 logger = logging.getLogger(__name__)
 
 class GitDocGenHook(BaseAnalyzer):
-    def __init__(self, repo_path: str, api_client: APIClient):
+    def __init__(self, repo_path: str, api_client: APIClient, base_commit: str = None, head_commit: str = None):
+        """Create a docgen hook for a commit range.
+
+        Args:
+            repo_path (str): Path inside the git repository.
+            api_client (APIClient): Client used to generate documentation.
+            base_commit (str?): Commit to diff against. Defaults to the parent of
+                `head_commit`.
+            head_commit (str?): Last commit of the range. Defaults to HEAD.
+        """
         super().__init__(repo_path, api_client)
+        self.base_commit = base_commit
+        self.head_commit = head_commit
+
+    def get_commit_range(self):
+        """Return the (base, head) commits whose diff is documented."""
+        last_commit = self.repo.commit(self.head_commit) if self.head_commit else self.repo.head.commit
+        if self.base_commit:
+            prev_commit = self.repo.commit(self.base_commit)
+        else:
+            prev_commit = last_commit.parents[0] if last_commit.parents else last_commit
+        return prev_commit, last_commit
 
     def get_modified_files_in_last_commit(self):
         """Get the list of files modified in the last commit.
 
         This function retrieves the files that were modified in the most recent
-        commit of the repository. It accesses the last commit and iterates
-        through the differences to compile a list of unique file paths that were
-        changed. The function returns this list for further processing or
-        analysis.
+        commit of the repository, or in the configured commit range. It
+        iterates through the differences to compile a list of unique file paths
+        that were changed. The function returns this list for further
+        processing or analysis.
 
         Returns:
             list: A list of file paths that were modified in the last commit.
         """
-        last_commit = self.repo.head.commit
+        prev_commit, last_commit = self.get_commit_range()
         modified_files = []
-        for diff in last_commit.diff('HEAD~1'):
+        for diff in last_commit.diff(prev_commit):
             if diff.a_path not in modified_files:
                 modified_files.append(diff.a_path)
         return modified_files
@@ -46,10 +67,12 @@ class GitDocGenHook(BaseAnalyzer):
         numbers that have been modified. It distinguishes between added and
         deleted lines and keeps track of the current line number as it parses
         through the diff. The function handles hunk headers and ensures that any
-        deletions at the end of the file are also captured.
+        deletions at the end of the file are also captured. Lines before the
+        first hunk header, such as `--- a/file`, are file headers and skipped.
 
         Args:
-            diff_text (str): A string containing the diff text to be processed.
+            diff_text (str or Iterable[str]): The diff text, or its lines as
+                streamed by `penify_hook.diff_reader.iter_diff_lines`.
 
         Returns:
             list: A sorted list of unique line numbers that have been modified.
@@ -57,13 +80,20 @@ class GitDocGenHook(BaseAnalyzer):
         modified_lines = []
         current_line = 0
         deletion_start = None
+        in_hunk = False
 
-        for line in diff_text.splitlines():
+        lines = diff_text.splitlines() if isinstance(diff_text, str) else diff_text
+        for line in lines:
             if line.startswith('@@'):
                 # Parse the hunk header
                 _, old, new, _ = line.split(' ', 3)
                 current_line = int(new.split(',')[0].strip('+'))
                 deletion_start = None
+                in_hunk = True
+            elif not in_hunk or line.startswith('diff --git '):
+                # File header
+                in_hunk = False
+                continue
             elif line.startswith('-'):
                 # This is a deleted line
                 if deletion_start is None:
@@ -88,14 +118,34 @@ class GitDocGenHook(BaseAnalyzer):
 
         return sorted(set(modified_lines))  # Remove duplicates and sort
 
+    def matches_commit(self, file_path, blob) -> bool:
+        """Check that the working copy and the index entry of a file are the committed blob.
+
+        Args:
+            file_path (str): Path of the file relative to the repository root.
+            blob (git.Blob): The file in the documented commit.
+
+        Returns:
+            bool: False if the file was edited, staged or removed since.
+        """
+        entry = self.repo.index.entries.get((file_path, 0))
+        if entry is None or entry.hexsha != blob.hexsha:
+            return False
+        if not os.path.isfile(os.path.join(self.repo_path, file_path)):
+            return False
+        # hash-object applies the same filters (e.g. line endings) as git add
+        return self.repo.git.hash_object('--', file_path) == blob.hexsha
+
     def process_file(self, file_path):
         """Process a file by checking its type, reading its content, and sending it
         to an API.
 
         This method constructs the absolute path of the specified file and
         verifies if the file has a valid extension. If the file type is
-        supported, it reads the content of the file and retrieves the
-        differences from the last commit in the repository. If changes are
+        supported, it reads the content of the file as committed and retrieves
+        the differences from the last commit in the repository. A file whose
+        working copy or index entry differs from the commit is skipped, so
+        edits made after the commit are never overwritten or staged. If changes are
         detected, it sends the file content along with the modified lines to an
         API for further processing. If the API response indicates no changes,
         the original file will not be overwritten.
@@ -120,21 +170,26 @@ class GitDocGenHook(BaseAnalyzer):
             logger.info(f"File type {file_extension} is not supported. Skipping {file_path}.")
             return False
 
-        with open(file_abs_path, 'r') as file:
-            content = file.read()
-
-        # Get the diff of the file in the last commit
-        last_commit = self.repo.head.commit
-        prev_commit = last_commit.parents[0] if last_commit.parents else last_commit
+        # Document the file as committed: the working copy may have moved on since
+        prev_commit, last_commit = self.get_commit_range()
+        try:
+            blob = last_commit.tree / file_path
+        except KeyError:
+            logger.info(f"File {file_path} is not in commit {last_commit.hexsha[:12]}. Skipping.")
+            return False
+        if not self.matches_commit(file_path, blob):
+            print_warning(f"Skipping {file_path}: it was changed or staged after commit {last_commit.hexsha[:12]}")
+            return False
+        content = blob.data_stream.read().decode('utf-8')
 
-        # Use git command to get the diff
-        diff_text = self.repo.git.diff(prev_commit.hexsha, last_commit.hexsha, '--', file_path)
+        # Stream the diff from git: only the modified line numbers are kept, not the diff text
+        modified_lines = self.get_modified_lines(
+            iter_diff_lines(self.repo, prev_commit.hexsha, last_commit.hexsha, '--', f":(literal){file_path}"))
 
-        if not diff_text:
+        if not modified_lines:
             logger.info(f"No changes detected for {file_path}")
             return False
 
-        modified_lines = self.get_modified_lines(diff_text)
         # Send data to API
         response = self.api_client.send_file_for_docstring_generation(file_path, content, modified_lines, self.repo_details)
         if response is None:
@@ -143,6 +198,10 @@ class GitDocGenHook(BaseAnalyzer):
         if response == content:
             logger.info(f"No changes detected for {file_path}")
             return False
+        # The API call takes a while: check again right before overwriting the file
+        if not self.matches_commit(file_path, blob):
+            print_warning(f"Skipping {file_path}: it was changed or staged after commit {last_commit.hexsha[:12]}")
+            return False
         # If the response is successful, replace the file content
         with open(file_abs_path, 'w') as file:
             file.write(response)
@@ -160,6 +219,9 @@ class GitDocGenHook(BaseAnalyzer):
         processing, printing an error message for each file that fails to
         process. If any modifications are made to the files, an auto-commit is
         created to save those changes.
+
+        Returns:
+            dict: Counts of processed, updated and failed files.
         """
         logger.info("Starting doc_gen_hook processing")
         print_info("Starting doc_gen_hook processing")
@@ -167,6 +229,7 @@ class GitDocGenHook(BaseAnalyzer):
         modified_files = self.get_modified_files_in_last_commit()
         changes_made = False
         total_files = len(modified_files)
+        summary = {'processed': total_files, 'updated': 0, 'failed': 0}
 
         with create_progress_bar(total_files, "Processing files", "file") as pbar:
             for file in modified_files:
@@ -177,12 +240,14 @@ class GitDocGenHook(BaseAnalyzer):
                         # Stage the modified file
                         self.repo.git.add(file)
                         changes_made = True
+                        summary['updated'] += 1
                         print_status('success', "Documentation updated")
                     else:
                         print_status('warning', "No changes needed")
                 except Exception as file_error:
                     error_msg = f"Error processing file [{file}]: {file_error}"
                     logger.error(error_msg)
+                    summary['failed'] += 1
                     print_status('error', error_msg)
                 pbar.update(1)  # Update the progress bar
 
@@ -193,4 +258,6 @@ class GitDocGenHook(BaseAnalyzer):
             print_success("\n✓ Auto-commit created with changes")
         else:
             logger.info("doc_gen_hook complete. No changes made.")
-            print_info("\n✓ doc_gen_hook complete. No changes made.")
\ No newline at end of file
+            print_info("\n✓ doc_gen_hook complete. No changes made.")
+
+        return summary
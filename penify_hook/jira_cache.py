@@ -0,0 +1,89 @@
+"""
+On-disk cache of JIRA issue data used as commit context.
+
+Entries are stored per JIRA server and issue key together with the issue's
+`updated` timestamp. Within the TTL an entry is used as is, without any
+request to JIRA. After that it is revalidated by fetching only the `updated`
+field, and only refetched in full if the issue changed.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from penify_hook.utils import get_penify_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 15 * 60  # seconds
+
+
+class JiraIssueCache:
+    def __init__(self, server_url: str, ttl: int = DEFAULT_TTL, cache_dir: str = None):
+        """
+        Args:
+            server_url: JIRA server the cached issues belong to
+            ttl: Seconds during which an entry is used without asking JIRA
+            cache_dir: Directory of the cache files, defaults to `jira/` in the Penify cache directory
+        """
+        self.server_url = server_url.rstrip("/")
+        self.ttl = ttl
+        cache_dir = cache_dir or os.path.join(get_penify_cache_dir(), "jira")
+        os.makedirs(cache_dir, exist_ok=True)
+        server_hash = hashlib.sha256(self.server_url.encode()).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"{server_hash}.json")
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                # Custom field values are not always plain JSON
+                json.dump(self._entries, f, default=str)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write JIRA cache {self.path}: {e}")
+
+    def get(self, kind: str, issue_key: str):
+        """
+        Return the cached entry of an issue.
+
+        Args:
+            kind: What was cached, e.g. "details" or "context"
+            issue_key: JIRA issue key
+
+        Returns:
+            Dict with `data`, `updated` and `fetched_at`, or None
+        """
+        with self._lock:
+            return self._load().get(f"{kind}:{issue_key}")
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Check whether an entry is younger than the TTL."""
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def set(self, kind: str, issue_key: str, data: dict, updated: str = None):
+        """Store data for an issue along with its `updated` timestamp."""
+        with self._lock:
+            self._load()[f"{kind}:{issue_key}"] = {"data": data, "updated": updated, "fetched_at": time.time()}
+            self._save()
+
+    def touch(self, kind: str, issue_key: str):
+        """Mark an entry as fresh again after JIRA confirmed it is unchanged."""
+        with self._lock:
+            entry = self._load().get(f"{kind}:{issue_key}")
+            if entry:
+                entry["fetched_at"] = time.time()
+                self._save()
@@ -1,20 +1,33 @@
 import re
+import threading
+import time
 import logging
 from typing import Optional, Dict, List, Any
 
+from penify_hook.jira_cache import DEFAULT_TTL, JiraIssueCache
 from penify_hook.ui_utils import print_info, print_success
 try:
     from jira import JIRA
     JIRA_AVAILABLE = True
 except ImportError:
     JIRA_AVAILABLE = False
+
+# Fields requested for commit context; custom fields found by get_field_ids are added
+DETAIL_FIELDS = ['summary', 'status', 'description', 'assignee', 'reporter', 'issuetype', 'priority', 'updated']
+CONTEXT_FIELDS = ['summary', 'description', 'issuetype', 'status', 'priority', 'updated']
+SPRINT_FIELD_TYPE = 'com.pyxis.greenhopper.jira:gh-sprint'
+FIELD_DISCOVERY_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_COMMENTS = 3
+# Seconds a single request to JIRA may take
+REQUEST_TIMEOUT = 10
     
 class JiraClient:
     """
     Client for interacting with JIRA API
     """
     
-    def __init__(self, jira_url: str = None, jira_user: str = None, jira_api_token: str = None):
+    def __init__(self, jira_url: str = None, jira_user: str = None, jira_api_token: str = None,
+                 cache_ttl: int = DEFAULT_TTL, max_comments: int = DEFAULT_MAX_COMMENTS):
         """
         Initialize the JIRA client.
         
@@ -22,36 +35,98 @@ class JiraClient:
             jira_url: Base URL for JIRA instance (e.g., "https://your-domain.atlassian.net")
             jira_user: JIRA username or email
             jira_api_token: JIRA API token
+            cache_ttl: Seconds during which cached issue data is used without asking JIRA;
+                0 disables the on-disk issue cache
+            max_comments: Number of latest comments included in the issue context
         """
         self.jira_url = jira_url
         self.jira_user = jira_user
         self.jira_api_token = jira_api_token
-        self.jira_client = None
+        self._connection = None
+        self._connection_lock = threading.Lock()
+        self._connection_failed = False
+        self.cache = JiraIssueCache(jira_url, cache_ttl) if jira_url and cache_ttl else None
+        self.max_comments = max_comments
+        self._field_ids = None
+        # Issue data fetched during the current run, see reset_run_cache
+        self._memo = {}
         
         if not JIRA_AVAILABLE:
             logging.warning("JIRA package not available. JIRA integration will not work.")
-            return
-        
-        if jira_url and jira_user and jira_api_token:
-            try:
-                self.jira_client = JIRA(
-                    server=jira_url,
-                    basic_auth=(jira_user, jira_api_token)
-                )
-                logging.info("JIRA client initialized successfully")
-            except Exception as e:
-                logging.error(f"Failed to initialize JIRA client: {e}")
-                self.jira_client = None
+
+    @property
+    def jira_client(self):
+        """The connection to JIRA, opened on first use.
+
+        Opening it is deferred to the first request so that it happens inside
+        whatever bounds that request, e.g. the deadline of the commit's JIRA
+        context fetch, and not when the client is created. The server info
+        round trip of the jira package is skipped and every request is bounded
+        by REQUEST_TIMEOUT.
+
+        Returns:
+            JIRA: The connection, or None if it could not be opened.
+        """
+        with self._connection_lock:
+            if self._connection is None and not self._connection_failed and self.is_connected():
+                try:
+                    self._connection = JIRA(
+                        server=self.jira_url,
+                        basic_auth=(self.jira_user, self.jira_api_token),
+                        get_server_info=False,
+                        timeout=REQUEST_TIMEOUT
+                    )
+                    logging.info("JIRA client initialized successfully")
+                except Exception as e:
+                    logging.error(f"Failed to initialize JIRA client: {e}")
+                    self._connection_failed = True
+            return self._connection
+
+    @jira_client.setter
+    def jira_client(self, connection):
+        self._connection = connection
     
+    def reset_run_cache(self):
+        """Forget issue data memoized during the previous run.
+
+        Within a run (one commit) each issue is fetched at most once. A client
+        kept alive across runs, e.g. by the daemon, calls this at the start of
+        each run so that the next one sees changes again (subject to the
+        on-disk cache TTL).
+        """
+        self._memo = {}
+
     def is_connected(self) -> bool:
         """
-        Check if the JIRA client is connected.
+        Check if the JIRA client can be used.
+
+        No request is made: the connection is only opened by the first request
+        that needs it, see `jira_client`.
         
         Returns:
-            bool: True if connected, False otherwise
+            bool: True if the jira package is available and the client is configured
         """
-        return self.jira_client is not None
+        return bool(JIRA_AVAILABLE and self.jira_url and self.jira_user and self.jira_api_token
+                    and not self._connection_failed)
     
+    def verify_connection(self) -> bool:
+        """
+        Check that JIRA can be reached with the configured credentials.
+
+        Unlike `is_connected`, this makes a request to JIRA.
+
+        Returns:
+            bool: True if JIRA answered
+        """
+        if not self.is_connected():
+            return False
+        try:
+            self.jira_client.myself()
+            return True
+        except Exception as e:
+            logging.error(f"Could not connect to JIRA: {e}")
+            return False
+
     def extract_issue_keys_from_branch(self, branch_name: str) -> List[str]:
         """
         Extract JIRA issue keys from a branch name.
@@ -89,6 +164,50 @@ class JiraClient:
         matches = re.findall(pattern, text)
         return list(set(matches))  # Remove duplicates
     
+    def _get_cached(self, kind: str, issue_key: str, fetch) -> Optional[Dict[str, Any]]:
+        """
+        Return issue data from the on-disk cache, fetching it when needed.
+
+        Entries younger than the TTL are used without any request. Older
+        entries are revalidated by fetching only the issue's `updated` field
+        and are refetched in full only if the issue changed.
+
+        Args:
+            kind: Cache namespace of the data, e.g. "details"
+            issue_key: JIRA issue key
+            fetch: Callable returning (data, updated) from JIRA
+
+        Returns:
+            The issue data, or whatever `fetch` returns for missing issues
+        """
+        if (kind, issue_key) in self._memo:
+            return self._memo[(kind, issue_key)]
+        if self.cache is None:
+            data = fetch()[0]
+            self._memo[(kind, issue_key)] = data
+            return data
+
+        entry = self.cache.get(kind, issue_key)
+        if entry:
+            if self.cache.is_fresh(entry):
+                self._memo[(kind, issue_key)] = entry['data']
+                return entry['data']
+            try:
+                updated = self.jira_client.issue(issue_key, fields='updated').fields.updated
+            except Exception as e:
+                logging.warning(f"Could not revalidate cached {issue_key}: {e}")
+                updated = None
+            if updated is not None and updated == entry['updated']:
+                self.cache.touch(kind, issue_key)
+                self._memo[(kind, issue_key)] = entry['data']
+                return entry['data']
+
+        data, updated = fetch()
+        if data:
+            self.cache.set(kind, issue_key, data, updated)
+        self._memo[(kind, issue_key)] = data
+        return data
+
     def get_issue_details(self, issue_key: str) -> Optional[Dict[str, Any]]:
         """
         Get details of a JIRA issue.
@@ -103,22 +222,89 @@ class JiraClient:
             logging.warning("JIRA client not connected")
             return None
         
+        return self._get_cached('details', issue_key, lambda: self._fetch_issue_details(issue_key))
+
+    def get_issues_details(self, issue_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get details of several JIRA issues with as few requests as possible.
+
+        Issues already fetched in this run or fresh in the on-disk cache are
+        not requested again. All other issues are fetched with a single
+        `key in (...)` JQL search restricted to the needed fields.
+
+        Args:
+            issue_keys: JIRA issue keys
+
+        Returns:
+            Dict mapping each found issue key to its details
+        """
+        if not self.is_connected():
+            logging.warning("JIRA client not connected")
+            return {}
+
+        found = {}
+        missing = []
+        for key in dict.fromkeys(issue_keys):
+            if ('details', key) in self._memo:
+                details = self._memo[('details', key)]
+            else:
+                entry = self.cache.get('details', key) if self.cache else None
+                details = entry['data'] if entry and self.cache.is_fresh(entry) else None
+                if details is None:
+                    missing.append(key)
+                    continue
+                self._memo[('details', key)] = details
+            if details:
+                found[key] = details
+
+        if len(missing) == 1:
+            details = self.get_issue_details(missing[0])
+            if details:
+                found[missing[0]] = details
+        elif missing:
+            try:
+                issues = self.jira_client.search_issues(
+                    f"key in ({', '.join(missing)})", fields=",".join(DETAIL_FIELDS), maxResults=len(missing)
+                )
+            except Exception as e:
+                # The whole search fails if one key does not exist (e.g. a false match in a branch name)
+                logging.info(f"Bulk JIRA search failed, fetching issues one by one: {e}")
+                for key in missing:
+                    details = self.get_issue_details(key)
+                    if details:
+                        found[key] = details
+            else:
+                for key in missing:
+                    self._memo[('details', key)] = None
+                for issue in issues:
+                    details = self._issue_to_details(issue)
+                    if self.cache:
+                        self.cache.set('details', issue.key, details, getattr(issue.fields, 'updated', None))
+                    self._memo[('details', issue.key)] = details
+                    found[issue.key] = details
+
+        return {key: found[key] for key in issue_keys if key in found}
+
+    def _issue_to_details(self, issue) -> Dict[str, Any]:
+        return {
+            'key': issue.key,
+            'summary': issue.fields.summary,
+            'status': issue.fields.status.name,
+            'description': issue.fields.description,
+            'assignee': issue.fields.assignee.displayName if issue.fields.assignee else None,
+            'reporter': issue.fields.reporter.displayName if issue.fields.reporter else None,
+            'type': issue.fields.issuetype.name,
+            'priority': issue.fields.priority.name if hasattr(issue.fields, 'priority') and issue.fields.priority else None,
+            'url': f"{self.jira_url}/browse/{issue.key}"
+        }
+
+    def _fetch_issue_details(self, issue_key: str) -> tuple:
         try:
-            issue = self.jira_client.issue(issue_key)
-            return {
-                'key': issue.key,
-                'summary': issue.fields.summary,
-                'status': issue.fields.status.name,
-                'description': issue.fields.description,
-                'assignee': issue.fields.assignee.displayName if issue.fields.assignee else None,
-                'reporter': issue.fields.reporter.displayName if issue.fields.reporter else None,
-                'type': issue.fields.issuetype.name,
-                'priority': issue.fields.priority.name if hasattr(issue.fields, 'priority') and issue.fields.priority else None,
-                'url': f"{self.jira_url}/browse/{issue.key}"
-            }
+            issue = self.jira_client.issue(issue_key, fields=",".join(DETAIL_FIELDS))
+            return self._issue_to_details(issue), getattr(issue.fields, 'updated', None)
         except Exception as e:
             logging.error(f"Error fetching issue {issue_key}: {e}")
-            return None
+            return None, None
     
     def add_comment(self, issue_key: str, comment: str) -> bool:
         """
@@ -214,8 +400,9 @@ class JiraClient:
         issue_details_section = "\n\n## Related JIRA Issues\n\n"
         has_issue_details = False
         
+        all_details = self.get_issues_details(issue_keys)
         for issue_key in issue_keys:
-            details = self.get_issue_details(issue_key)
+            details = all_details.get(issue_key)
             if details:
                 has_issue_details = True
                 issue_details_section += (
@@ -242,15 +429,59 @@ class JiraClient:
         if not self.is_connected():
             logging.warning("JIRA client not connected")
             return {}
-        
+
+        return self._get_cached('context', issue_key, lambda: self._fetch_detailed_issue_context(issue_key))
+
+    def get_field_ids(self) -> Dict[str, List[str]]:
+        """
+        Find the ids of the custom fields used for commit context.
+
+        Custom field ids differ between JIRA instances. They are looked up by
+        name through the fields metadata API once per server and cached on
+        disk for a day.
+
+        Returns:
+            Dict with 'sprint' and 'acceptance_criteria' lists of field ids
+        """
+        if self._field_ids is not None:
+            return self._field_ids
+
+        entry = self.cache.get('meta', 'fields') if self.cache else None
+        if entry and time.time() - entry.get('fetched_at', 0) < FIELD_DISCOVERY_TTL:
+            self._field_ids = entry['data']
+            return self._field_ids
+
+        field_ids = {'sprint': [], 'acceptance_criteria': []}
         try:
-            issue = self.jira_client.issue(issue_key)
+            for field in self.jira_client.fields():
+                name = (field.get('name') or '').lower()
+                custom_type = (field.get('schema') or {}).get('custom', '')
+                if name == 'sprint' or custom_type == SPRINT_FIELD_TYPE:
+                    field_ids['sprint'].append(field['id'])
+                elif 'acceptance criteria' in name:
+                    field_ids['acceptance_criteria'].append(field['id'])
+        except Exception as e:
+            logging.warning(f"Could not discover JIRA fields: {e}")
+            # Not cached on disk: retry on the next run
+            self._field_ids = field_ids
+            return field_ids
+
+        self._field_ids = field_ids
+        if self.cache:
+            self.cache.set('meta', 'fields', field_ids)
+        return field_ids
+
+    def _fetch_detailed_issue_context(self, issue_key: str) -> tuple:
+        try:
+            field_ids = self.get_field_ids()
+            custom_fields = field_ids['acceptance_criteria'] + field_ids['sprint']
+            issue = self.jira_client.issue(issue_key, fields=",".join(CONTEXT_FIELDS + custom_fields))
             
-            # Get issue history and comments for context
+            # Get the latest comments for context
             comments = []
             try:
-                for comment in self.jira_client.comments(issue):
-                    comments.append(comment.body)
+                latest = self.jira_client.comments(issue_key, max_results=self.max_comments, order_by='-created')
+                comments = [comment.body for comment in reversed(latest)]
             except Exception as e:
                 logging.warning(f"Could not fetch comments for {issue_key}: {e}")
             
@@ -262,49 +493,32 @@ class JiraClient:
                 'type': issue.fields.issuetype.name,
                 'status': issue.fields.status.name,
                 'priority': issue.fields.priority.name if hasattr(issue.fields, 'priority') and issue.fields.priority else "None",
-                'comments': comments[:3],  # Limit to latest 3 comments
+                'comments': comments,
                 'url': f"{self.jira_url}/browse/{issue.key}"
             }
             
-            # Add acceptance criteria if available (common custom fields)
-            # Field names may vary by JIRA instance
-            acceptance_criteria = None
-            try:
-                for field_name in ['customfield_10001', 'acceptance_criteria', 'customfield_10207']:
-                    if hasattr(issue.fields, field_name):
-                        field_value = getattr(issue.fields, field_name)
-                        if field_value:
-                            acceptance_criteria = field_value
-                            break
-            except Exception:
-                pass
-                
-            if acceptance_criteria:
-                context['acceptance_criteria'] = acceptance_criteria
-                
-            # Try to extract sprint information
-            try:
-                sprint_field = None
-                for field_name in dir(issue.fields):
-                    if 'sprint' in field_name.lower():
-                        sprint_field = field_name
-                        break
+            # Add acceptance criteria if the instance has such a field
+            for field_id in field_ids['acceptance_criteria']:
+                field_value = getattr(issue.fields, field_id, None)
+                if field_value:
+                    context['acceptance_criteria'] = field_value
+                    break
                 
-                if sprint_field:
-                    sprint_value = getattr(issue.fields, sprint_field)
-                    if sprint_value:
-                        if isinstance(sprint_value, list) and len(sprint_value) > 0:
-                            context['sprint'] = sprint_value[0]
-                        else:
-                            context['sprint'] = str(sprint_value)
-            except Exception as e:
-                logging.debug(f"Could not extract sprint information: {e}")
+            # Add sprint information
+            for field_id in field_ids['sprint']:
+                sprint_value = getattr(issue.fields, field_id, None)
+                if not sprint_value:
+                    continue
+                if isinstance(sprint_value, list):
+                    sprint_value = sprint_value[0]
+                context['sprint'] = getattr(sprint_value, 'name', None) or str(sprint_value)
+                break
             
-            return context
+            return context, getattr(issue.fields, 'updated', None)
             
         except Exception as e:
             logging.error(f"Error fetching detailed information for {issue_key}: {e}")
-            return {}
+            return {}, None
 
     def get_commit_context_from_issues(self, issue_keys: List[str]) -> Dict[str, Any]:
         """
@@ -322,12 +536,9 @@ class JiraClient:
         # Get the primary issue (first in the list)
         primary_issue = self.get_detailed_issue_context(issue_keys[0])
         
-        # Get basic info for related issues
-        related_issues = []
-        for key in issue_keys[1:]:  # Skip the first one as it's the primary
-            details = self.get_issue_details(key)
-            if details:
-                related_issues.append(details)
+        # Get basic info for related issues, skipping the primary one, in one request
+        related_details = self.get_issues_details(issue_keys[1:])
+        related_issues = [related_details[key] for key in issue_keys[1:] if key in related_details]
                 
         # Build context dictionary for commit message enhancement
         context = {
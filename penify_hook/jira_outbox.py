@@ -0,0 +1,305 @@
+"""
+Durable local outbox of JIRA updates.
+
+Comments produced by `penifycli commit` are written to a spool instead of
+being posted while the commit waits. A detached worker, `penifycli jira
+flush`, empties the spool: updates of different issues are posted in parallel, updates
+of the same issue in the order they were queued. A failed update is retried
+with exponential backoff and moved to `failed/` once it runs out of attempts;
+`penifycli jira status` lists them and `penifycli jira retry` queues them again.
+
+Records hold the repository path but no credentials; the worker reads the
+JIRA configuration of that repository when it posts.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from penify_hook.utils import get_penify_cache_dir
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5  # seconds before the first retry, doubled after each failure
+BACKOFF_MAX = 60 * 60
+# The worker waits this long at most for the next retry; later ones are picked up by the next commit's worker
+WORKER_MAX_WAIT = 5 * 60
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before retrying an update that failed `attempts` times."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+class JiraOutbox:
+    """
+    File-based outbox of JIRA updates.
+
+    Layout of the spool directory:
+        pending/   updates waiting to be posted, one JSON file each
+        failed/    updates given up on after MAX_ATTEMPTS
+    """
+
+    def __init__(self, spool_dir: str = None):
+        self.spool_dir = spool_dir or os.path.join(get_penify_cache_dir(), "jira-outbox")
+        self.pending_dir = os.path.join(self.spool_dir, "pending")
+        self.failed_dir = os.path.join(self.spool_dir, "failed")
+        for directory in (self.pending_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._lock_file = None
+
+    def _write_json(self, path: str, data: dict):
+        """Write JSON atomically so readers never see a partial record."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_ops(self, directory: str) -> list:
+        ops = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r") as f:
+                    op = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable JIRA update {path}: {e}")
+                continue
+            op["_file"] = name
+            ops.append(op)
+        return ops
+
+    def _enqueue(self, repo_path: str, jira_url: str, action: str, issue_key: str, payload: dict) -> str:
+        op = {
+            "repo_path": os.path.abspath(repo_path),
+            "jira_url": jira_url,
+            "action": action,
+            "issue_key": issue_key,
+            "payload": payload,
+            "attempts": 0,
+            "next_attempt_at": 0,
+            "last_error": None,
+            "enqueued_at": time.time(),
+        }
+        # The name sorts by enqueue time, which keeps updates of an issue in order
+        path = os.path.join(self.pending_dir, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json")
+        self._write_json(path, op)
+        return path
+
+    def enqueue_comment(self, repo_path: str, jira_url: str, issue_key: str, comment: str) -> str:
+        """
+        Queue a comment on a JIRA issue.
+
+        Args:
+            repo_path: Root of the git repository whose JIRA configuration is used
+            jira_url: JIRA server the comment is meant for
+            issue_key: JIRA issue key (e.g., "PROJECT-123")
+            comment: Comment text
+
+        Returns:
+            Path of the queued record
+        """
+        return self._enqueue(repo_path, jira_url, "comment", issue_key, {"comment": comment})
+
+    def pending_ops(self) -> list:
+        """Return queued updates, oldest first."""
+        return self._read_ops(self.pending_dir)
+
+    def failed_ops(self) -> list:
+        """Return updates that ran out of attempts."""
+        return self._read_ops(self.failed_dir)
+
+    def retry_failed(self) -> int:
+        """
+        Move the updates that ran out of attempts back to the queue with fresh attempts.
+
+        Returns:
+            Number of updates queued again
+        """
+        retried = 0
+        for op in self.failed_ops():
+            file_name = op.pop("_file")
+            op.update(attempts=0, next_attempt_at=0)
+            self._write_json(os.path.join(self.pending_dir, file_name), op)
+            os.remove(os.path.join(self.failed_dir, file_name))
+            retried += 1
+        return retried
+
+    def next_attempt_at(self):
+        """Return when the earliest queued update is due, or None if the outbox is empty."""
+        ops = self.pending_ops()
+        return min(op["next_attempt_at"] for op in ops) if ops else None
+
+    def acquire_worker_lock(self) -> bool:
+        """Try to become the single worker flushing this outbox."""
+        self._lock_file = open(os.path.join(self.spool_dir, "worker.lock"), "w")
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def release_worker_lock(self):
+        if self._lock_file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def flush(self, get_client, max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+        """
+        Post the updates that are due.
+
+        Updates are grouped by issue. Groups are posted concurrently, at most
+        `max_workers` at a time; within a group they are posted in order and
+        the group stops at the first failure so later updates do not overtake it.
+
+        Args:
+            get_client: Callable taking an update record and returning a connected
+                JiraClient for it, or None if JIRA is not configured for it
+            max_workers: Maximum number of issues posted to in parallel
+
+        Returns:
+            Dict with the number of `sent`, `retried` and `failed` updates
+        """
+        now = time.time()
+        groups = {}
+        for op in self.pending_ops():
+            groups.setdefault((op["jira_url"], op["issue_key"]), []).append(op)
+        # An issue waiting for a retry holds back its later updates as well
+        due = [ops for ops in groups.values() if ops[0]["next_attempt_at"] <= now]
+
+        # Clients are resolved up front, once per repository and server
+        clients = {}
+        for ops in due:
+            target = (ops[0]["repo_path"], ops[0]["jira_url"])
+            if target not in clients:
+                try:
+                    clients[target] = get_client(ops[0])
+                except Exception as e:
+                    logger.error(f"Could not connect to JIRA {target[1]}: {e}")
+                    clients[target] = None
+
+        counts = {"sent": 0, "retried": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda ops: self._post_group(clients[(ops[0]["repo_path"], ops[0]["jira_url"])], ops), due)
+            for result in results:
+                for key in counts:
+                    counts[key] += result[key]
+        return counts
+
+    def _post_group(self, client, ops: list) -> dict:
+        counts = {"sent": 0, "retried": 0, "failed": 0}
+        for op in ops:
+            error = None
+            try:
+                if client is None:
+                    error = "JIRA is not configured or not reachable"
+                elif not self._post(client, op):
+                    error = f"JIRA rejected the {op['action']}"
+            except Exception as e:
+                error = str(e)
+
+            if error is None:
+                os.remove(os.path.join(self.pending_dir, op["_file"]))
+                counts["sent"] += 1
+                continue
+
+            op["attempts"] += 1
+            op["last_error"] = error
+            file_name = op.pop("_file")
+            if op["attempts"] >= MAX_ATTEMPTS:
+                logger.error(f"Giving up on {op['action']} for {op['issue_key']}: {error}")
+                self._write_json(os.path.join(self.failed_dir, file_name), op)
+                os.remove(os.path.join(self.pending_dir, file_name))
+                counts["failed"] += 1
+                # A failed comment must not block the issue's later comments forever
+                continue
+            op["next_attempt_at"] = time.time() + backoff_delay(op["attempts"])
+            self._write_json(os.path.join(self.pending_dir, file_name), op)
+            counts["retried"] += 1
+            break
+        return counts
+
+    @staticmethod
+    def _post(client, op: dict) -> bool:
+        if op["action"] == "comment":
+            return client.add_comment(op["issue_key"], op["payload"]["comment"])
+        raise ValueError(f"Unknown JIRA update: {op['action']}")
+
+    def run_worker(self, get_client, max_workers: int = DEFAULT_MAX_WORKERS) -> int:
+        """
+        Flush the outbox until it is empty or the next retry is too far away.
+
+        Returns:
+            Number of updates sent, or -1 if another worker holds the lock
+        """
+        if not self.acquire_worker_lock():
+            return -1
+        sent = 0
+        try:
+            while True:
+                sent += self.flush(get_client, max_workers)["sent"]
+                next_at = self.next_attempt_at()
+                if next_at is None:
+                    break
+                wait = next_at - time.time()
+                if wait > WORKER_MAX_WAIT:
+                    break
+                time.sleep(max(wait, 0))
+        finally:
+            self.release_worker_lock()
+        return sent
+
+
+def client_for_repository(op: dict):
+    """Build a JiraClient from the JIRA configuration of the repository an update belongs to."""
+    from penify_hook.commands.config_commands import get_jira_config
+    from penify_hook.jira_client import JiraClient
+
+    # The configuration is looked up from the working directory; the worker is a process of its own
+    os.chdir(op["repo_path"])
+    config = get_jira_config()
+    if not (config.get("url") and config.get("username") and config.get("api_token")):
+        return None
+    if config["url"].rstrip("/") != (op["jira_url"] or "").rstrip("/"):
+        logger.warning(f"JIRA server of {op['repo_path']} changed, not posting to {op['jira_url']}")
+        return None
+    client = JiraClient(config["url"], config["username"], config["api_token"], cache_ttl=0)
+    return client if client.is_connected() else None
+
+
+def spawn_flush_worker(max_workers: int = DEFAULT_MAX_WORKERS):
+    """Start a detached worker process that flushes the JIRA outbox."""
+    log_path = os.path.join(get_penify_cache_dir(), "jira-outbox-worker.log")
+    # The worker must never be forwarded to the daemon: it waits for retries
+    env = dict(os.environ, PENIFY_NO_DAEMON="1")
+    with open(log_path, "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, "-m", "penify_hook.main", "jira", "flush", "--max-workers", str(max_workers)],
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            env=env,
+            start_new_session=True,
+            close_fds=True,
+        )
+
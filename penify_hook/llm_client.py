@@ -1,15 +1,157 @@
+import itertools
 import json
 import os
-import sys
-from typing import Dict, Optional, List, Any, Union
-import litellm
+import re
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, List, Any, Union
+
+from penify_hook.diff_packer import DiffPacker, estimate_tokens
+from penify_hook.utils import get_penify_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MODEL_INFO_CACHE_FILE = "llm-models.json"
+# Subset of litellm's model metadata kept in the on-disk cache
+MODEL_INFO_FIELDS = ("max_input_tokens", "max_output_tokens", "litellm_provider", "supports_response_schema")
+# Seconds after which a model without known metadata is looked up again
+UNKNOWN_MODEL_TTL = 24 * 60 * 60
+# Chosen routes and their latency, one JSON record per generated summary
+ROUTE_LOG_FILE = "llm-routes.jsonl"
+# Semantic commit title: <type>(<scope>): <subject>, the scope being optional
+TITLE_TYPES = ("feat", "fix", "docs", "style", "refactor", "perf", "test", "build", "ci", "chore", "revert")
+TITLE_PATTERN = re.compile(r"^(%s)(\([^()]+\))?!?: \S" % "|".join(TITLE_TYPES))
+MAX_TITLE_LENGTH = 72
+# Follow-up requests asking the model to fix the fields of an unusable summary
+MAX_REPAIR_ATTEMPTS = 2
+# Backends LLMClient can send requests through; None selects litellm
+BACKENDS = (None, "litellm", "openai")
+# Size conditions a route can set, and the diff measurement each one bounds
+ROUTE_CONDITIONS = {"min_lines": "lines", "max_lines": "lines", "min_tokens": "tokens", "max_tokens": "tokens"}
+
+_litellm = None
+
+
+def get_litellm():
+    """
+    Import and configure litellm on first use.
+
+    litellm is slow to import and by default downloads its model cost map from
+    GitHub at import time. The bundled map shipped with the package is used
+    instead so commit generation works offline, and telemetry is disabled.
+    """
+    global _litellm
+    if _litellm is None:
+        os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+        import litellm
+        litellm.telemetry = False
+        litellm.suppress_debug_info = True
+        _litellm = litellm
+    return _litellm
+
+
+def summary_schema(fields: List[str]) -> Dict:
+    """JSON schema of a summary response with the given fields ("title", "description")."""
+    descriptions = {
+        "title": f"Commit title in the format <type>(<scope>): <subject>, at most {MAX_TITLE_LENGTH} characters",
+        "description": "What was changed and why",
+    }
+    properties = {field: {"type": "string", "description": descriptions[field]} for field in fields}
+    return {"type": "object", "properties": properties, "required": list(fields), "additionalProperties": False}
+
+
+def validate_summary(summary: Dict, fields: List[str]) -> Dict[str, str]:
+    """
+    Check the fields of a summary.
+
+    Args:
+        summary: Parsed model response
+        fields: Fields that must be present ("title", "description")
+
+    Returns:
+        Dict mapping each unusable field to what is wrong with it; empty if the summary is usable
+    """
+    problems = {}
+    for field in fields:
+        value = summary.get(field)
+        if not isinstance(value, str) or not value.strip():
+            problems[field] = f"the {field} is missing"
+    title = summary.get("title")
+    if "title" in fields and "title" not in problems:
+        title = title.strip()
+        if not TITLE_PATTERN.match(title):
+            problems["title"] = (f'the title "{title}" is not in the format <type>(<scope>): <subject> '
+                                 f'with type one of {", ".join(TITLE_TYPES)}')
+        elif len(title) > MAX_TITLE_LENGTH:
+            problems["title"] = f'the title "{title}" is longer than {MAX_TITLE_LENGTH} characters'
+    return problems
+
+
+def extract_json_object(content: str) -> Optional[Dict]:
+    """Return the JSON object in a model response, which may be wrapped in a code fence or prose."""
+    candidates = [content]
+    fenced = re.search(r'```(?:json)?\s*(.*?)\s*```', content, re.DOTALL)
+    if fenced:
+        candidates.append(fenced.group(1))
+    start, end = content.find("{"), content.rfind("}")
+    if 0 <= start < end:
+        candidates.append(content[start:end + 1])
+    for candidate in candidates:
+        try:
+            result = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, dict):
+            return result
+    return None
+
+
+class EndpointPool:
+    """
+    Round-robin over endpoints serving the same model, e.g. several GPU boxes
+    behind OpenAI-compatible servers.
+
+    Each request takes the next endpoint, so concurrent requests (chunk
+    summaries, title and description) are spread over all of them.
+    """
+
+    def __init__(self, endpoints: List[Dict]):
+        self.endpoints = [{"api_base": endpoint.get("api_base"), "api_key": endpoint.get("api_key")}
+                          for endpoint in endpoints]
+        if not self.endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        self._cycle = itertools.cycle(self.endpoints)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def next(self) -> Dict:
+        """Return the endpoint for the next request."""
+        with self._lock:
+            return next(self._cycle)
+
 
 class LLMClient:
     """
     Client for interacting with LLM models using LiteLLM.
     """
+
+    # Diff budget used when the model's context window is unknown (about 10,000 characters)
+    DEFAULT_DIFF_TOKEN_BUDGET = 2500
+    # Context kept free for the instructions, JIRA details and the response
+    PROMPT_RESERVE_TOKENS = 1500
+    # Share of the remaining context filled with diff; token counts are estimated and may run low
+    ESTIMATE_SAFETY_FACTOR = 0.8
+    # Size of the pieces a diff is split into when it has to be summarized in chunks
+    CHUNK_CHARS = 6000
     
-    def __init__(self, model: str = None, api_base: str = None, api_key: str = None):
+    def __init__(self, model: str = None, api_base: str = None, api_key: str = None, max_concurrency: int = 4,
+                 diff_ignore: List[str] = None, keep_alive: Union[str, int] = None, routes: List[Dict] = None,
+                 title_first: bool = False, title_model: str = None, endpoints: List[Dict] = None,
+                 backend: str = None):
         """
         Initialize the LLM client.
         
@@ -17,42 +159,484 @@ class LLMClient:
             model: LLM model to use (e.g., "gpt-4", "ollama/llama2", etc.)
             api_base: Base URL for API requests (e.g., "http://localhost:11434" for Ollama)
             api_key: API key for the LLM service
+            max_concurrency: Maximum number of parallel requests when summarizing a large diff in chunks
+            diff_ignore: Glob patterns of paths to leave out of prompts, in addition to
+                lockfiles, vendored, generated and binary files
+            keep_alive: How long an Ollama backend keeps the model loaded after a
+                request, e.g. "30m" or -1 for as long as it runs; backend default if None
+            routes: Rules sending diffs of a given size to other models, see `route`
+            title_first: Generate the title and the description with two concurrent
+                requests, so the title is available before the description is done
+            title_model: Model for the title request in title-first mode, on the same
+                endpoint; defaults to `model`
+            endpoints: Several endpoints serving the model, as dicts with `api_base`
+                and optionally `api_key`; requests are spread over them round-robin.
+                Replaces `api_base` and `api_key`.
+            backend: "litellm" (default) for any provider litellm supports, or "openai"
+                to talk to an OpenAI-compatible server (vLLM, Ollama, LM Studio) directly
         """        
-        # Configure litellm if parameters are provided
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {backend}. Use one of: {', '.join(b for b in BACKENDS if b)}")
+        # Endpoint and credentials belong to this client and are passed with each request
         self.model = model
-        if api_base:
-            os.environ["OPENAI_API_BASE"] = api_base
-        if api_key:
-            os.environ["OPENAI_API_KEY"] = api_key
+        self.backend = backend or "litellm"
+        self.pool = EndpointPool(endpoints or [{"api_base": api_base, "api_key": api_key}])
+        self.api_base = self.pool.endpoints[0]["api_base"]
+        self.api_key = self.pool.endpoints[0]["api_key"]
+        self.keep_alive = keep_alive
+        self.routes = routes or []
+        self.title_first = title_first
+        self.title_model = title_model
+        self._title_client = None
+        # Set on the client chosen by `route`, for the route log
+        self.route_name = None
+        self.diff_size = None
+        self._routed = {}
+        self.max_concurrency = max_concurrency
+        self.diff_ignore = diff_ignore or []
+        self._prepared = None
+        self._model_info = None
+
+    def get_model_info(self) -> Dict:
+        """
+        Get metadata (context window, output limit, provider) for the configured model.
+
+        Lookups are cached on disk so later runs do not need litellm for them.
+        Models litellm knows nothing about are cached as unknown for
+        UNKNOWN_MODEL_TTL, after which they are looked up again, e.g. once a
+        newer litellm maps them. With the "openai" backend the server itself is
+        asked instead of litellm.
+
+        Returns:
+            Dict with the fields listed in MODEL_INFO_FIELDS that are known for the model
+        """
+        if self._model_info is not None:
+            return self._model_info
+
+        cache_path = os.path.join(get_penify_cache_dir(), MODEL_INFO_CACHE_FILE)
+        try:
+            with open(cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            cache = {}
+
+        endpoint = self.pool.endpoints[0]
+        # What a server reports depends on the server, not only on the model name
+        cache_key = self.model if self.backend == "litellm" else f"{self.model}@{endpoint['api_base']}"
+        entry = cache.get(cache_key)
+        # Unknown models are stored with the time they were looked up; bare empty entries predate that
+        if not entry or time.time() - entry.get("unknown_since", time.time()) > UNKNOWN_MODEL_TTL:
+            try:
+                if self.backend == "litellm":
+                    info = get_litellm().get_model_info(self.model)
+                else:
+                    info = self._backend().get_model_info(self.model, endpoint["api_base"], endpoint["api_key"])
+                entry = {key: info[key] for key in MODEL_INFO_FIELDS if info.get(key) is not None}
+            except Exception as e:
+                logger.info(f"No model metadata available for {self.model}: {e}")
+                entry = {}
+            cache[cache_key] = entry or {"unknown_since": time.time()}
+            try:
+                tmp_path = f"{cache_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(cache, f, indent=2)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logger.warning(f"Could not write model metadata cache: {e}")
+
+        self._model_info = {key: value for key, value in entry.items() if key in MODEL_INFO_FIELDS}
+        return self._model_info
+
+    def _backend(self):
+        """Return the module or object whose `completion` sends the requests."""
+        if self.backend == "openai":
+            from penify_hook.openai_backend import get_openai_backend
+            return get_openai_backend()
+        return get_litellm()
+
+    def _backend_params(self, endpoint: Dict = None) -> Dict:
+        """Request parameters for the model's backend, for the given or the next endpoint of the pool."""
+        endpoint = endpoint or self.pool.next()
+        params = {}
+        if endpoint["api_base"]:
+            params["api_base"] = endpoint["api_base"]
+        if endpoint["api_key"]:
+            params["api_key"] = endpoint["api_key"]
+        provider = (self.model or "").split("/", 1)[0]
+        if self.keep_alive is not None and provider in ("ollama", "ollama_chat"):
+            params["keep_alive"] = self.keep_alive
+        return params
+
+    @staticmethod
+    def measure_diff(diff: str) -> Dict:
+        """Return the number of changed lines and the estimated token count of a diff."""
+        lines = sum(1 for line in diff.splitlines() if line[:1] in "+-" and not line.startswith(("+++", "---")))
+        return {"lines": lines, "tokens": estimate_tokens(diff)}
+
+    def route(self, diff: str) -> "LLMClient":
+        """
+        Choose the client that generates the summary for a diff.
+
+        Routes are checked in order; the first one whose size conditions
+        (`min_lines`, `max_lines`, `min_tokens`, `max_tokens`) all hold for
+        the diff is used. A route sets `model` and optionally `api_base`,
+        `api_key`, `endpoints` and `keep_alive`; unset values are taken from
+        this client.
+        Without a matching route this client is used.
+
+        Args:
+            diff: Git diff of changes
+
+        Returns:
+            The LLMClient for the diff
+        """
+        if not self.routes:
+            return self
+        size = self.measure_diff(diff)
+        client = self
+        name = "default"
+        for index, route in enumerate(self.routes):
+            if all(size[measure] >= route[condition] if condition.startswith("min_") else size[measure] <= route[condition]
+                   for condition, measure in ROUTE_CONDITIONS.items() if condition in route):
+                name = route.get("name") or f"route {index + 1}"
+                client = self._routed.get(index)
+                if client is None:
+                    if "endpoints" in route:
+                        endpoints = route["endpoints"]
+                    elif "api_base" in route:
+                        endpoints = [{"api_base": route["api_base"], "api_key": route.get("api_key", self.api_key)}]
+                    else:
+                        # Same endpoints as this client, possibly with the route's own key
+                        endpoints = [dict(endpoint, api_key=route.get("api_key", endpoint["api_key"]))
+                                     for endpoint in self.pool.endpoints]
+                    client = LLMClient(
+                        model=route.get("model", self.model),
+                        endpoints=endpoints,
+                        max_concurrency=self.max_concurrency,
+                        diff_ignore=self.diff_ignore,
+                        keep_alive=route.get("keep_alive", self.keep_alive),
+                        title_first=self.title_first,
+                        title_model=route.get("title_model", self.title_model),
+                        backend=route.get("backend", self.backend)
+                    )
+                    self._routed[index] = client
+                break
+        client.route_name = name
+        client.diff_size = size
+        logger.info(f"Routed diff of {size['lines']} changed lines (~{size['tokens']} tokens) to {name}: {client.model}")
+        return client
+
+    def _log_route(self, latency: float, success: bool):
+        record = {
+            "time": time.time(),
+            "route": self.route_name,
+            "model": self.model,
+            "lines": self.diff_size["lines"],
+            "tokens": self.diff_size["tokens"],
+            "latency_ms": round(latency * 1000),
+            "success": success,
+        }
+        logger.info(f"Route {self.route_name} ({self.model}) answered in {record['latency_ms']} ms")
+        try:
+            with open(os.path.join(get_penify_cache_dir(), ROUTE_LOG_FILE), "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write the route log: {e}")
+
+    def warm_up(self) -> float:
+        """
+        Make the backend load the model by sending it a minimal request.
+
+        On Ollama-style backends the first request after the model was unloaded
+        waits for it to be read into memory; with `keep_alive` it then stays
+        loaded between commits.
+
+        Every endpoint of the pool is warmed up.
+
+        Returns:
+            Seconds the requests took
+        """
+        if not self.model:
+            raise ValueError("LLM model not configured. Please provide a model when initializing LLMClient.")
+        start = time.monotonic()
+        for endpoint in self.pool.endpoints:
+            self._backend().completion(
+                model=self.model,
+                messages=[{"role": "user", "content": "Hi"}],
+                max_tokens=1,
+                **self._backend_params(endpoint)
+            )
+        return time.monotonic() - start
+
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up the model in a background thread, e.g. while the diff is collected."""
+        def warm():
+            try:
+                elapsed = self.warm_up()
+                logger.info(f"Warmed up {self.model} in {elapsed:.1f}s")
+            except Exception as e:
+                logger.info(f"Could not warm up {self.model}: {e}")
+
+        # Daemon thread: a slow model load must not keep the process alive
+        thread = threading.Thread(target=warm, name="penify-llm-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def preload_backend(self):
+        """
+        Import litellm in a background thread, e.g. while the diff is collected.
+
+        The litellm backend needs it for the request itself; importing it takes
+        seconds, which then overlap with the other work of the commit.
+        """
+        if self.backend != "litellm" or _litellm is not None:
+            return None
+
+        def load():
+            try:
+                get_litellm()
+            except ImportError as e:
+                logger.info(f"Could not import litellm: {e}")
+
+        # Daemon thread: the import must not keep the process alive
+        thread = threading.Thread(target=load, name="penify-litellm-import", daemon=True)
+        thread.start()
+        return thread
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Estimate the number of tokens of a text.
+
+        The model's tokenizer is not used: importing litellm only for it would
+        cost more than packing the diff, and counting with it only when the
+        import happens to have finished would make the packed diff, and so the
+        commit message, depend on timing. `get_diff_token_budget` leaves room
+        for the estimate running low.
+        """
+        return estimate_tokens(text)
+
+    def get_diff_token_budget(self) -> int:
+        """Return how many tokens of diff, as counted by `count_tokens`, fit in the model's context window."""
+        context_window = self.get_model_info().get('max_input_tokens')
+        if not context_window:
+            return self.DEFAULT_DIFF_TOKEN_BUDGET
+        budget = int((context_window - self.PROMPT_RESERVE_TOKENS) * self.ESTIMATE_SAFETY_FACTOR)
+        return max(budget, self.DEFAULT_DIFF_TOKEN_BUDGET)
     
-    def generate_commit_summary(self, diff: str, message: str, generate_description: bool, repo_details: Dict, jira_context: Dict = None) -> Dict:
+    def prepare_diff(self, diff: str) -> Dict:
+        """
+        Pack a diff into the model's token budget.
+
+        Token counting takes a noticeable time on large diffs, so callers can
+        run it ahead of `generate_commit_summary` (e.g. while waiting for
+        JIRA); the result for the most recent diff is kept and reused.
+
+        Returns:
+            The DiffPacker result for the diff
+        """
+        if self._prepared is None or self._prepared[0] != diff:
+            budget = self.get_diff_token_budget()
+            self._prepared = (diff, DiffPacker(budget, self.count_tokens, self.diff_ignore).pack(diff))
+        return self._prepared[1]
+
+    def generate_commit_summary(self, diff: str, message: str, generate_description: bool, repo_details: Dict, jira_context: Dict = None,
+                                on_stream: Callable[[str, str], None] = None) -> Dict:
         """
         Generate a commit summary using the LLM.
+
+        The diff is first packed into the model's context budget: noise such as
+        lockfiles and generated code is reduced to a note and the most
+        informative hunks are kept. When not even one hunk of every file fits,
+        the diff is summarized map-reduce style instead: it is split per file
+        (and per hunk group for very large files), the chunks are summarized by
+        parallel requests and the final title and description are generated
+        from those summaries, so every file is taken into account.
+
+        On a client chosen by `route`, the route, the diff size and the
+        latency are appended to the route log in the Penify cache directory.
         
         Args:
             diff: Git diff of changes
             message: User-provided commit message or instructions
             repo_details: Details about the repository
             jira_context: Optional JIRA issue context to enhance the summary
+            on_stream: Optional callback receiving (field, text) as the title and
+                description are streamed from the model
             
         Returns:
             Dict with title and description for the commit
         """
+        if not self.route_name:
+            return self._generate_commit_summary(diff, message, generate_description, repo_details, jira_context, on_stream)
+
+        start = time.monotonic()
+        success = False
+        try:
+            result = self._generate_commit_summary(diff, message, generate_description, repo_details, jira_context,
+                                                   on_stream)
+            success = True
+            return result
+        finally:
+            self._log_route(time.monotonic() - start, success)
+
+    def _generate_commit_summary(self, diff: str, message: str, generate_description: bool, repo_details: Dict,
+                                 jira_context: Dict = None, on_stream: Callable[[str, str], None] = None) -> Dict:
         if not self.model:
             raise ValueError("LLM model not configured. Please provide a model when initializing LLMClient.")
-        
-        # Limit diff size to avoid token limits
-        max_diff_chars = 10000
-        if len(diff) > max_diff_chars:
-            diff = diff[:max_diff_chars] + f"\n... (diff truncated, total {len(diff)} characters)"
-        
-        # Create prompt for the LLM
-        prompt = f"""
-        Based on the Git diff below, generate a concise and descriptive commit summary.
-                
+
+        budget = self.get_diff_token_budget()
+        packed = self.prepare_diff(diff)
+        if packed['omitted_files']:
+            # Without a budget: this pass only strips noise, nothing is dropped
+            filtered = DiffPacker(float('inf'), noise_globs=self.diff_ignore).pack(diff)['diff']
+            changes_label = "Summaries of the changes (the diff was too large to include, so it was summarized in parts)"
+            changes = self.summarize_diff(filtered, message, budget)
+        else:
+            changes_label, changes = "Git diff", packed['diff']
+
+        if self.title_first and generate_description:
+            try:
+                return self._generate_title_first(changes_label, changes, message, jira_context, on_stream)
+            except Exception as e:
+                raise Exception(f"Error generating commit summary: {e}") from e
+
+        prompt = self._build_summary_prompt(changes_label, changes, message, generate_description, jira_context)
+        try:
+            # Increased token limit to accommodate detailed descriptions
+            on_delta = SummaryStreamParser(on_stream).feed if on_stream else None
+            fields = ["title", "description"] if generate_description else ["title"]
+            content = self._complete(prompt, max_tokens=800, on_delta=on_delta, schema=summary_schema(fields))
+            result = self._repair_summary(prompt, content, fields, max_tokens=800)
+
+            if not generate_description and 'description' in result:
+                # If description is missing and user requested it, add a placeholder
+                del result['description']
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Error generating commit summary: {e}") from e
+
+    def _generate_title_first(self, changes_label: str, changes: str, message: str, jira_context: Dict,
+                              on_stream: Callable[[str, str], None] = None) -> Dict:
+        """
+        Generate the title and the description with two concurrent requests.
+
+        The title request is short and answers well before the description
+        request. While streaming, the title is shown as soon as it arrives and
+        the description text follows it, held back until the title is complete.
+        """
+        if self._title_client is None:
+            self._title_client = self if not self.title_model else LLMClient(
+                model=self.title_model, endpoints=self.pool.endpoints, keep_alive=self.keep_alive,
+                backend=self.backend)
+        stream = DescriptionAfterTitle(on_stream) if on_stream else None
+        title_prompt = self._build_summary_prompt(changes_label, changes, message, False, jira_context)
+        description_prompt = self._build_description_prompt(changes_label, changes, message, jira_context)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            description_future = executor.submit(
+                self._complete, description_prompt, 800, stream.description if stream else None)
+            title_content = self._title_client._complete(
+                title_prompt, max_tokens=100, on_delta=SummaryStreamParser(stream.title).feed if stream else None,
+                schema=summary_schema(["title"]))
+            title = self._title_client._repair_summary(title_prompt, title_content, ["title"], max_tokens=100)['title']
+            if stream:
+                stream.title_done()
+            description = description_future.result().strip()
+        return {"title": title, "description": description}
+
+    def summarize_diff(self, diff: str, message: str, token_budget: int) -> str:
+        """
+        Summarize a large diff chunk by chunk.
+
+        Chunks are summarized in parallel, at most `max_concurrency` requests at
+        a time. If the joined summaries are still larger than `token_budget`
+        they are summarized again, level by level, until they fit.
+
+        Args:
+            diff: Git diff of changes
+            message: User-provided commit message or instructions
+            token_budget: Maximum size of the returned summaries in tokens
+
+        Returns:
+            The chunk summaries, one section per chunk
+        """
+        chunks = split_diff(diff, self.CHUNK_CHARS)
+        while True:
+            summaries = self._map_chunks(chunks, message)
+            combined = "\n\n".join(summaries)
+            if len(summaries) == 1 or self.count_tokens(combined) <= token_budget:
+                return combined
+            chunks = pack_chunks(summaries, self.CHUNK_CHARS)
+
+    def _map_chunks(self, chunks: List[str], message: str) -> List[str]:
+        def summarize(index, chunk):
+            prompt = f"""
+        Summarize part {index + 1} of {len(chunks)} of a Git diff so that a commit message can be written from it.
+        For each changed file, give one or two short bullet points describing what changed and why it matters.
+        Only describe changes that are present in the diff.
+
         User instructions: {message}
+
+        Changes:
+        ```
+        {chunk}
+        ```
         """
-        
+            return self._complete(prompt, max_tokens=300).strip()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(chunks)))) as executor:
+            return list(executor.map(summarize, range(len(chunks)), chunks))
+
+    def _response_format(self, schema: Dict) -> Optional[Dict]:
+        """Return the `response_format` enforcing a JSON schema, as far as the backend supports it."""
+        json_schema = {"type": "json_schema", "json_schema": {"name": "commit_summary", "schema": schema, "strict": True}}
+        if self.backend == "openai":
+            # The backend retries without response_format if the server rejects it
+            return json_schema
+        if self.get_model_info().get('supports_response_schema'):
+            return json_schema
+        if (self.model or "").split("/", 1)[0] in ("ollama", "ollama_chat"):
+            return {"type": "json_object"}
+        return None
+
+    def _complete(self, prompt: str, max_tokens: int, on_delta: Callable[[str], None] = None,
+                  schema: Dict = None, history: List[Dict] = None) -> str:
+        """
+        Send a completion request and return the response text.
+
+        With `on_delta` the response is streamed and each piece of text is
+        passed to the callback as soon as it arrives. With `schema` the
+        response is constrained to that JSON schema where the backend
+        supports structured output. `history` holds earlier messages of the
+        conversation, sent before the prompt.
+        """
+        # Stay within what the model allows
+        max_tokens = min(max_tokens, self.get_model_info().get('max_output_tokens') or max_tokens)
+        response_format = self._response_format(schema) if schema else None
+        response = self._backend().completion(
+            model=self.model,
+            messages=(history or []) + [{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=max_tokens,
+            **({"stream": True} if on_delta else {}),
+            **({"response_format": response_format} if response_format else {}),
+            **self._backend_params()
+        )
+        if not on_delta:
+            return response.choices[0].message.content
+
+        content = []
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                content.append(delta)
+                on_delta(delta)
+        return "".join(content)
+
+    def _jira_prompt_section(self, jira_context: Dict = None) -> str:
+        """Describe the primary JIRA issue for the prompt, if there is one."""
+        prompt = ""
         # Add JIRA context if available
         if jira_context and jira_context.get('primary_issue'):
             primary = jira_context['primary_issue']
@@ -80,12 +664,45 @@ class LLMClient:
             Please make sure your commit message addresses the business requirements in the JIRA issue
             while accurately describing the technical changes in the diff.
             """
+        return prompt
+
+    def _build_description_prompt(self, changes_label: str, changes: str, message: str, jira_context: Dict = None) -> str:
+        """Build the prompt asking for the commit description only."""
+        prompt = f"""
+        Based on the Git diff below, write the description of a commit.
+        Explain what was changed, why it was changed in both business and technical aspects, and any important context.
+                
+        User instructions: {message}
+        """
+        prompt += self._jira_prompt_section(jira_context)
+        prompt += f"""
+        
+        {changes_label}:
+        ```
+        {changes}
+        ```
+        
+        Respond with the description text only: no title, no JSON and no code fences.
+        """
+        return prompt
+
+    def _build_summary_prompt(self, changes_label: str, changes: str, message: str,
+                              generate_description: bool, jira_context: Dict = None) -> str:
+        """Build the prompt asking for the commit title and description."""
+        # Create prompt for the LLM
+        prompt = f"""
+        Based on the Git diff below, generate a concise and descriptive commit summary.
+                
+        User instructions: {message}
+        """
+        
+        prompt += self._jira_prompt_section(jira_context)
                 
         prompt += f"""
         
-        Git diff:
+        {changes_label}:
         ```
-        {diff}
+        {changes}
         ```
         
         Please provide:
@@ -103,49 +720,231 @@ class LLMClient:
         
         Format your response as valid JSON with 'title' {"and 'description'" if generate_description else ''} keys.
         """
-        
-        try:
-            # Call the LLM using litellm
-            response = litellm.completion(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=800  # Increased token limit to accommodate detailed descriptions
-            )            
-            content = response.choices[0].message.content
-            
-            # Extract JSON from the response
+        return prompt
+
+    def _repair_summary(self, prompt: str, content: str, fields: List[str], max_tokens: int) -> Dict:
+        """
+        Parse a summary response and have the model fix unusable fields.
+
+        Fields that are missing or break the title format are asked for again
+        in a follow-up message of the same conversation, at most
+        MAX_REPAIR_ATTEMPTS times; fields that are already fine are kept. If
+        the summary is still unusable after that, the best effort of
+        `_parse_summary` is returned; no response makes this raise.
+
+        Args:
+            prompt: The prompt the response answers
+            content: The model's response
+            fields: Fields the summary must have
+            max_tokens: Token limit of each follow-up response
+
+        Returns:
+            Dict with title and description
+        """
+        summary = extract_json_object(content) or {}
+        history = [{"role": "user", "content": prompt}, {"role": "assistant", "content": content}]
+        for attempt in range(MAX_REPAIR_ATTEMPTS):
+            problems = validate_summary(summary, fields)
+            if not problems:
+                break
+            logger.info(f"Asking {self.model} to fix its commit summary: {'; '.join(problems.values())}")
+            repair_prompt = (
+                f"Your answer cannot be used: {'; '.join(problems.values())}. "
+                f"Respond with only a JSON object with the key(s) {', '.join(problems)}, corrected."
+            )
+            content = self._complete(repair_prompt, max_tokens, schema=summary_schema(list(problems)), history=history)
+            history += [{"role": "user", "content": repair_prompt}, {"role": "assistant", "content": content}]
+            fixed = extract_json_object(content) or {}
+            summary.update({field: fixed[field] for field in problems if isinstance(fixed.get(field), str)})
+
+        if validate_summary(summary, ["title"]):
+            if not isinstance(summary.get("title"), str) or not summary["title"].strip():
+                # No title at all: fall back to the first line of the first response
+                return self._parse_summary(history[1]["content"])
+            logger.warning(f"Using a commit title that does not follow the format: {summary['title']}")
+        description = summary.get("description")
+        return {"title": summary["title"].strip(), "description": description.strip() if isinstance(description, str) else ""}
+
+    def _parse_summary(self, content: str) -> Dict:
+        """
+        Extract the title and description from the model's response.
+
+        This is the last resort for unusable responses and never raises. A
+        JSON object with a title is used as is. Anything else is read as
+        text: the first non-empty line is the title and the remaining lines
+        are the description. For a JSON object without a title, that text is
+        its description.
+        """
+        summary = extract_json_object(content)
+        if summary is not None:
+            title, description = summary.get('title'), summary.get('description')
+            if isinstance(title, str) and title.strip():
+                # A title-only response, as asked for when no description is wanted
+                return {"title": title.strip(), "description": description.strip() if isinstance(description, str) else ""}
+            if isinstance(description, str) and description.strip():
+                content = description
+
+        # Code fence markers are not part of the text
+        lines = [line.rstrip() for line in content.split('\n') if line.strip() and not line.strip().startswith("```")]
+        return {
+            "title": lines[0].strip() if lines else "Generated commit",
+            "description": "\n".join(lines[1:])
+        }
+
+
+class SummaryStreamParser:
+    """
+    Incrementally extracts the "title" and "description" strings from a JSON
+    response while it is being streamed.
+
+    Text is fed in arbitrary pieces; decoded characters of either field are
+    reported to `on_field(field, text)` as soon as they are complete, so the
+    title can be shown before the rest of the response has been generated.
+    Responses that are not JSON produce no callbacks.
+    """
+
+    FIELD_PATTERN = re.compile(r'"(title|description)"\s*:\s*"')
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+
+    def __init__(self, on_field: Callable[[str, str], None]):
+        self.on_field = on_field
+        self.buffer = ""
+        self.pos = 0
+        self.field = None
+
+    def feed(self, text: str):
+        self.buffer += text
+        while True:
+            if self.field is None:
+                match = self.FIELD_PATTERN.search(self.buffer, self.pos)
+                if not match:
+                    return
+                self.field, self.pos = match.group(1), match.end()
+            if not self._read_string():
+                return
+
+    def _read_string(self) -> bool:
+        """Decode the current field up to the end of the buffer; True once its closing quote was read."""
+        decoded = []
+        buffer, i = self.buffer, self.pos
+        closed = False
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                closed = True
+                i += 1
+                break
+            if char != '\\':
+                decoded.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] != 'u':
+                decoded.append(self.ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
             try:
-                # Try to parse the entire content as JSON
-                result = json.loads(content)
-                if not isinstance(result, dict) or 'title' not in result or 'description' not in result:
-                    raise ValueError("Invalid JSON structure")
-                    
-            except json.JSONDecodeError:
-                # If that fails, try to extract JSON from the content
-                import re
-                json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group(1))
+                code = int(buffer[i + 2:i + 6], 16)
+                if 0xD800 <= code < 0xDC00:
+                    # High surrogate: wait for its pair
+                    if i + 12 > len(buffer):
+                        break
+                    low = int(buffer[i + 8:i + 12], 16)
+                    decoded.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
                 else:
-                    # Last resort: extract title and description directly
-                    lines = content.split('\n')
-                    title = next((line for line in lines if line.strip()), "Generated commit").strip()
-                    description = "\n".join(line for line in lines[1:] if line.strip())
-                    result = {
-                        "title": title,
-                        "description": description
-                    }
-            
-            if not generate_description and 'description' in result:
-                # If description is missing and user requested it, add a placeholder
-                del result['description']
-            return result
-            
-        except Exception as e:
-            sys.exit(f"Error generating commit summary: {e}")
-            # Fallback to a basic summary if LLM fails
-            print(f"Error generating commit summary with LLM: {e}")
-            return {
-                "title": "Update code",
-            }
+                    decoded.append(chr(code))
+                    i += 6
+            except ValueError:
+                # Invalid escape from the model: show it as is
+                decoded.append(buffer[i:i + 6])
+                i += 6
+
+        self.pos = i
+        if decoded:
+            self.on_field(self.field, "".join(decoded))
+        if closed:
+            self.field = None
+        return closed
+
+
+def split_diff(diff: str, chunk_chars: int) -> List[str]:
+    """
+    Split a unified diff into chunks of at most roughly `chunk_chars` characters.
+
+    Chunks never cut through a file unless the file alone is larger than a
+    chunk; such files are split at hunk boundaries (and, for a single huge
+    hunk, by lines). Small files are packed together.
+
+    Args:
+        diff: Output of `git diff`
+        chunk_chars: Target chunk size in characters
+
+    Returns:
+        List of diff chunks in their original order
+    """
+    files = re.split(r'(?m)^(?=diff --git )', diff)
+    pieces = []
+    for file_diff in filter(None, files):
+        if len(file_diff) <= chunk_chars:
+            pieces.append(file_diff)
+            continue
+        # Keep the file header on every piece so each chunk names its file
+        parts = re.split(r'(?m)^(?=@@ )', file_diff)
+        header, hunks = parts[0], parts[1:]
+        body_chars = max(chunk_chars - len(header), chunk_chars // 2)
+        for hunk in pack_chunks(hunks, body_chars):
+            for start in range(0, len(hunk), body_chars):
+                pieces.append(header + hunk[start:start + body_chars])
+    return pack_chunks(pieces, chunk_chars)
+
+
+def pack_chunks(pieces: List[str], chunk_chars: int) -> List[str]:
+    """Greedily concatenate consecutive pieces into chunks of at most `chunk_chars` characters."""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current += piece if not current or current.endswith("\n") else "\n" + piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DescriptionAfterTitle:
+    """
+    Orders the streamed output of concurrent title and description requests.
+
+    Title text is passed on as it arrives. Description text is held back
+    until `title_done` is called, then passed on in one piece and streamed
+    from there on.
+    """
+
+    def __init__(self, on_stream: Callable[[str, str], None]):
+        self.on_stream = on_stream
+        self.lock = threading.Lock()
+        self.title_complete = False
+        self.pending = []
+
+    def title(self, field: str, text: str):
+        if field == "title":
+            self.on_stream(field, text)
+
+    def title_done(self):
+        with self.lock:
+            self.title_complete = True
+            if self.pending:
+                self.on_stream("description", "".join(self.pending).lstrip())
+                self.pending = []
+
+    def description(self, text: str):
+        with self.lock:
+            if self.title_complete:
+                self.on_stream("description", text)
+            else:
+                self.pending.append(text)
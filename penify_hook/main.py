@@ -3,7 +3,8 @@ import sys
 import time
 
 
-def main():
+def build_parser():
+    """Build the top-level argument parser with all subcommands attached."""
     parser = argparse.ArgumentParser(
         description="""Penify CLI tool for:
 1. AI commit message generation with JIRA integration to enhance commit messages.
@@ -34,6 +35,10 @@ def main():
     from .config_command import setup_config_parser
     setup_config_parser(config_parser)
     
+    llm_parser = subparsers.add_parser("llm", help="Manage the local LLM, e.g. warm it up before committing.")
+    from .commands.llm_commands import setup_llm_parser
+    setup_llm_parser(llm_parser)
+    
     login_parser = subparsers.add_parser("login", help="Log in to Penify to use advanced features like 'docgen' generation.")
     from .login_command import setup_login_parser
     setup_login_parser(login_parser)
@@ -41,19 +46,20 @@ def main():
     docgen_parser = subparsers.add_parser("docgen", help="[REQUIRES LOGIN] Generate code documentation for the Git diff, file or folder.")
     from .commands.doc_commands import setup_docgen_parser
     setup_docgen_parser(docgen_parser)
-    
-    # Parse args without validation first to check for simple flags like --version
-    if '--version' in sys.argv or '-v' in sys.argv:
-        from importlib.metadata import version
-        try:
-            print(f"penifycli version {version('penifycli')}")
-        except:
-            print("penifycli version 0.2.2")
-        return 0
-    
-    # Parse the arguments to determine which command was requested
-    args = parser.parse_args()    
-    # Handle the commands
+
+    jira_parser = subparsers.add_parser("jira", help="Show, flush and retry the queued JIRA updates of commits.")
+    from .commands.jira_commands import setup_jira_parser
+    setup_jira_parser(jira_parser)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Run a background daemon that keeps penifycli warm between invocations.")
+    from .commands.daemon_commands import setup_daemon_parser
+    setup_daemon_parser(daemon_parser)
+
+    return parser
+
+
+def run_command(args, parser):
+    """Dispatch parsed arguments to the matching command handler."""
     if args.subcommands == "commit":
         from penify_hook.ui_utils import print_info
         print_info("Please wait while we generate the commit message...")
@@ -62,15 +68,47 @@ def main():
     elif args.subcommands == "config":
         from .config_command import handle_config
         return handle_config(args)
+    elif args.subcommands == "llm":
+        from .commands.llm_commands import handle_llm
+        return handle_llm(args)
     elif args.subcommands == "login":
         from .login_command import handle_login
         return handle_login(args)
     elif args.subcommands == "docgen":
         from .commands.doc_commands import handle_docgen
         return handle_docgen(args)
+    elif args.subcommands == "jira":
+        from .commands.jira_commands import handle_jira
+        return handle_jira(args)
+    elif args.subcommands == "daemon":
+        from .commands.daemon_commands import handle_daemon
+        return handle_daemon(args)
     else:
         parser.print_help()
         return 1
 
+
+def main():
+    # Parse args without validation first to check for simple flags like --version
+    if '--version' in sys.argv or '-v' in sys.argv:
+        from importlib.metadata import version
+        try:
+            print(f"penifycli version {version('penifycli')}")
+        except:
+            print("penifycli version 0.2.2")
+        return 0
+
+    # Hand the command over to a running daemon, if there is one
+    from .daemon import forward_command
+    exit_code = forward_command(sys.argv[1:])
+    if exit_code is not None:
+        return exit_code
+
+    parser = build_parser()
+    # Parse the arguments to determine which command was requested
+    args = parser.parse_args()    
+    # Handle the commands
+    return run_command(args, parser)
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Minimal client of OpenAI-compatible chat completion endpoints.
+
+Servers such as vLLM, Ollama and LM Studio expose `/v1/chat/completions`.
+Talking to them directly over a pooled HTTP session avoids importing litellm
+and its provider machinery. `completion` takes the same arguments as
+`litellm.completion` and returns responses (or, when streaming, chunks) of the
+same shape, so `LLMClient` can use either backend.
+"""
+import json
+import logging
+import threading
+from types import SimpleNamespace
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "http://localhost:8000/v1"
+REQUEST_TIMEOUT = 60 * 10
+# litellm provider prefixes that name the model on an OpenAI-compatible server
+PROVIDER_PREFIXES = ("openai/", "ollama/", "ollama_chat/", "hosted_vllm/", "lm_studio/")
+
+
+def endpoint_url(api_base: str, path: str) -> str:
+    """Build the URL of an API path, adding `/v1` to bare server addresses like Ollama's."""
+    base = (api_base or DEFAULT_API_BASE).rstrip("/")
+    if not base.endswith("/v1"):
+        base += "/v1"
+    return f"{base}/{path}"
+
+
+def server_model_name(model: str) -> str:
+    """Strip the litellm provider prefix, which the server does not know about."""
+    for prefix in PROVIDER_PREFIXES:
+        if model.startswith(prefix):
+            return model[len(prefix):]
+    return model
+
+
+class OpenAICompatibleBackend:
+    """Chat completions over a shared `requests.Session`, which keeps connections alive between calls."""
+
+    def __init__(self, timeout: int = REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _headers(self, api_key: str = None) -> dict:
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def completion(self, model: str, messages: list, max_tokens: int = None, temperature: float = None,
+                   stream: bool = False, api_base: str = None, api_key: str = None, response_format: dict = None,
+                   keep_alive=None, **kwargs):
+        """
+        Send a chat completion request.
+
+        Args:
+            model: Model name, optionally with a litellm provider prefix
+            messages: Chat messages
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature
+            stream: Stream the response as server-sent events
+            api_base: Base URL of the server, e.g. "http://localhost:8000/v1"
+            api_key: Bearer token, if the server needs one
+            response_format: e.g. {"type": "json_object"} to ask for a JSON response
+            keep_alive: Passed on for Ollama, which keeps the model loaded that long
+
+        Returns:
+            A response with `choices[0].message.content`, or when streaming an
+            iterator of chunks with `choices[0].delta.content`
+        """
+        if kwargs:
+            logger.debug(f"Ignoring parameters not supported by the OpenAI-compatible backend: {sorted(kwargs)}")
+        payload = {"model": server_model_name(model), "messages": messages, "stream": stream}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if response_format is not None:
+            payload["response_format"] = response_format
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        response = self.session.post(endpoint_url(api_base, "chat/completions"), json=payload,
+                                     headers=self._headers(api_key), timeout=self.timeout, stream=stream)
+        if response.status_code == 400 and response_format is not None:
+            # Not every server supports response_format; the prompt asks for JSON anyway
+            logger.info(f"Server rejected response_format, retrying without it: {response.text}")
+            response.close()
+            del payload["response_format"]
+            response = self.session.post(endpoint_url(api_base, "chat/completions"), json=payload,
+                                         headers=self._headers(api_key), timeout=self.timeout, stream=stream)
+        if response.status_code != 200:
+            text = response.text
+            response.close()
+            raise Exception(f"LLM API Error {response.status_code}: {text}")
+        if stream:
+            return self._stream_chunks(response)
+        content = response.json()["choices"][0]["message"].get("content") or ""
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    @staticmethod
+    def _stream_chunks(response):
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or []
+                content = (choices[0].get("delta") or {}).get("content") if choices else None
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    def get_model_info(self, model: str, api_base: str = None, api_key: str = None) -> dict:
+        """
+        Ask the server about a model. vLLM reports the context window as
+        `max_model_len`; other servers report nothing useful.
+
+        Returns:
+            Dict with `max_input_tokens` when known
+        """
+        response = self.session.get(endpoint_url(api_base, "models"), headers=self._headers(api_key), timeout=10)
+        response.raise_for_status()
+        name = server_model_name(model)
+        for entry in response.json().get("data", []):
+            if entry.get("id") == name and entry.get("max_model_len"):
+                return {"max_input_tokens": entry["max_model_len"]}
+        return {}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_openai_backend() -> OpenAICompatibleBackend:
+    """Return the process-wide backend, so all clients share its connection pool."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = OpenAICompatibleBackend()
+        return _backend
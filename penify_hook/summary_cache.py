@@ -0,0 +1,83 @@
+"""
+On-disk cache of generated commit summaries.
+
+A summary is stored under a key derived from the staged tree (`git
+write-tree`), the user's instruction, the model and the JIRA issues of the
+branch. The key is known before the diff is read, so re-running `penifycli commit` on an unchanged index, for
+example after a failed commit hook or an aborted editor, returns the cached
+summary without reading the diff or calling the model again.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+
+from penify_hook.utils import get_penify_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 200
+
+
+def hash_context(context) -> str:
+    """Return a stable hash of JSON-like data such as the JIRA context."""
+    return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CommitSummaryCache:
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or os.path.join(get_penify_cache_dir(), "commit-summaries")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(tree: str, instruction: str, model: str, jira_issues, generate_description: bool) -> str:
+        """
+        Build the cache key of a summary.
+
+        Args:
+            tree: Object id of the staged tree, from `git write-tree`
+            instruction: The user's commit message or instructions
+            model: The LLM model, or None for the Penify API
+            jira_issues: JIRA issue keys the context is fetched for, if any
+            generate_description: Whether a description was requested
+
+        Returns:
+            Hex digest identifying the summary
+        """
+        parts = [tree, instruction or "", model or "penify-api", hash_context(jira_issues), str(bool(generate_description))]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str):
+        """Return the cached summary for a key, or None."""
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)["summary"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    def set(self, key: str, summary: dict):
+        """Store a summary and drop the oldest entries beyond MAX_ENTRIES."""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"summary": summary, "created_at": time.time()}, f)
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError as e:
+            logger.warning(f"Could not cache commit summary: {e}")
+
+    def _prune(self):
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        if len(entries) <= MAX_ENTRIES:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:-MAX_ENTRIES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -5,8 +5,8 @@ This module provides utility functions for consistent UI formatting,
 colored output, and progress indicators across the Penify CLI application.
 """
 import os
+import sys
 from colorama import Fore, Style, init
-from tqdm import tqdm
 
 # Initialize colorama for cross-platform colored terminal output
 init(autoreset=True)
@@ -86,6 +86,47 @@ def print_status(status, message):
     else:
         print(f"  {PROCESSING_SYMBOL} {message}")
 
+class SummaryStreamPrinter:
+    """Print a commit title and description as they are streamed from the LLM.
+
+    Used as the ``on_stream(field, text)`` callback of the LLM client. The
+    summary finally used can differ from what was streamed, e.g. when an
+    invalid title was repaired or another backend answered first; `finish`
+    then prints the fields that changed.
+    """
+
+    LABELS = {'title': "Title: ", 'description': "Description:\n"}
+
+    def __init__(self):
+        self.field = None
+        self.streamed = {}
+
+    def __call__(self, field, text):
+        if field != self.field:
+            if self.field is not None:
+                sys.stdout.write("\n\n")
+            sys.stdout.write(format_highlight(self.LABELS.get(field, f"{field}: ")))
+            self.field = field
+        self.streamed[field] = self.streamed.get(field, "") + text
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def finish(self, summary=None):
+        """End the streamed output with a newline if anything was printed.
+
+        Args:
+            summary (dict): The summary finally used, to show fields that differ from the streamed ones.
+        """
+        if self.field is not None:
+            sys.stdout.write("\n")
+            self.field = None
+        for field, text in self.streamed.items():
+            final = (summary or {}).get(field)
+            if final and final.strip() != text.strip():
+                separator = "\n" if field == 'description' else " "
+                sys.stdout.write(format_warning(f"{field.capitalize()} was replaced with:") + separator + final + "\n")
+        sys.stdout.flush()
+
 def create_progress_bar(total, desc="Processing", unit="item"):
     """Create a tqdm progress bar with consistent styling.
     
@@ -97,6 +138,8 @@ def create_progress_bar(total, desc="Processing", unit="item"):
     Returns:
         tqdm: A configured tqdm progress bar instance
     """
+    # Imported here to keep CLI start-up fast for commands without progress bars
+    from tqdm import tqdm
     return tqdm(
         total=total,
         desc=format_info(desc),
@@ -115,6 +158,7 @@ def create_stage_progress_bar(stages, desc="Processing"):
     Returns:
         tuple: (tqdm progress bar, list of stages)
     """
+    from tqdm import tqdm
     pbar = tqdm(
         total=len(stages),
         desc=format_info(desc),
@@ -1,8 +1,12 @@
+import json
 import logging
 import os
 import re
+from typing import TYPE_CHECKING
 
-from git import Repo
+if TYPE_CHECKING:
+    # GitPython is slow to import; callers hand us Repo objects they created
+    from git import Repo
 logger = logging.getLogger(__name__)
 
 
@@ -10,7 +14,82 @@ class GitRepoNotFoundError(Exception):
     pass
 
 
-def get_repo_details(repo: Repo):
+# Process-wide caches. In a one-shot CLI run they are filled once; inside the
+# daemon they keep clients and repository details warm across invocations.
+_client_cache = {}
+_repo_details_cache = {}
+
+
+def get_penify_cache_dir() -> str:
+    """Return the directory used for Penify's local cache and state files.
+
+    The location honours ``PENIFY_CACHE_DIR`` and ``XDG_CACHE_HOME`` and falls
+    back to ``~/.cache/penify``. The directory is created if it is missing.
+
+    Returns:
+        str: The absolute path of the cache directory.
+    """
+    cache_dir = os.environ.get("PENIFY_CACHE_DIR")
+    if not cache_dir:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(xdg_cache, "penify")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_cached_client(factory, *args, **kwargs):
+    """Return a client built by ``factory``, reusing an earlier instance
+    created with the same arguments.
+
+    Args:
+        factory (callable): Client class or factory function.
+        *args: Positional arguments passed to the factory.
+        **kwargs: Keyword arguments passed to the factory.
+
+    Returns:
+        object: The cached or newly created client.
+    """
+    # Configuration values such as lists of routes or endpoints are not hashable, their JSON is
+    key = (factory, json.dumps([args, kwargs], sort_keys=True, default=repr))
+    if key in _client_cache:
+        return _client_cache[key]
+    client = factory(*args, **kwargs)
+    _client_cache[key] = client
+    return client
+
+
+def evict_cached_client(client):
+    """Drop a client from the cache, e.g. after it failed to connect."""
+    for key, value in list(_client_cache.items()):
+        if value is client:
+            del _client_cache[key]
+
+
+def get_cached_repo_details(repo: 'Repo'):
+    """Return :func:`get_repo_details` for ``repo``, cached until the
+    repository's git config changes.
+
+    Args:
+        repo (Repo): The repository to describe.
+
+    Returns:
+        dict: The repository details.
+    """
+    config_path = os.path.join(repo.git_dir, "config")
+    try:
+        config_mtime = os.path.getmtime(config_path)
+    except OSError:
+        config_mtime = None
+    key = repo.working_dir
+    cached = _repo_details_cache.get(key)
+    if cached and cached[0] == config_mtime:
+        return cached[1]
+    details = get_repo_details(repo)
+    _repo_details_cache[key] = (config_mtime, details)
+    return details
+
+
+def get_repo_details(repo: 'Repo'):
     """Get the details of the repository, including the hosting service,
     organization name, and repository name.
 
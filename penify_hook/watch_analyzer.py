@@ -0,0 +1,266 @@
+import ctypes
+import ctypes.util
+import difflib
+import os
+import select
+import struct
+import sys
+import time
+import logging
+
+from penify_hook.base_analyzer import BaseAnalyzer
+from .api_client import APIClient
+from .ui_utils import (
+    print_info, print_success, print_processing, print_status
+)
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_hidden(path):
+    return any(part.startswith(".") for part in path.split(os.sep) if part not in ("", ".", ".."))
+
+
+class PollingWatcher:
+    """Detects file changes by periodically comparing modification times."""
+
+    def __init__(self, root: str, interval: float = 0.5):
+        self.root = root
+        self.interval = interval
+        self._mtimes = self._snapshot()
+
+    def _snapshot(self):
+        mtimes = {}
+        if os.path.isfile(self.root):
+            paths = [self.root]
+        else:
+            paths = []
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                paths.extend(os.path.join(dirpath, filename) for filename in filenames)
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def wait(self, timeout: float) -> set:
+        """Return the files changed since the previous call, waiting up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            changed = {path for path, mtime in current.items() if self._mtimes.get(path) != mtime}
+            self._mtimes = current
+            if changed or time.monotonic() >= deadline:
+                return changed
+            time.sleep(min(self.interval, max(0.0, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detects file changes with Linux inotify, watching directories recursively."""
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.root = root
+        self._watches = {}
+        if os.path.isfile(root):
+            # Watch the parent directory and keep only events for this file
+            self._only_file = os.path.abspath(root)
+            self._add_watch(os.path.dirname(self._only_file) or ".")
+        else:
+            self._only_file = None
+            for dirpath, dirnames, _ in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                self._add_watch(dirpath)
+
+    def _add_watch(self, directory: str):
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+        if wd < 0:
+            logger.warning(f"Could not watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = directory
+
+    def wait(self, timeout: float) -> set:
+        """Return the files changed since the previous call, waiting up to `timeout` seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+            offset += name_len
+
+            directory = self._watches.get(wd)
+            if directory is None or not name or name.startswith("."):
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & IN_CREATE and self._only_file is None:
+                    self._add_watch(path)
+                continue
+            if self._only_file and os.path.abspath(path) != self._only_file:
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(root: str):
+    """Create an inotify watcher, falling back to polling where inotify is unavailable."""
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError) as e:
+        logger.info(f"inotify unavailable ({e}), falling back to polling")
+        return PollingWatcher(root)
+
+
+def get_changed_lines(old_content: str, new_content: str) -> list:
+    """Return the 1-based line numbers of `new_content` that differ from `old_content`.
+
+    Deleted regions are reported as the line following the deletion, matching
+    how `GitDocGenHook.get_modified_lines` treats deletions.
+    """
+    old_lines = old_content.splitlines()
+    new_lines = new_content.splitlines()
+    changed = set()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "insert"):
+            changed.update(range(j1 + 1, j2 + 1))
+        elif tag == "delete":
+            changed.add(min(j1 + 1, max(len(new_lines), 1)))
+    return sorted(changed)
+
+
+class WatchDocGenHook(BaseAnalyzer):
+    def __init__(self, watch_path: str, api_client: APIClient, debounce: float = 0.75):
+        self.watch_path = watch_path
+        self.debounce = debounce
+        watch_dir = watch_path if os.path.isdir(watch_path) else os.path.dirname(watch_path)
+        super().__init__(os.path.abspath(watch_dir or "."), api_client)
+        # Content of each file as last documented (or as committed at HEAD)
+        self.documented_content = {}
+
+    def get_documented_content(self, file_path: str) -> str:
+        """Return the last documented version of a file.
+
+        Files not documented during this session start from their content at
+        HEAD; untracked files start empty, so all their lines count as changed.
+        """
+        abs_path = os.path.abspath(file_path)
+        if abs_path not in self.documented_content:
+            rel_path = os.path.relpath(abs_path, self.repo_path)
+            try:
+                self.documented_content[abs_path] = self.repo.git.show(f"HEAD:{rel_path}")
+            except Exception:
+                self.documented_content[abs_path] = ""
+        return self.documented_content[abs_path]
+
+    def process_file(self, file_path: str) -> bool:
+        """Document the regions of a file that changed since it was last documented.
+
+        Args:
+            file_path (str): Path of the changed file.
+
+        Returns:
+            bool: True if the file was updated with generated documentation.
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()[1:]
+        if not file_extension or file_extension not in self.supported_file_types:
+            return False
+
+        try:
+            with open(file_path, 'r') as file:
+                content = file.read()
+        except (OSError, UnicodeDecodeError) as e:
+            logger.info(f"Skipping {file_path}: {e}")
+            return False
+
+        modified_lines = get_changed_lines(self.get_documented_content(file_path), content)
+        if not modified_lines:
+            # Nothing new since the last documented version (e.g. our own write)
+            return False
+
+        print_processing(file_path)
+        rel_path = os.path.relpath(os.path.abspath(file_path), self.repo_path)
+        response = self.api_client.send_file_for_docstring_generation(rel_path, content, modified_lines, self.repo_details)
+        if response is None or response == content:
+            self.documented_content[os.path.abspath(file_path)] = content
+            print_status('warning', "No changes needed")
+            return False
+
+        # Do not overwrite edits made while the request was in flight
+        with open(file_path, 'r') as file:
+            if file.read() != content:
+                print_status('warning', "File changed during documentation, retrying on next save")
+                return False
+
+        with open(file_path, 'w') as file:
+            file.write(response)
+        self.documented_content[os.path.abspath(file_path)] = response
+        print_status('success', "Documentation updated")
+        return True
+
+    def collect_changes(self, watcher) -> set:
+        """Wait for a burst of changes and return it once saves have settled."""
+        changed = set()
+        while not changed:
+            changed = watcher.wait(timeout=1.0)
+        while True:
+            more = watcher.wait(timeout=self.debounce)
+            if not more:
+                return changed
+            changed |= more
+
+    def run(self):
+        """Watch the path and document changed regions until interrupted."""
+        watcher = create_watcher(self.watch_path)
+        print_info(f"Watching {self.watch_path} for changes ({type(watcher).__name__}). Press Ctrl+C to stop.")
+        try:
+            while True:
+                for file_path in sorted(self.collect_changes(watcher)):
+                    if _is_hidden(os.path.relpath(file_path, self.repo_path)) or not os.path.isfile(file_path):
+                        continue
+                    try:
+                        self.process_file(file_path)
+                    except Exception as e:
+                        logger.error(f"Error processing file [{file_path}]: {e}")
+                        print_status('error', f"Error processing file [{file_path}]: {e}")
+        except KeyboardInterrupt:
+            print_success("\n✓ Stopped watching")
+        finally:
+            watcher.close()
@@ -0,0 +1,153 @@
+import contextlib
+import multiprocessing
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .ui_utils import (
+    format_file_path, print_info, print_success, print_warning, print_error, print_status
+)
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_API_REQUESTS = 4
+
+# Per-process state of the pool workers, set up by _init_worker
+_worker_api_client = None
+
+
+def discover_git_repos(workspace_dir: str) -> list:
+    """Find the git repositories under a workspace directory.
+
+    A directory is a repository root when it contains a `.git` entry, the
+    same rule `recursive_search_git_folder` applies (so worktrees and
+    submodules with a `.git` file count too). The walk does not descend into
+    a repository once found, and hidden directories are skipped.
+
+    Args:
+        workspace_dir (str): The directory to search.
+
+    Returns:
+        list: Sorted repository root paths.
+    """
+    repos = []
+    for dirpath, dirnames, filenames in os.walk(workspace_dir):
+        if '.git' in dirnames or '.git' in filenames:
+            repos.append(dirpath)
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+    return sorted(repos)
+
+
+def _init_worker(api_url: str, token: str, request_limiter):
+    """Create the API client shared by every repository a worker process handles."""
+    global _worker_api_client
+    from .api_client import APIClient
+    _worker_api_client = APIClient(api_url, token, request_limiter=request_limiter)
+
+
+def _document_repo(repo_path: str) -> dict:
+    """Run docgen for one repository inside a worker process.
+
+    Console output of the analyzer is discarded: several workers run at the
+    same time and the parent prints a merged summary instead.
+    """
+    from .git_analyzer import GitDocGenHook
+
+    start = time.monotonic()
+    result = {'repo': repo_path, 'status': 'success', 'summary': {}, 'error': None}
+    try:
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            result['summary'] = GitDocGenHook(repo_path, _worker_api_client).run()
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    result['duration'] = time.monotonic() - start
+    return result
+
+
+class WorkspaceDocGenHook:
+    def __init__(self, workspace_dir: str, api_url: str, token: str,
+                 jobs: int = None, max_api_requests: int = DEFAULT_MAX_API_REQUESTS):
+        """
+        Args:
+            workspace_dir: Directory containing the repositories
+            api_url: Base URL of the Penify API
+            token: Penify API token
+            jobs: Number of worker processes, defaults to the CPU count
+            max_api_requests: Maximum concurrent documentation requests across all workers
+        """
+        self.workspace_dir = workspace_dir
+        self.api_url = api_url
+        self.token = token
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_api_requests = max_api_requests
+
+    def run(self) -> list:
+        """Document every repository of the workspace and print a merged summary.
+
+        Returns:
+            list: One result dict per repository.
+        """
+        repos = discover_git_repos(self.workspace_dir)
+        if not repos:
+            print_warning(f"No git repositories found in {self.workspace_dir}")
+            return []
+
+        jobs = min(self.jobs, len(repos))
+        print_info(f"Generating documentation for {len(repos)} repositories "
+                   f"({jobs} processes, at most {self.max_api_requests} concurrent API requests)")
+
+        context = multiprocessing.get_context()
+        request_limiter = context.BoundedSemaphore(self.max_api_requests)
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=_init_worker,
+                                 initargs=(self.api_url, self.token, request_limiter)) as executor:
+            futures = {executor.submit(_document_repo, repo): repo for repo in repos}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'repo': futures[future], 'status': 'failed', 'summary': {},
+                              'error': str(e), 'duration': 0.0}
+                results.append(result)
+                label = os.path.relpath(result['repo'], self.workspace_dir)
+                if result['status'] == 'success':
+                    print_status('success', f"{label} ({result['duration']:.1f}s)")
+                else:
+                    print_status('error', f"{label}: {result['error']}")
+
+        self.print_summary(results)
+        return results
+
+    def print_summary(self, results: list):
+        """Print per-repository counts followed by workspace totals."""
+        results = sorted(results, key=lambda result: result['repo'])
+        width = max(len(os.path.relpath(result['repo'], self.workspace_dir)) for result in results)
+        print_info("\nWorkspace summary")
+        print(f"{'Repository':<{width}}  {'Files':>5}  {'Updated':>7}  {'Failed':>6}  {'Time':>7}  Status")
+
+        totals = {'processed': 0, 'updated': 0, 'failed': 0}
+        failed_repos = 0
+        for result in results:
+            summary = result['summary'] or {}
+            for key in totals:
+                totals[key] += summary.get(key, 0)
+            label = os.path.relpath(result['repo'], self.workspace_dir)
+            status = 'ok' if result['status'] == 'success' else f"error: {result['error']}"
+            if result['status'] != 'success':
+                failed_repos += 1
+            print(f"{format_file_path(f'{label:<{width}}')}  {summary.get('processed', 0):>5}  "
+                  f"{summary.get('updated', 0):>7}  {summary.get('failed', 0):>6}  "
+                  f"{result['duration']:>6.1f}s  {status}")
+
+        message = (f"{len(results)} repositories, {totals['processed']} files, "
+                   f"{totals['updated']} updated, {totals['failed']} failed")
+        if failed_repos:
+            print_error(f"\n✗ {message}; {failed_repos} repositories failed")
+        else:
+            print_success(f"\n✓ {message}")
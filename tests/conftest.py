@@ -1,8 +1,32 @@
 import pytest
 import os
 import sys
+from git import Repo
 
 # Add project root to sys.path for imports to work
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Common fixtures can be added here
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """
+    Return a function creating a git repository with a configured user.
+
+    It takes the directory of the repository (default: `tmp_path`), created if
+    missing, and a dict of file contents by name committed as the initial
+    commit; without files the repository has no commits. The `Repo` is
+    returned.
+    """
+    def make(path=None, files=None):
+        path = path or tmp_path
+        repo = Repo.init(path)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "Test")
+            config.set_value("user", "email", "test@example.com")
+        if files:
+            for name, content in files.items():
+                (path / name).write_text(content)
+            repo.index.add(list(files))
+            repo.index.commit("initial commit")
+        return repo
+    return make
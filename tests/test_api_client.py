@@ -0,0 +1,91 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from penify_hook.api_client import APIClient
+
+LLM_SUMMARY = {"title": "feat: from llm", "description": ""}
+API_SUMMARY = {"title": "feat: from api", "description": ""}
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient("http://api.example.com", "api-token")
+    with patch.object(client, "generate_commit_summary", return_value=API_SUMMARY) as api:
+        yield client, api
+
+
+def summarize(api_client, llm_client, hedge_delay_ms=100, **kwargs):
+    return api_client.generate_commit_summary_with_llm("diff", "msg", True, {}, llm_client,
+                                                       hedge_delay_ms=hedge_delay_ms, **kwargs)
+
+
+def test_fast_local_llm_is_not_hedged(api_client):
+    client, api = api_client
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.return_value = LLM_SUMMARY
+
+    assert summarize(client, llm_client) == LLM_SUMMARY
+    api.assert_not_called()
+
+
+def test_slow_local_llm_is_hedged_with_the_api(api_client):
+    client, api = api_client
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.side_effect = lambda *args, **kwargs: time.sleep(2) or LLM_SUMMARY
+
+    start = time.monotonic()
+    assert summarize(client, llm_client) == API_SUMMARY
+    assert time.monotonic() - start < 1
+
+
+def test_losing_local_stream_is_stopped(api_client):
+    client, api = api_client
+    stopped = threading.Event()
+    streamed = []
+
+    def generate(*args, on_stream=None, **kwargs):
+        try:
+            for _ in range(100):
+                on_stream("title", "x")
+                time.sleep(0.02)
+        except Exception:
+            stopped.set()
+            raise
+        return LLM_SUMMARY
+
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.side_effect = generate
+
+    assert summarize(client, llm_client, on_stream=lambda field, text: streamed.append(text)) == API_SUMMARY
+    assert stopped.wait(1)
+    assert 0 < len(streamed) < 100
+
+
+def test_local_error_asks_the_api_without_waiting(api_client):
+    client, api = api_client
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.side_effect = Exception("connection refused")
+
+    start = time.monotonic()
+    assert summarize(client, llm_client, hedge_delay_ms=5000) == API_SUMMARY
+    assert time.monotonic() - start < 1
+
+
+def test_invalid_api_answer_waits_for_the_local_llm(api_client):
+    client, api = api_client
+    api.return_value = None
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.side_effect = lambda *args, **kwargs: time.sleep(0.3) or LLM_SUMMARY
+
+    assert summarize(client, llm_client) == LLM_SUMMARY
+
+
+def test_without_hedging_errors_fall_back_to_the_api(api_client):
+    client, api = api_client
+    llm_client = MagicMock()
+    llm_client.generate_commit_summary.side_effect = Exception("model not found")
+
+    assert summarize(client, llm_client, hedge_delay_ms=None) == API_SUMMARY
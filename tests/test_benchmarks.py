@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_commit_latency_benchmark_reports_every_phase(tmp_path):
+    env = dict(os.environ, PENIFY_NO_DAEMON="1", PENIFY_CACHE_DIR=str(tmp_path))
+    result = subprocess.run(
+        [sys.executable, os.path.join("benchmarks", "commit_latency.py"), "--sizes", "5,120", "--runs", "1",
+         "--llm-latency-ms", "0", "--jira-latency-ms", "0", "--backend", "openai", "--json"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(result.stdout)
+    assert list(report) == ["openai"]
+    assert list(report["openai"]) == ["5", "120"]
+    for phases in report["openai"].values():
+        assert set(phases) == {"startup", "git", "jira", "prompt", "model", "commit", "total"}
+        assert phases["total"]["p50_ms"] >= phases["model"]["p50_ms"] > 0
+        assert phases["commit"]["p50_ms"] > 0
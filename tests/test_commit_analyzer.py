@@ -0,0 +1,216 @@
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from penify_hook.commit_analyzer import CommitDocGenHook
+from penify_hook.jira_outbox import JiraOutbox
+
+
+@pytest.fixture
+def staged_repo(tmp_path, monkeypatch, make_repo):
+    monkeypatch.setenv("PENIFY_CACHE_DIR", str(tmp_path / "cache"))
+    repo_dir = tmp_path / "repo"
+    repo = make_repo(repo_dir)
+    (repo_dir / "app.py").write_text("print('hello')\n")
+    repo.index.add(["app.py"])
+    return repo_dir
+
+
+@pytest.fixture
+def llm_hook(staged_repo):
+    api_client = MagicMock()
+    api_client.get_supported_file_types.return_value = ["py"]
+    api_client.generate_commit_summary_with_llm.return_value = {"title": "feat: say hello", "description": "Adds app.py"}
+    llm_client = MagicMock()
+    llm_client.model = "ollama/llama3"
+    llm_client.route.side_effect = lambda diff: llm_client
+    return CommitDocGenHook(str(staged_repo), api_client, llm_client)
+
+
+def test_summary_is_cached_for_unchanged_index(llm_hook):
+    first = llm_hook.get_summary("msg", True)
+    second = CommitDocGenHook(llm_hook.repo_path, llm_hook.api_client, llm_hook.llm_client).get_summary("msg", True)
+
+    assert first == second == {"title": "feat: say hello", "description": "Adds app.py"}
+    llm_hook.api_client.generate_commit_summary_with_llm.assert_called_once()
+
+
+def test_cache_key_covers_instruction_model_and_index(llm_hook, staged_repo):
+    llm_hook.get_summary("msg", True)
+    llm_hook.get_summary("other instruction", True)
+    llm_hook.llm_client.model = "gpt-4o"
+    llm_hook.get_summary("msg", True)
+    (staged_repo / "app.py").write_text("print('bye')\n")
+    llm_hook.repo.index.add(["app.py"])
+    llm_hook.get_summary("msg", True)
+
+    assert llm_hook.api_client.generate_commit_summary_with_llm.call_count == 4
+
+
+def test_cached_summary_is_returned_before_reading_the_diff(llm_hook, monkeypatch):
+    llm_hook.get_summary("msg", True)
+    read_staged_diff = MagicMock()
+    monkeypatch.setattr("penify_hook.commit_analyzer.read_staged_diff", read_staged_diff)
+    llm_hook.llm_client.prepare_diff.reset_mock()
+
+    assert llm_hook.get_summary("msg", True)["title"] == "feat: say hello"
+    read_staged_diff.assert_not_called()
+    llm_hook.llm_client.prepare_diff.assert_not_called()
+
+
+def test_nothing_staged_is_reported(llm_hook):
+    llm_hook.repo.index.commit("add app.py")
+
+    with pytest.raises(ValueError, match="No changes to commit"):
+        llm_hook.get_summary("msg", True)
+
+
+def test_regenerate_bypasses_cache(llm_hook):
+    llm_hook.get_summary("msg", True)
+    llm_hook.api_client.generate_commit_summary_with_llm.return_value = {"title": "feat: new", "description": ""}
+
+    assert llm_hook.get_summary("msg", True, regenerate=True)["title"] == "feat: new"
+    # The regenerated summary replaces the cached one
+    assert llm_hook.get_summary("msg", True)["title"] == "feat: new"
+    assert llm_hook.api_client.generate_commit_summary_with_llm.call_count == 2
+
+
+@pytest.fixture
+def jira_client():
+    client = MagicMock()
+    client.is_connected.return_value = True
+    client.extract_issue_keys_from_branch.side_effect = lambda branch: ["ABC-1"] if "ABC-1" in branch else []
+    return client
+
+
+def test_jira_context_is_passed_to_the_model(llm_hook, jira_client):
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    jira_client.get_commit_context_from_issues.return_value = {"primary_issue": {"key": "ABC-1"}}
+    llm_hook.jira_client = jira_client
+
+    llm_hook.get_summary("msg", True)
+
+    jira_client.get_commit_context_from_issues.assert_called_once_with(["ABC-1"])
+    llm_hook.llm_client.prepare_diff.assert_called_once()
+    args = llm_hook.api_client.generate_commit_summary_with_llm.call_args.args
+    assert args[5] == {"primary_issue": {"key": "ABC-1"}}
+
+
+def test_cached_summary_does_not_wait_for_jira(llm_hook, jira_client):
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    jira_client.get_commit_context_from_issues.return_value = {"primary_issue": {"key": "ABC-1"}}
+    llm_hook.jira_client = jira_client
+
+    llm_hook.get_summary("msg", True)
+    llm_hook.get_summary("msg", True)
+
+    jira_client.get_commit_context_from_issues.assert_called_once()
+    llm_hook.api_client.generate_commit_summary_with_llm.assert_called_once()
+
+
+def test_slow_jira_does_not_hold_up_the_commit(llm_hook, jira_client):
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    jira_client.get_commit_context_from_issues.side_effect = lambda keys: time.sleep(2) or {"primary_issue": {}}
+    llm_hook.jira_client = jira_client
+    llm_hook.jira_deadline_ms = 100
+
+    start = time.monotonic()
+    llm_hook.get_summary("msg", True)
+
+    assert time.monotonic() - start < 1.5
+    assert llm_hook.api_client.generate_commit_summary_with_llm.call_args.args[5] is None
+
+
+def test_jira_comments_are_queued_after_the_commit(llm_hook, jira_client, monkeypatch):
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    jira_client.jira_url = "https://jira.example.com"
+    jira_client.extract_issue_keys.return_value = []
+    jira_client.get_commit_context_from_issues.return_value = None
+    llm_hook.jira_client = jira_client
+    spawned = MagicMock()
+    monkeypatch.setattr("penify_hook.commit_analyzer.spawn_flush_worker", spawned)
+
+    llm_hook.run("msg", False, True)
+
+    assert llm_hook.repo.head.commit.message.startswith("feat: say hello")
+    jira_client.add_comment.assert_not_called()
+    [op] = JiraOutbox().pending_ops()
+    assert (op["issue_key"], op["action"], op["repo_path"]) == ("ABC-1", "comment", llm_hook.repo_path)
+    spawned.assert_called_once()
+
+
+def test_repaired_title_is_shown_after_the_streamed_one(llm_hook, capsys, monkeypatch):
+    def generate(*args, on_stream=None, **kwargs):
+        on_stream("title", "Say hello")
+        on_stream("description", "Adds app.py")
+        # The model was asked to fix the title, which does not follow the format
+        return {"title": "feat: say hello", "description": "Adds app.py"}
+
+    llm_hook.api_client.generate_commit_summary_with_llm.side_effect = generate
+    monkeypatch.setattr(sys.stdout, "isatty", lambda: True)
+
+    llm_hook.get_summary("msg", True)
+
+    out = capsys.readouterr().out
+    assert "Title was replaced with:" in out and out.rstrip().endswith("feat: say hello")
+    assert "Description was replaced" not in out
+
+
+def test_settings_are_read_from_the_config_sections(staged_repo):
+    hook = CommitDocGenHook(str(staged_repo), MagicMock(), llm_config={"hedge_delay_ms": 500, "max_diff_mb": 2},
+                            jira_config={"deadline_ms": 100})
+
+    assert (hook.hedge_delay_ms, hook.max_diff_bytes, hook.jira_deadline_ms) == (500, 2 * 1024 * 1024, 100)
+
+
+def test_hanging_jira_connection_does_not_hold_up_the_commit(llm_hook, monkeypatch):
+    from penify_hook import jira_client
+    from penify_hook.jira_client import JiraClient
+
+    monkeypatch.setattr(jira_client, "JIRA_AVAILABLE", True)
+    monkeypatch.setattr(jira_client, "JIRA", lambda **kwargs: time.sleep(2), raising=False)
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    llm_hook.jira_client = JiraClient("https://jira.example.com", "user", "token")
+    llm_hook.jira_deadline_ms = 100
+
+    start = time.monotonic()
+    llm_hook.get_summary("msg", True)
+
+    assert time.monotonic() - start < 1.5
+    assert llm_hook.api_client.generate_commit_summary_with_llm.call_args.args[5] is None
+
+
+def test_cached_summary_makes_no_jira_requests(llm_hook, monkeypatch):
+    from penify_hook import jira_client
+    from penify_hook.jira_client import JiraClient
+
+    connect = MagicMock()
+    monkeypatch.setattr(jira_client, "JIRA_AVAILABLE", True)
+    monkeypatch.setattr(jira_client, "JIRA", connect, raising=False)
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    llm_hook.jira_client = JiraClient("https://jira.example.com", "user", "token")
+    llm_hook.get_summary("msg", True)
+    connect.reset_mock()
+
+    # The next commit attempt, e.g. after a failed pre-commit hook
+    hook = CommitDocGenHook(llm_hook.repo_path, llm_hook.api_client, llm_hook.llm_client,
+                            JiraClient("https://jira.example.com", "user", "token"))
+    hook.get_summary("msg", True)
+
+    connect.assert_not_called()
+
+
+def test_commit_warns_about_failed_jira_updates(llm_hook, jira_client, monkeypatch, capsys):
+    llm_hook.repo.git.checkout("-b", "feature/ABC-1-hello")
+    jira_client.jira_url = "https://jira.example.com"
+    jira_client.extract_issue_keys.return_value = []
+    jira_client.get_commit_context_from_issues.return_value = None
+    llm_hook.jira_client = jira_client
+    monkeypatch.setattr("penify_hook.commit_analyzer.spawn_flush_worker", MagicMock())
+    outbox = JiraOutbox()
+    outbox._write_json(f"{outbox.failed_dir}/1-given-up.json", {"action": "comment", "issue_key": "ABC-1"})
+
+    llm_hook.run("msg", False, True)
+
+    assert "1 earlier JIRA update(s) could not be posted" in capsys.readouterr().out
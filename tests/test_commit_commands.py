@@ -4,6 +4,8 @@ import pytest
 from unittest.mock import patch, MagicMock, call
 
 from penify_hook.commands.commit_commands import commit_code, setup_commit_parser, handle_commit
+from penify_hook.jira_cache import DEFAULT_TTL
+from penify_hook.jira_client import DEFAULT_MAX_COMMENTS
 
 class TestCommitCommands:
 
@@ -78,9 +80,7 @@ class TestCommitCommands:
             message="test commit",
             open_terminal=False,
             generate_description=True,
-            llm_model="gpt-4",
-            llm_api_base="http://llm-api.example.com",
-            llm_api_key="llm-api-key"
+            llm_config={"model": "gpt-4", "api_base": "http://llm-api.example.com", "api_key": "llm-api-key"}
         )
         
         # Verify calls
@@ -88,10 +88,20 @@ class TestCommitCommands:
         mock_llm_client.assert_called_once_with(
             model="gpt-4",
             api_base="http://llm-api.example.com",
-            api_key="llm-api-key"
+            api_key="llm-api-key",
+            diff_ignore=None,
+            keep_alive=None,
+            routes=None,
+            title_first=False,
+            title_model=None,
+            endpoints=None,
+            backend=None
         )
-        mock_doc_gen.assert_called_once_with('/mock/git/folder', api_instance, llm_instance, None)
-        doc_gen_instance.run.assert_called_once_with("test commit", False, True)
+        mock_doc_gen.assert_called_once_with(
+            '/mock/git/folder', api_instance, llm_instance, None,
+            llm_config={"model": "gpt-4", "api_base": "http://llm-api.example.com", "api_key": "llm-api-key"},
+            jira_config={})
+        doc_gen_instance.run.assert_called_once_with("test commit", False, True, regenerate=False)
 
     @patch('penify_hook.api_client.APIClient', create=True)
     @patch('penify_hook.llm_client.LLMClient', create=True)
@@ -127,21 +137,48 @@ class TestCommitCommands:
             message="test commit",
             open_terminal=False,
             generate_description=True,
-            llm_model="gpt-4",
-            llm_api_base="http://llm-api.example.com",
-            llm_api_key="llm-api-key",
-            jira_url="https://jira.example.com",
-            jira_user="jira-user",
-            jira_api_token="jira-token"
+            llm_config={"model": "gpt-4", "api_base": "http://llm-api.example.com", "api_key": "llm-api-key"},
+            jira_config={"url": "https://jira.example.com", "username": "jira-user", "api_token": "jira-token"}
         )
         
         # Verify calls
         mock_jira_client.assert_called_once_with(
             jira_url="https://jira.example.com",
             jira_user="jira-user",
-            jira_api_token="jira-token"
+            jira_api_token="jira-token",
+            cache_ttl=DEFAULT_TTL,
+            max_comments=DEFAULT_MAX_COMMENTS
+        )
+        mock_doc_gen.assert_called_once_with(
+            '/mock/git/folder', api_instance, llm_instance, jira_instance,
+            llm_config={"model": "gpt-4", "api_base": "http://llm-api.example.com", "api_key": "llm-api-key"},
+            jira_config={"url": "https://jira.example.com", "username": "jira-user", "api_token": "jira-token"})
+
+    @patch('penify_hook.api_client.APIClient', create=True)
+    @patch('penify_hook.jira_client.JiraClient', create=True)
+    @patch('penify_hook.commit_analyzer.CommitDocGenHook', create=True)
+    @patch('penify_hook.utils.recursive_search_git_folder', create=True)
+    def test_commit_code_passes_jira_cache_settings(self, mock_git_folder_search, mock_doc_gen,
+                                                    mock_jira_client, mock_api_client):
+        mock_git_folder_search.return_value = '/mock/git/folder'
+
+        commit_code(
+            api_url="http://api.example.com",
+            token="api-token",
+            message="test commit",
+            open_terminal=False,
+            generate_description=True,
+            jira_config={"url": "https://jira.example.com", "username": "jira-user", "api_token": "jira-token",
+                         "cache_ttl": 60, "max_comments": 5}
+        )
+
+        mock_jira_client.assert_called_once_with(
+            jira_url="https://jira.example.com",
+            jira_user="jira-user",
+            jira_api_token="jira-token",
+            cache_ttl=60,
+            max_comments=5
         )
-        mock_doc_gen.assert_called_once_with('/mock/git/folder', api_instance, llm_instance, jira_instance)
 
     @patch('penify_hook.api_client.APIClient', create=True)
     @patch('penify_hook.jira_client.JiraClient', create=True)
@@ -173,14 +210,13 @@ class TestCommitCommands:
             message="test commit",
             open_terminal=False,
             generate_description=True,
-            llm_model=None,
-            jira_url="https://jira.example.com",
-            jira_user="jira-user",
-            jira_api_token="jira-token"
+            jira_config={"url": "https://jira.example.com", "username": "jira-user", "api_token": "jira-token"}
         )
         
         # Verify JIRA warning
-        mock_doc_gen.assert_called_once_with('/mock/git/folder', api_instance, None, None)
+        mock_doc_gen.assert_called_once_with(
+            '/mock/git/folder', api_instance, None, None, llm_config={},
+            jira_config={"url": "https://jira.example.com", "username": "jira-user", "api_token": "jira-token"})
 
     @patch('penify_hook.api_client.APIClient', create=True)
     @patch('penify_hook.commit_analyzer.CommitDocGenHook', create=True)
@@ -210,19 +246,20 @@ class TestCommitCommands:
         setup_commit_parser(parser)
         
         # Verify parser configuration
-        assert parser.add_argument.call_count == 3
+        assert parser.add_argument.call_count == 4
         parser.add_argument.assert_any_call("-m", "--message", required=False, help="Commit with contextual commit message.", default="N/A")
         parser.add_argument.assert_any_call("-e", "--terminal", action="store_true", help="Open edit terminal before committing.")
         parser.add_argument.assert_any_call("-d", "--description", action="store_false", help="It will generate commit message with title and description.", default=False)
+        parser.add_argument.assert_any_call("--regenerate", action="store_true", help="Ignore the cached commit message for the staged changes and generate a new one.")
 
-    @patch('penify_hook.commands.commit_commands.get_token')
-    @patch('penify_hook.commands.commit_commands.get_jira_config')
-    @patch('penify_hook.commands.commit_commands.get_llm_config')
+    @patch('penify_hook.commands.config_commands.get_token')
+    @patch('penify_hook.commands.config_commands.get_jira_config')
+    @patch('penify_hook.commands.config_commands.get_llm_config')
     @patch('penify_hook.commands.commit_commands.commit_code')
     @patch('penify_hook.commands.commit_commands.print_info')
     @patch('penify_hook.constants.API_URL', "http://api.example.com")
-    def test_handle_commit(self, mock_print_info, mock_commit_code, mock_get_token, 
-                         mock_get_llm_config, mock_get_jira_config):
+    def test_handle_commit(self, mock_print_info, mock_commit_code, mock_get_llm_config,
+                         mock_get_jira_config, mock_get_token):
         # Setup mocks
         mock_get_llm_config.return_value = {
             'model': 'test-model',
@@ -249,6 +286,6 @@ class TestCommitCommands:
         mock_print_info.assert_called_with("Generate Commit Description: True")
         mock_commit_code.assert_called_once_with(
             "http://api.example.com", 'api-token', "test commit", True, True,
-            'test-model', 'http://llm-api.example.com', 'llm-key',
-            'https://jira.example.com', 'jira-user', 'jira-token'
+            llm_config=mock_get_llm_config.return_value, jira_config=mock_get_jira_config.return_value,
+            regenerate=args.regenerate
         )
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import socket
+import threading
+import pytest
+from unittest.mock import patch
+
+from penify_hook import daemon
+from penify_hook.daemon import PenifyDaemon, forward_command, is_forwardable, send_control
+
+
+def fake_run_command(args, parser):
+    if args.subcommands == "docgen":
+        sys.exit(1)
+    if args.message == "slow":
+        time.sleep(1.5)
+        return 0
+    if args.message == "git":
+        subprocess.run(["git", "commit", "-q", "-m", "forwarded"], check=True, timeout=10)
+        return 0
+    print(f"message={args.message} cwd={os.getcwd()}")
+    return 3
+
+
+def serve(socket_path):
+    # Output redirection is process-wide, so the daemon runs in its own process
+    with patch.object(PenifyDaemon, 'warm_up'), \
+         patch('penify_hook.main.run_command', side_effect=fake_run_command):
+        PenifyDaemon(socket_path).serve_forever()
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    socket_path = str(tmp_path / "penify.sock")
+    process = multiprocessing.get_context("fork").Process(target=serve, args=(socket_path,), daemon=True)
+    process.start()
+    for _ in range(100):
+        if send_control("ping", socket_path):
+            break
+        time.sleep(0.05)
+    yield socket_path
+    send_control("shutdown", socket_path)
+    process.join(timeout=5)
+
+
+def test_is_forwardable():
+    assert is_forwardable(["commit", "-m", "msg"])
+    assert is_forwardable(["docgen", "-l", "src"])
+    assert not is_forwardable(["commit", "-e"])
+    assert not is_forwardable(["docgen", "--watch", "src"])
+    assert not is_forwardable(["login"])
+    assert not is_forwardable([])
+
+
+def test_forward_command_without_daemon(tmp_path):
+    assert forward_command(["commit"], str(tmp_path / "missing.sock")) is None
+
+
+@patch.dict(os.environ, {"PENIFY_NO_DAEMON": "1"})
+def test_forward_command_disabled(running_daemon):
+    socket_path = running_daemon
+    assert forward_command(["commit"], socket_path) is None
+
+
+def test_forward_command_relays_output_and_exit_code(running_daemon, tmp_path, monkeypatch, capsys):
+    socket_path = running_daemon
+    monkeypatch.chdir(tmp_path)
+    exit_code = forward_command(["commit", "-m", "hello"], socket_path)
+
+    assert exit_code == 3
+    assert f"message=hello cwd={tmp_path}" in capsys.readouterr().out
+    assert send_control("ping", socket_path)["requests_served"] == 1
+
+
+def test_forward_command_reports_system_exit(running_daemon):
+    socket_path = running_daemon
+    assert forward_command(["docgen"], socket_path) == 1
+
+
+def test_send_control_ping(running_daemon):
+    socket_path = running_daemon
+    status = send_control("ping", socket_path)
+    assert status["pid"] != os.getpid()
+    assert status["socket"] == socket_path
+
+
+def test_hooks_of_forwarded_commit_do_not_forward_back(running_daemon, tmp_path, monkeypatch):
+    socket_path = running_daemon
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=repo, check=True)
+    subprocess.run(["git", "config", "user.name", "Test"], cwd=repo, check=True)
+    (repo / "app.py").write_text("print('hello')\n")
+    subprocess.run(["git", "add", "app.py"], cwd=repo, check=True)
+    # A penifycli post-commit hook: it would forward docgen to the daemon serving the commit
+    hook = repo / ".git" / "hooks" / "post-commit"
+    hook.write_text(
+        "#!/bin/sh\n"
+        f"PYTHONPATH={os.getcwd()} {sys.executable} -c \""
+        "import sys; from penify_hook.daemon import forward_command; "
+        f"sys.exit(0 if forward_command(['docgen'], '{socket_path}') is None else 9)\" "
+        f"|| touch {tmp_path / 'forwarded'}\n"
+    )
+    hook.chmod(0o755)
+    monkeypatch.chdir(repo)
+
+    assert forward_command(["commit", "-m", "git"], socket_path) == 0
+    assert not (tmp_path / "forwarded").exists()
+    assert send_control("ping", socket_path)["requests_served"] == 1
+
+
+def test_control_and_other_commands_are_not_held_up_by_a_running_command(running_daemon):
+    socket_path = running_daemon
+    slow = threading.Thread(target=forward_command, args=(["commit", "-m", "slow"], socket_path))
+    slow.start()
+    time.sleep(0.3)
+
+    start = time.monotonic()
+    assert send_control("ping", socket_path)["running_command"] is True
+    # A second command is declined and runs locally instead of queueing behind the first
+    assert forward_command(["commit", "-m", "hello"], socket_path) is None
+    assert time.monotonic() - start < 0.5
+
+    slow.join()
+    # The lock is released right after the exit code is sent
+    for _ in range(20):
+        if not send_control("ping", socket_path)["running_command"]:
+            break
+        time.sleep(0.05)
+    assert send_control("ping", socket_path)["running_command"] is False
+
+
+def test_unresponsive_daemon_is_reported(tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "stuck.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+    monkeypatch.setattr(daemon, "REPLY_TIMEOUT", 0.2)
+
+    try:
+        assert send_control("ping", socket_path) == {"responding": False}
+        assert forward_command(["commit", "-m", "hello"], socket_path) is None
+    finally:
+        server.close()
@@ -0,0 +1,68 @@
+from penify_hook.diff_packer import DiffPacker, estimate_tokens, parse_diff
+
+
+def make_file_diff(name, hunks, lines=10, blank=False):
+    diff = f"diff --git a/{name} b/{name}\nindex 1111111..2222222 100644\n--- a/{name}\n+++ b/{name}\n"
+    for h in range(hunks):
+        diff += f"@@ -{h * 100},0 +{h * 100},{lines} @@\n"
+        diff += "".join("+\n" if blank else f"+{name} hunk {h} line {i}\n" for i in range(lines))
+    return diff
+
+
+def test_parse_diff():
+    diff = make_file_diff("a.py", 2) + "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+    files = parse_diff(diff)
+
+    assert [f.path for f in files] == ["a.py", "logo.png"]
+    assert len(files[0].hunks) == 2
+    assert files[0].added == 20
+    assert files[1].binary
+
+
+def test_parse_diff_splits_long_hunks():
+    files = parse_diff(make_file_diff("new.py", 1, lines=150))
+    assert len(files[0].hunks) == 3
+    assert "".join(files[0].hunks).count("\n") == 151
+
+
+def test_noise_files_are_summarized():
+    diff = (make_file_diff("app.py", 1) + make_file_diff("poetry.lock", 5)
+            + make_file_diff("web/vendor/lib.js", 1) + make_file_diff("gen/api.generated.ts", 1))
+    result = DiffPacker(10000, noise_globs=["gen/*"]).pack(diff)
+
+    assert result["noise_files"] == ["poetry.lock", "web/vendor/lib.js", "gen/api.generated.ts"]
+    assert "app.py hunk 0" in result["diff"]
+    assert "poetry.lock (+50 -0)" in result["diff"]
+    assert "poetry.lock hunk" not in result["diff"]
+    assert not result["omitted_files"]
+
+
+def test_every_file_is_covered_before_filling():
+    diff = make_file_diff("big.py", 10) + make_file_diff("small.py", 1)
+    packer = DiffPacker(300)
+    result = packer.pack(diff)
+
+    assert result["tokens"] <= 300
+    assert not result["omitted_files"]
+    assert "small.py hunk 0" in result["diff"]
+    assert result["omitted_hunks"] > 0
+    assert "more hunk(s) of big.py omitted" in result["diff"]
+
+
+def test_informative_hunks_are_preferred():
+    # The first hunk only adds blank lines
+    file_diff = make_file_diff("a.py", 1, blank=True) + make_file_diff("a.py", 1).split("\n", 4)[4]
+    parsed = parse_diff(file_diff)[0]
+    header, (blank_hunk, code_hunk) = parsed.header, parsed.hunks
+    result = DiffPacker(estimate_tokens(header) + estimate_tokens(code_hunk)).pack(file_diff)
+
+    assert "a.py hunk 0 line 9" in result["diff"]
+    assert blank_hunk not in result["diff"]
+    assert result["omitted_hunks"] == 1
+
+
+def test_everything_fits():
+    diff = make_file_diff("a.py", 2) + make_file_diff("b.py", 1)
+    result = DiffPacker(10000).pack(diff)
+    assert result["diff"] == diff
+    assert result["omitted_hunks"] == 0
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from penify_hook.diff_packer import OMITTED_HEADER, DiffPacker
+from penify_hook.diff_plan import PlannedFile, parse_numstat, plan_diff, plan_staged_changes, read_staged_diff
+
+
+@pytest.fixture
+def repo(make_repo):
+    return make_repo(files={"old_name.py": "".join(f"line {i}\n" for i in range(20))})
+
+
+def write(repo, path, text):
+    full = os.path.join(repo.working_tree_dir, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb" if isinstance(text, bytes) else "w") as f:
+        f.write(text)
+    repo.index.add([path])
+
+
+def test_parse_numstat():
+    output = "3\t1\tapp.py\0-\t-\tlogo.png\0" "2\t0\t\0old.py\0new.py\0"
+    files = parse_numstat(output)
+
+    assert [(f.path, f.added, f.removed, f.old_path) for f in files] == [
+        ("app.py", 3, 1, None), ("logo.png", None, None, None), ("new.py", 2, 0, "old.py")]
+    assert files[1].binary and files[1].changed == 0
+
+
+def test_only_included_files_are_read(repo):
+    write(repo, "app.py", "print('hello')\n")
+    write(repo, "yarn.lock", "".join(f"dep-{i}@1.0.0\n" for i in range(5000)))
+    write(repo, "logo.png", b"\x89PNG\x00\x01\x02")
+    write(repo, "gen/schema.py", "x = 1\n")
+
+    diff = read_staged_diff(repo, ["gen/*"])
+
+    assert diff.startswith(OMITTED_HEADER)
+    assert "  yarn.lock (+5000 -0)" in diff
+    assert "  logo.png (binary)" in diff
+    assert "  gen/schema.py (+1 -0)" in diff
+    assert "+print('hello')" in diff
+    assert "dep-1@1.0.0" not in diff
+
+
+def test_renames_survive_path_selection(repo):
+    repo.git.mv("old_name.py", "new name [1].py")
+
+    diff = read_staged_diff(repo)
+
+    assert "rename from old_name.py" in diff
+    assert "rename to new name [1].py" in diff
+
+
+def test_large_files_are_noted_and_total_is_bounded():
+    files = [PlannedFile("huge.py", 30_000, 0), PlannedFile("a.py", 600, 0), PlannedFile("b.py", 300, 100),
+             PlannedFile("c.py", 10, 0)]
+
+    plan = plan_diff(files, max_file_lines=20_000, max_total_lines=500)
+
+    assert [f.path for f in plan.included] == ["b.py", "c.py"]
+    assert [f.path for f in plan.noted] == ["huge.py", "a.py"]
+
+
+def test_smallest_files_are_read_first():
+    files = [PlannedFile("big.py", 400, 0), PlannedFile("small.py", 50, 0), PlannedFile("mid.py", 100, 0)]
+
+    plan = plan_diff(files, max_total_lines=200)
+
+    assert [f.path for f in plan.included] == ["small.py", "mid.py"]
+    assert [f.path for f in plan.noted] == ["big.py"]
+
+
+def test_note_lists_a_bounded_number_of_files():
+    plan = plan_diff([PlannedFile(f"dist/{i}.js", 1, 0) for i in range(80)])
+    lines = plan.notes().splitlines()
+
+    assert len(lines) == 1 + 50 + 1
+    assert lines[-1] == "  ... and 30 more file(s)"
+
+
+def test_packer_merges_the_note_with_its_own(repo):
+    write(repo, "app.py", "print('hello')\n")
+    write(repo, "poetry.lock", "".join(f"pkg {i}\n" for i in range(10)))
+    diff = plan_staged_changes(repo).notes() + repo.git.diff("--cached", "--", "app.py") + "\n"
+    diff += "diff --git a/web/vendor/lib.js b/web/vendor/lib.js\n--- a/web/vendor/lib.js\n+++ b/web/vendor/lib.js\n@@ -0,0 +1 @@\n+x\n"
+
+    packed = DiffPacker(10000).pack(diff)["diff"]
+
+    assert packed.count(OMITTED_HEADER) == 1
+    assert "  poetry.lock (+10 -0)" in packed
+    assert "  web/vendor/lib.js (+1 -0)" in packed
+    assert packed.startswith("diff --git a/app.py")
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from penify_hook.diff_plan import read_staged_diff
+from penify_hook.diff_reader import MAX_LINE_BYTES, iter_diff_lines, iter_file_diffs
+from penify_hook.git_analyzer import GitDocGenHook
+
+
+def file_lines(name, added):
+    lines = [f"diff --git a/{name} b/{name}\n", "new file mode 100644\n", "--- /dev/null\n", f"+++ b/{name}\n",
+             f"@@ -0,0 +1,{added} @@\n"]
+    return lines + [f"+{name} line {i}\n" for i in range(added)]
+
+
+@pytest.fixture
+def repo(make_repo):
+    return make_repo()
+
+
+def stage(repo, path, text):
+    with open(os.path.join(repo.working_tree_dir, path), "w") as f:
+        f.write(text)
+    repo.index.add([path])
+
+
+def test_files_are_split_with_counts():
+    files = list(iter_file_diffs(file_lines("a.py", 3) + file_lines("b.py", 2)))
+
+    assert [(f.path, f.added, f.removed, f.truncated) for f in files] == [("a.py", 3, 0, False), ("b.py", 2, 0, False)]
+    assert files[0].text() == "".join(file_lines("a.py", 3))
+
+
+def test_file_text_beyond_the_ceiling_is_skipped_but_counted():
+    [big] = list(iter_file_diffs(file_lines("big.py", 1000), max_file_bytes=2000))
+
+    assert big.added == 1000
+    assert big.truncated
+    assert len(big.text()) < 2200
+    assert big.text().endswith("more line(s) of the diff of big.py not read\n")
+
+
+def test_total_ceiling_leaves_later_files_header_only():
+    lines = file_lines("a.py", 50) + file_lines("b.py", 50) + file_lines("c.py", 1)
+    files = list(iter_file_diffs(lines, max_bytes=1500))
+
+    assert files[0].hunks and not files[0].truncated
+    assert files[1].truncated
+    assert files[2].truncated and not files[2].hunks
+    assert files[2].added == 1
+
+
+def test_git_output_is_streamed_and_long_lines_are_cut(repo):
+    stage(repo, "min.js", "x" * (MAX_LINE_BYTES * 3) + "\nshort\n")
+
+    lines = list(iter_diff_lines(repo, "--cached"))
+
+    assert lines[-1] == "+short\n"
+    assert all(len(line) <= MAX_LINE_BYTES + 1 for line in lines)
+
+
+def test_stopping_early_stops_git(repo):
+    for i in range(20):
+        stage(repo, f"f{i}.py", "x = 1\n" * 100)
+
+    lines = iter_diff_lines(repo, "--cached")
+    assert next(lines).startswith("diff --git")
+    lines.close()
+
+
+def test_staged_diff_respects_the_memory_ceiling(repo):
+    stage(repo, "a.py", "".join(f"a = {i}\n" for i in range(100)))
+    stage(repo, "b.py", "".join(f"b = {i}\n" for i in range(100)))
+
+    diff = read_staged_diff(repo, max_bytes=1000)
+
+    assert "diff --git a/a.py b/a.py" in diff
+    assert "  b.py (+100 -0)" in diff
+    assert "diff --git a/b.py" not in diff
+
+
+def test_modified_lines_skip_file_headers():
+    hook = GitDocGenHook.__new__(GitDocGenHook)
+    lines = ["diff --git a/app.py b/app.py\n", "--- a/app.py\n", "+++ b/app.py\n", "@@ -1,3 +1,3 @@\n",
+             " keep\n", "-old\n", "+new\n", " keep\n"]
+
+    assert hook.get_modified_lines(iter(lines)) == [2]
+    assert hook.get_modified_lines("".join(lines)) == [2]
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import MagicMock
+
+from penify_hook.docgen_queue import DocGenQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return DocGenQueue(str(tmp_path / "spool"))
+
+
+def test_enqueue_and_pending_jobs(queue):
+    queue.enqueue("/repos/a", "a" * 40)
+    queue.enqueue("/repos/b", "b" * 40)
+
+    jobs = queue.pending_jobs()
+    assert [job["repo_path"] for job in jobs] == ["/repos/a", "/repos/b"]
+    assert jobs[0]["commit"] == "a" * 40
+
+
+def test_coalesce_groups_by_repo_and_drops_duplicates():
+    jobs = [
+        {"repo_path": "/repos/a", "commit": "c1"},
+        {"repo_path": "/repos/b", "commit": "c2"},
+        {"repo_path": "/repos/a", "commit": "c3"},
+        {"repo_path": "/repos/a", "commit": "c3"},
+    ]
+    batches = DocGenQueue.coalesce(jobs)
+    assert [job["commit"] for job in batches["/repos/a"]] == ["c1", "c3"]
+    assert [job["commit"] for job in batches["/repos/b"]] == ["c2"]
+
+
+def test_drain_processes_batches_and_records_results(queue):
+    queue.enqueue("/repos/a", "c1")
+    queue.enqueue("/repos/a", "c2")
+    queue.enqueue("/repos/b", "c3")
+    process_batch = MagicMock(return_value={"processed": 2, "updated": 1, "failed": 0})
+
+    assert queue.drain(process_batch, max_workers=2) == 2
+
+    process_batch.assert_any_call("/repos/a", ["c1", "c2"])
+    process_batch.assert_any_call("/repos/b", ["c3"])
+    assert queue.pending_jobs() == []
+    assert queue.running_jobs() == []
+    results = queue.recent_results()
+    assert len(results) == 2
+    assert all(result["status"] == "success" for result in results)
+
+
+def test_drain_records_failures(queue):
+    queue.enqueue("/repos/a", "c1")
+
+    queue.drain(MagicMock(side_effect=Exception("API Error: boom")))
+
+    result = queue.recent_results()[0]
+    assert result["status"] == "failed"
+    assert result["error"] == "API Error: boom"
+
+
+def test_drain_skips_when_another_worker_holds_lock(queue, tmp_path):
+    other = DocGenQueue(str(tmp_path / "spool"))
+    assert other.acquire_worker_lock()
+    try:
+        queue.enqueue("/repos/a", "c1")
+        process_batch = MagicMock()
+        assert queue.drain(process_batch) == -1
+        process_batch.assert_not_called()
+    finally:
+        other.release_worker_lock()
+
+
+def test_files_changed_after_the_commit_are_left_alone(tmp_path, monkeypatch, make_repo):
+    from penify_hook.docgen_queue import document_commits
+
+    monkeypatch.setenv("PENIFY_CACHE_DIR", str(tmp_path / "cache"))
+    repo_dir = tmp_path / "repo"
+    repo = make_repo(repo_dir, {"README.md": "docs\n"})
+    for name in ("edited.py", "staged.py", "clean.py"):
+        (repo_dir / name).write_text("def f():\n    return 1\n")
+    repo.index.add(["edited.py", "staged.py", "clean.py"])
+    commit = repo.index.commit("add files").hexsha
+    queue = DocGenQueue(str(tmp_path / "spool"))
+    queue.enqueue(str(repo_dir), commit)
+
+    # The user keeps working before the worker gets to the job
+    (repo_dir / "edited.py").write_text("def f():\n    return 2\n")
+    (repo_dir / "staged.py").write_text("def f():\n    return 3\n")
+    repo.index.add(["staged.py"])
+
+    api_client = MagicMock()
+    api_client.get_supported_file_types.return_value = ["py"]
+    api_client.send_file_for_docstring_generation.side_effect = \
+        lambda name, content, lines, details: '"""Documented."""\n' + content
+    queue.drain(lambda repo_path, commits: document_commits(api_client, repo_path, commits))
+
+    assert (repo_dir / "edited.py").read_text() == "def f():\n    return 2\n"
+    assert (repo_dir / "staged.py").read_text() == "def f():\n    return 3\n"
+    assert (repo_dir / "clean.py").read_text() == '"""Documented."""\ndef f():\n    return 1\n'
+    documented = [call.args[0] for call in api_client.send_file_for_docstring_generation.call_args_list]
+    assert documented == ["clean.py"]
+    assert set(repo.git.diff("--cached", "--name-only").split()) == {"staged.py", "clean.py"}
+    assert repo.git.show(":staged.py") == "def f():\n    return 3"
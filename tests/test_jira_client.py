@@ -0,0 +1,187 @@
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from penify_hook.jira_client import JiraClient
+
+
+def make_issue(key, updated="2024-01-01T10:00:00.000+0000", summary="Add login"):
+    fields = SimpleNamespace(
+        summary=summary,
+        description="As a user I want to log in",
+        status=SimpleNamespace(name="In Progress"),
+        issuetype=SimpleNamespace(name="Story"),
+        priority=SimpleNamespace(name="High"),
+        assignee=None,
+        reporter=SimpleNamespace(displayName="Alice"),
+        updated=updated,
+        customfield_10020=[SimpleNamespace(name="Sprint 7")],
+        customfield_10300="Users can log in with email",
+    )
+    return SimpleNamespace(key=key, fields=fields)
+
+
+@pytest.fixture
+def jira_server(tmp_path, monkeypatch):
+    monkeypatch.setenv("PENIFY_CACHE_DIR", str(tmp_path))
+    server = MagicMock()
+    server.issues = {"ABC-1": make_issue("ABC-1")}
+    server.issue.side_effect = lambda key, fields=None: server.issues[key]
+    server.comments.return_value = [SimpleNamespace(body="Use OAuth")]
+    server.fields.return_value = [
+        {"id": "summary", "name": "Summary", "schema": {"type": "string"}},
+        {"id": "customfield_10020", "name": "Sprint", "schema": {"custom": "com.pyxis.greenhopper.jira:gh-sprint"}},
+        {"id": "customfield_10300", "name": "Acceptance Criteria", "schema": {"type": "string"}},
+        {"id": "customfield_10400", "name": "Story Points", "schema": {"type": "number"}},
+    ]
+    with patch('penify_hook.jira_client.JIRA', return_value=server, create=True), \
+         patch('penify_hook.jira_client.JIRA_AVAILABLE', True):
+        yield server
+
+
+def make_client(**kwargs):
+    return JiraClient("https://jira.example.com", "user", "token", **kwargs)
+
+
+def test_repeated_context_fetches_make_no_requests(jira_server):
+    context = make_client().get_detailed_issue_context("ABC-1")
+    assert context["summary"] == "Add login"
+    assert context["comments"] == ["Use OAuth"]
+
+    # A new client, as on the next commit, reads the on-disk cache
+    jira_server.issue.reset_mock()
+    jira_server.comments.reset_mock()
+    assert make_client().get_detailed_issue_context("ABC-1") == context
+    assert make_client().get_issue_details("ABC-1")["status"] == "In Progress"
+    make_client().get_issue_details("ABC-1")
+    jira_server.issue.assert_called_once_with("ABC-1", fields="summary,status,description,assignee,reporter,issuetype,priority,updated")
+    jira_server.comments.assert_not_called()
+
+
+def test_expired_entry_is_revalidated_by_updated_timestamp(jira_server):
+    make_client(cache_ttl=0.05).get_detailed_issue_context("ABC-1")
+    time.sleep(0.1)
+    jira_server.issue.reset_mock()
+
+    make_client(cache_ttl=0.05).get_detailed_issue_context("ABC-1")
+
+    # Unchanged issue: only the updated field was fetched
+    jira_server.issue.assert_called_once_with("ABC-1", fields='updated')
+    jira_server.comments.assert_called_once()  # from the first fetch only
+
+
+def test_changed_issue_is_refetched(jira_server):
+    make_client(cache_ttl=0.05).get_detailed_issue_context("ABC-1")
+    time.sleep(0.1)
+    jira_server.issues["ABC-1"] = make_issue("ABC-1", updated="2024-01-02T09:00:00.000+0000", summary="Add SSO login")
+
+    context = make_client(cache_ttl=0.05).get_detailed_issue_context("ABC-1")
+
+    assert context["summary"] == "Add SSO login"
+
+
+def test_cache_disabled(jira_server):
+    make_client(cache_ttl=0).get_issue_details("ABC-1")
+    make_client(cache_ttl=0).get_issue_details("ABC-1")
+    assert jira_server.issue.call_count == 2
+
+
+def test_context_requests_only_needed_fields(jira_server):
+    context = make_client(cache_ttl=0).get_detailed_issue_context("ABC-1")
+
+    jira_server.issue.assert_called_once_with(
+        "ABC-1", fields="summary,description,issuetype,status,priority,updated,customfield_10300,customfield_10020")
+    jira_server.comments.assert_called_once_with("ABC-1", max_results=3, order_by='-created')
+    assert context["acceptance_criteria"] == "Users can log in with email"
+    assert context["sprint"] == "Sprint 7"
+
+
+def test_latest_comments_in_chronological_order(jira_server):
+    jira_server.comments.return_value = [SimpleNamespace(body="newest"), SimpleNamespace(body="older")]
+    context = make_client(cache_ttl=0, max_comments=2).get_detailed_issue_context("ABC-1")
+    assert context["comments"] == ["older", "newest"]
+
+
+def test_fields_are_discovered_once_per_server(jira_server):
+    make_client().get_detailed_issue_context("ABC-1")
+    jira_server.issues["ABC-2"] = make_issue("ABC-2")
+    make_client().get_detailed_issue_context("ABC-2")
+
+    jira_server.fields.assert_called_once()
+
+
+def test_related_issues_use_one_bulk_search(jira_server):
+    jira_server.issues.update({key: make_issue(key) for key in ("ABC-2", "ABC-3")})
+    jira_server.search_issues.side_effect = lambda jql, fields, maxResults: [
+        jira_server.issues["ABC-2"], jira_server.issues["ABC-3"]]
+    client = make_client()
+
+    context = client.get_commit_context_from_issues(["ABC-1", "ABC-2", "ABC-3"])
+    client.format_commit_message_with_jira_info("feat: login", "", ["ABC-1", "ABC-2", "ABC-3"])
+
+    assert [issue["key"] for issue in context["related_issues"]] == ["ABC-2", "ABC-3"]
+    jira_server.search_issues.assert_called_once()
+    assert jira_server.search_issues.call_args.args[0] == "key in (ABC-2, ABC-3)"
+    # ABC-1 was fetched once for its context and once for its details, ABC-2/3 only by the search
+    assert [call.args[0] for call in jira_server.issue.call_args_list] == ["ABC-1", "ABC-1"]
+
+
+def test_bulk_search_falls_back_to_single_fetches(jira_server):
+    jira_server.issues["ABC-2"] = make_issue("ABC-2")
+    jira_server.search_issues.side_effect = Exception("An issue with key 'UTF-8' does not exist")
+
+    details = make_client(cache_ttl=0).get_issues_details(["ABC-2", "UTF-8"])
+
+    assert list(details) == ["ABC-2"]
+
+
+def test_issues_are_fetched_once_per_run(jira_server):
+    client = make_client(cache_ttl=0)
+    client.get_issue_details("ABC-1")
+    client.get_issues_details(["ABC-1"])
+    assert jira_server.issue.call_count == 1
+
+    client.reset_run_cache()
+    client.get_issue_details("ABC-1")
+    assert jira_server.issue.call_count == 2
+
+
+def test_connection_is_opened_on_first_request(jira_server):
+    from penify_hook import jira_client
+
+    client = make_client()
+    assert client.is_connected()
+    jira_client.JIRA.assert_not_called()
+
+    client.get_issue_details("ABC-1")
+    jira_client.JIRA.assert_called_once_with(server="https://jira.example.com", basic_auth=("user", "token"),
+                                             get_server_info=False, timeout=jira_client.REQUEST_TIMEOUT)
+
+
+def test_failed_connection_is_reported(jira_server):
+    from penify_hook import jira_client
+
+    jira_client.JIRA.side_effect = Exception("Invalid URL")
+    client = make_client()
+
+    assert client.get_issue_details("ABC-1") is None
+    assert not client.is_connected()
+
+
+def test_verify_connection_asks_jira(jira_server):
+    assert make_client().verify_connection()
+    jira_server.myself.assert_called_once()
+
+    jira_server.myself.side_effect = Exception("401 Unauthorized")
+    assert not make_client().verify_connection()
+
+
+def test_cached_issues_do_not_open_a_connection(jira_server):
+    from penify_hook import jira_client
+
+    make_client().get_commit_context_from_issues(["ABC-1"])
+    jira_client.JIRA.reset_mock()
+
+    assert make_client().get_commit_context_from_issues(["ABC-1"])["primary_issue"]["summary"] == "Add login"
+    jira_client.JIRA.assert_not_called()
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from penify_hook.jira_outbox import JiraOutbox, MAX_ATTEMPTS, backoff_delay
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return JiraOutbox(str(tmp_path / "outbox"))
+
+
+def test_updates_are_posted_and_removed(outbox):
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "Commit related to this issue")
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "Follow-up commit")
+    client = MagicMock()
+    client.add_comment.return_value = True
+
+    counts = outbox.flush(lambda op: client)
+
+    assert counts == {"sent": 2, "retried": 0, "failed": 0}
+    assert [c.args for c in client.add_comment.call_args_list] == [
+        ("ABC-1", "Commit related to this issue"), ("ABC-1", "Follow-up commit")]
+    assert outbox.pending_ops() == []
+
+
+def test_failed_update_is_retried_with_backoff(outbox):
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "first")
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "second")
+    client = MagicMock()
+    client.add_comment.return_value = False
+
+    assert outbox.flush(lambda op: client)["retried"] == 1
+    # The second comment waits behind the first so they stay in order
+    client.add_comment.assert_called_once_with("ABC-1", "first")
+    first, second = outbox.pending_ops()
+    assert first["attempts"] == 1 and first["next_attempt_at"] > time.time()
+    assert second["attempts"] == 0
+
+    # Not due yet: nothing is posted
+    client.add_comment.reset_mock()
+    outbox.flush(lambda op: client)
+    client.add_comment.assert_not_called()
+    assert backoff_delay(2) == 2 * backoff_delay(1)
+
+
+def test_update_moves_to_failed_after_max_attempts(outbox):
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "comment")
+    client = MagicMock()
+    client.add_comment.side_effect = Exception("503 Service Unavailable")
+
+    for _ in range(MAX_ATTEMPTS):
+        for op in outbox.pending_ops():
+            op["next_attempt_at"] = 0
+            outbox._write_json(f"{outbox.pending_dir}/{op.pop('_file')}", op)
+        outbox.flush(lambda op: client)
+
+    assert outbox.pending_ops() == []
+    [failed] = outbox.failed_ops()
+    assert failed["attempts"] == MAX_ATTEMPTS
+    assert failed["last_error"] == "503 Service Unavailable"
+
+
+def test_failed_updates_can_be_retried(outbox):
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "comment")
+    [op] = outbox.pending_ops()
+    op.update(attempts=MAX_ATTEMPTS, last_error="503 Service Unavailable")
+    outbox._write_json(f"{outbox.failed_dir}/{op['_file']}", op)
+    os.remove(f"{outbox.pending_dir}/{op.pop('_file')}")
+
+    assert outbox.retry_failed() == 1
+
+    assert outbox.failed_ops() == []
+    [op] = outbox.pending_ops()
+    assert (op["attempts"], op["next_attempt_at"]) == (0, 0)
+
+
+def test_issues_are_posted_in_parallel(outbox):
+    for key in ("ABC-1", "ABC-2", "ABC-3"):
+        outbox.enqueue_comment("/repo", "https://jira.example.com", key, "comment")
+    in_flight = []
+    overlap = threading.Event()
+    client = MagicMock()
+
+    def add_comment(issue_key, comment):
+        in_flight.append(issue_key)
+        if len(in_flight) > 1:
+            overlap.set()
+        overlap.wait(1)
+        return True
+
+    client.add_comment.side_effect = add_comment
+
+    assert outbox.flush(lambda op: client, max_workers=3)["sent"] == 3
+    assert overlap.is_set()
+
+
+def test_unconfigured_jira_keeps_updates_queued(outbox):
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "comment")
+
+    assert outbox.flush(lambda op: None)["retried"] == 1
+    assert outbox.pending_ops()[0]["last_error"] == "JIRA is not configured or not reachable"
+
+
+def test_jira_status_lists_failed_updates(outbox, monkeypatch, capsys):
+    from penify_hook.commands import jira_commands
+    from penify_hook import jira_outbox
+
+    outbox.enqueue_comment("/repo", "https://jira.example.com", "ABC-1", "comment")
+    [op] = outbox.pending_ops()
+    op.update(attempts=MAX_ATTEMPTS, last_error="401 Unauthorized")
+    outbox._write_json(f"{outbox.failed_dir}/{op['_file']}", op)
+    os.remove(f"{outbox.pending_dir}/{op.pop('_file')}")
+    monkeypatch.setattr(jira_outbox, "JiraOutbox", lambda: outbox)
+
+    jira_commands.jira_outbox_status()
+
+    out = capsys.readouterr().out
+    assert "Pending: 0  Failed: 1" in out
+    assert "[failed] comment on ABC-1" in out and "401 Unauthorized" in out
@@ -0,0 +1,432 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+
+from penify_hook import llm_client
+from penify_hook.llm_client import (LLMClient, MODEL_INFO_CACHE_FILE, SummaryStreamParser, extract_json_object,
+                                     split_diff, validate_summary)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PENIFY_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_import_does_not_load_litellm():
+    code = "import sys, penify_hook.llm_client; print('litellm' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False", result.stderr
+
+
+def test_get_model_info_is_cached_on_disk(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {
+        "max_input_tokens": 8192, "max_output_tokens": 4096, "litellm_provider": "ollama", "input_cost_per_token": 0.0,
+    }
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        info = LLMClient(model="ollama/llama3").get_model_info()
+        assert info == {"max_input_tokens": 8192, "max_output_tokens": 4096, "litellm_provider": "ollama"}
+
+        # A new client (e.g. the next CLI run) reads the cache instead of asking litellm
+        assert LLMClient(model="ollama/llama3").get_model_info() == info
+        fake_litellm.get_model_info.assert_called_once_with("ollama/llama3")
+
+    with open(cache_dir / MODEL_INFO_CACHE_FILE) as f:
+        assert json.load(f)["ollama/llama3"] == info
+
+
+def test_get_model_info_unknown_model(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.side_effect = Exception("This model isn't mapped yet")
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        assert LLMClient(model="ollama/custom").get_model_info() == {}
+        assert LLMClient(model="ollama/custom").get_model_info() == {}
+        fake_litellm.get_model_info.assert_called_once()
+
+        # Once the entry has expired the model is looked up again
+        fake_litellm.get_model_info.side_effect = None
+        fake_litellm.get_model_info.return_value = {"max_input_tokens": 8192}
+        with patch.object(llm_client.time, 'time', return_value=time.time() + llm_client.UNKNOWN_MODEL_TTL + 1):
+            assert LLMClient(model="ollama/custom").get_model_info() == {"max_input_tokens": 8192}
+
+
+def test_empty_model_info_entries_are_looked_up_again(cache_dir):
+    with open(cache_dir / MODEL_INFO_CACHE_FILE, "w") as f:
+        json.dump({"ollama/custom": {}}, f)
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"max_input_tokens": 8192}
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        assert LLMClient(model="ollama/custom").get_model_info() == {"max_input_tokens": 8192}
+
+
+def test_preparing_a_diff_does_not_load_litellm(tmp_path):
+    code = ("import json, os, sys; from penify_hook.llm_client import LLMClient, MODEL_INFO_CACHE_FILE; "
+            "open(os.path.join(os.environ['PENIFY_CACHE_DIR'], MODEL_INFO_CACHE_FILE), 'w')"
+            ".write(json.dumps({'ollama/llama3': {'max_input_tokens': 8192}})); "
+            "LLMClient(model='ollama/llama3').prepare_diff('+x = 1'); "
+            "print('litellm' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60,
+                            env=dict(os.environ, PENIFY_CACHE_DIR=str(tmp_path)),
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False", result.stderr
+
+
+def test_generate_commit_summary_uses_model_output_limit(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"max_output_tokens": 256}
+    fake_litellm.completion.return_value.choices[0].message.content = '{"title": "feat: add x", "description": "Adds x"}'
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = LLMClient(model="ollama/tiny").generate_commit_summary("diff", "msg", True, {})
+
+    assert result == {"title": "feat: add x", "description": "Adds x"}
+    assert fake_litellm.completion.call_args.kwargs["max_tokens"] == 256
+
+
+
+def test_generation_error_is_raised_not_exited(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    fake_litellm.completion.side_effect = ConnectionError("connection refused")
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        with pytest.raises(Exception, match="connection refused"):
+            LLMClient(model="ollama/tiny").generate_commit_summary("diff", "msg", True, {})
+
+
+def test_keep_alive_is_sent_to_ollama_backends(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        LLMClient(model="ollama/llama3", keep_alive="30m").warm_up()
+        LLMClient(model="gpt-4o", keep_alive="30m").warm_up()
+        LLMClient(model="ollama/llama3", keep_alive="30m")._complete("prompt", max_tokens=10)
+
+    ollama_warm, openai_warm, ollama_complete = fake_litellm.completion.call_args_list
+    assert ollama_warm.kwargs["keep_alive"] == "30m" and ollama_warm.kwargs["max_tokens"] == 1
+    assert "keep_alive" not in openai_warm.kwargs
+    assert ollama_complete.kwargs["keep_alive"] == "30m"
+
+
+def test_start_warm_up_swallows_errors(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.completion.side_effect = ConnectionError("connection refused")
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        thread = LLMClient(model="ollama/llama3").start_warm_up()
+        thread.join(5)
+
+    assert not thread.is_alive()
+    fake_litellm.completion.assert_called_once()
+
+
+def test_route_by_diff_size(cache_dir):
+    client = LLMClient(model="gpt-4o", api_base="https://api.example.com", routes=[
+        {"name": "small", "max_lines": 5, "model": "ollama/qwen2.5:1.5b", "api_base": "http://localhost:11434"},
+        {"name": "large", "min_tokens": 2000, "model": "gemini/gemini-1.5-flash"},
+    ])
+
+    small = client.route(make_file_diff("a.py", 3))
+    assert (small.model, small.api_base, small.route_name) == ("ollama/qwen2.5:1.5b", "http://localhost:11434", "small")
+    assert client.route(make_file_diff("b.py", 2)) is small
+
+    large = client.route(make_file_diff("c.py", 1000))
+    assert (large.model, large.api_base, large.route_name) == ("gemini/gemini-1.5-flash", "https://api.example.com", "large")
+
+    assert client.route(make_file_diff("d.py", 50)) is client
+    assert client.route_name == "default"
+    assert LLMClient(model="gpt-4o").route("diff").route_name is None
+
+
+def test_routed_summary_is_logged_with_latency(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    fake_litellm.completion.return_value.choices[0].message.content = '{"title": "feat: add x", "description": ""}'
+    client = LLMClient(model="gpt-4o", routes=[{"name": "small", "max_lines": 5, "model": "ollama/tiny"}])
+    diff = make_file_diff("a.py", 3)
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        client.route(diff).generate_commit_summary(diff, "msg", True, {})
+
+    assert fake_litellm.completion.call_args.kwargs["model"] == "ollama/tiny"
+    with open(cache_dir / llm_client.ROUTE_LOG_FILE) as f:
+        [record] = [json.loads(line) for line in f]
+    assert record["route"] == "small" and record["model"] == "ollama/tiny"
+    assert record["lines"] == 3 and record["success"] is True
+    assert record["latency_ms"] >= 0
+
+
+def test_title_first_streams_title_before_description(cache_dir):
+    def completion(model, messages, max_tokens, stream=False, **kwargs):
+        prompt = messages[0]["content"]
+        if "description text only" in prompt:
+            # The description starts first but must be shown after the title
+            pieces = ["Adds the x ", "endpoint."]
+        else:
+            pieces = ['{"title": "feat: ', 'add x"}']
+        chunks = [MagicMock(choices=[MagicMock(delta=MagicMock(content=piece))]) for piece in pieces]
+        return iter(chunks)
+
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    fake_litellm.completion.side_effect = completion
+    streamed = []
+    client = LLMClient(model="gpt-4o", title_first=True, title_model="gpt-4o-mini")
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = client.generate_commit_summary("diff", "msg", True, {},
+                                                on_stream=lambda field, text: streamed.append((field, text)))
+
+    assert result == {"title": "feat: add x", "description": "Adds the x endpoint."}
+    fields = [field for field, _ in streamed]
+    assert fields == sorted(fields, key=lambda field: field != "title")
+    assert "".join(text for field, text in streamed if field == "title") == "feat: add x"
+    assert "".join(text for field, text in streamed if field == "description") == "Adds the x endpoint."
+    models = {call.kwargs["model"]: call.kwargs["max_tokens"] for call in fake_litellm.completion.call_args_list}
+    assert models == {"gpt-4o-mini": 100, "gpt-4o": 800}
+
+
+def test_title_only_response_is_accepted(cache_dir):
+    assert LLMClient(model="gpt-4o")._parse_summary('{"title": "fix: x"}') == {"title": "fix: x", "description": ""}
+
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"description": "Adds x\\nand y"}', {"title": "Adds x", "description": "and y"}),
+    ('["x"]', {"title": '["x"]', "description": ""}),
+    ('```json\n{"title": "fix: x",\n```', {"title": '{"title": "fix: x",', "description": ""}),
+    ('\n\nAdd x\n\nAdds the x endpoint.\n', {"title": "Add x", "description": "Adds the x endpoint."}),
+    ('', {"title": "Generated commit", "description": ""}),
+])
+def test_unusable_response_falls_back_to_lines(cache_dir, content, expected):
+    assert LLMClient(model="gpt-4o")._parse_summary(content) == expected
+
+
+def test_endpoint_configuration_is_per_client(cache_dir, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_BASE", raising=False)
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    local = LLMClient(model="openai/qwen", api_base="http://gpu1:8000/v1", api_key="local-key")
+    hosted = LLMClient(model="gpt-4o", api_key="sk-hosted")
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        local._complete("prompt", max_tokens=10)
+        hosted._complete("prompt", max_tokens=10)
+
+    assert "OPENAI_API_BASE" not in os.environ
+    local_call, hosted_call = fake_litellm.completion.call_args_list
+    assert (local_call.kwargs["api_base"], local_call.kwargs["api_key"]) == ("http://gpu1:8000/v1", "local-key")
+    assert "api_base" not in hosted_call.kwargs and hosted_call.kwargs["api_key"] == "sk-hosted"
+
+
+def test_requests_round_robin_over_endpoints(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    client = LLMClient(model="openai/qwen", endpoints=[
+        {"api_base": "http://gpu1:8000/v1"}, {"api_base": "http://gpu2:8000/v1", "api_key": "key2"}])
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        for _ in range(4):
+            client._complete("prompt", max_tokens=10)
+        client.warm_up()
+
+    bases = [call.kwargs["api_base"] for call in fake_litellm.completion.call_args_list]
+    assert bases == ["http://gpu1:8000/v1", "http://gpu2:8000/v1"] * 3
+    assert fake_litellm.completion.call_args_list[1].kwargs["api_key"] == "key2"
+    # Routes without an endpoint of their own share the pool
+    routed = LLMClient(model="openai/qwen", endpoints=client.pool.endpoints,
+                       routes=[{"max_lines": 100, "model": "openai/tiny"}]).route("+x\n")
+    assert len(routed.pool) == 2
+
+
+def fake_responses(*contents):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"supports_response_schema": True}
+    responses = []
+    for content in contents:
+        response = MagicMock()
+        response.choices[0].message.content = content
+        responses.append(response)
+    fake_litellm.completion.side_effect = responses
+    return fake_litellm
+
+
+def test_summary_request_uses_json_schema(cache_dir):
+    fake_litellm = fake_responses('{"title": "feat(api): add x", "description": "Adds x"}')
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        LLMClient(model="gpt-4o").generate_commit_summary("diff", "msg", True, {})
+
+    response_format = fake_litellm.completion.call_args.kwargs["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["schema"]["required"] == ["title", "description"]
+
+
+def test_invalid_title_is_repaired_without_regenerating_description(cache_dir):
+    fake_litellm = fake_responses(
+        '{"title": "Added the x endpoint", "description": "Adds x"}',
+        '{"title": "feat(api): add x endpoint"}',
+    )
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = LLMClient(model="gpt-4o").generate_commit_summary("diff", "msg", True, {})
+
+    assert result == {"title": "feat(api): add x endpoint", "description": "Adds x"}
+    repair = fake_litellm.completion.call_args.kwargs
+    assert repair["response_format"]["json_schema"]["schema"]["required"] == ["title"]
+    # The follow-up continues the conversation instead of resending a fresh request
+    assert [message["role"] for message in repair["messages"]] == ["user", "assistant", "user"]
+    assert "not in the format" in repair["messages"][-1]["content"]
+
+
+def test_repairs_are_bounded(cache_dir):
+    fake_litellm = fake_responses(*['{"title": "Added x", "description": "Adds x"}'] * 5)
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = LLMClient(model="gpt-4o").generate_commit_summary("diff", "msg", True, {})
+
+    assert fake_litellm.completion.call_count == 1 + llm_client.MAX_REPAIR_ATTEMPTS
+    assert result == {"title": "Added x", "description": "Adds x"}
+
+
+def test_repairs_without_a_title_do_not_raise(cache_dir):
+    fake_litellm = fake_responses('{"description": "Adds x"}', *['```json\n{"title": '] * 5)
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = LLMClient(model="gpt-4o").generate_commit_summary("diff", "msg", True, {})
+
+    assert result == {"title": "Adds x", "description": ""}
+
+
+def test_validate_summary():
+    fields = ["title", "description"]
+    assert validate_summary({"title": "fix(parser)!: handle empty input", "description": "x"}, fields) == {}
+    assert validate_summary({"title": "chore: bump deps"}, ["title"]) == {}
+    assert set(validate_summary({"title": "Update stuff", "description": ""}, fields)) == {"title", "description"}
+    assert "longer than" in validate_summary({"title": "feat: " + "x" * 80}, ["title"])["title"]
+    assert extract_json_object('Sure!\n```json\n{"title": "feat: x"}\n```') == {"title": "feat: x"}
+
+def make_file_diff(name, lines):
+    body = "".join(f"+line {i} of {name}\n" for i in range(lines))
+    return (f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n"
+            f"@@ -0,0 +1,{lines} @@\n{body}")
+
+
+def test_split_diff_keeps_files_whole():
+    diff = make_file_diff("a.py", 5) + make_file_diff("b.py", 5) + make_file_diff("c.py", 200)
+    chunks = split_diff(diff, 1000)
+
+    assert chunks[0] == make_file_diff("a.py", 5) + make_file_diff("b.py", 5)
+    # The large file is split, and each piece repeats its header
+    assert len(chunks) > 2
+    assert all(chunk.startswith("diff --git a/c.py") for chunk in chunks[1:])
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert "line 199 of c.py" in chunks[-1]
+
+
+def test_large_diff_is_summarized_map_reduce(cache_dir):
+    diff = "".join(make_file_diff(f"file{i}.py", 100) for i in range(20))
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+
+    def completion(model, messages, temperature, max_tokens, **kwargs):
+        prompt = messages[0]["content"]
+        response = MagicMock()
+        if "Summarize part" in prompt:
+            files = sorted(set(re.findall(r"diff --git a/(\S+)", prompt)))
+            response.choices[0].message.content = f"- changed {', '.join(files)}"
+        else:
+            response.choices[0].message.content = json.dumps({"title": "feat: add files", "description": prompt})
+        return response
+
+    fake_litellm.completion.side_effect = completion
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        client = LLMClient(model="ollama/llama3", max_concurrency=2)
+        result = client.generate_commit_summary(diff, "msg", True, {})
+
+    chunk_count = len(split_diff(diff, LLMClient.CHUNK_CHARS))
+    assert fake_litellm.completion.call_count == chunk_count + 1
+    # The final prompt covers every file, not only those that fit in the budget
+    for i in range(20):
+        assert f"file{i}.py" in result["description"]
+    assert result["title"] == "feat: add files"
+
+
+def test_diff_is_packed_into_model_context(cache_dir):
+    diff = make_file_diff("package-lock.json", 2000) + make_file_diff("app.py", 20)
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"max_input_tokens": 4000}
+    fake_litellm.completion.return_value.choices[0].message.content = '{"title": "feat: x", "description": "y"}'
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        LLMClient(model="ollama/llama3").generate_commit_summary(diff, "msg", True, {})
+
+    # Single request; the lockfile is reduced to a note
+    fake_litellm.completion.assert_called_once()
+    prompt = fake_litellm.completion.call_args.kwargs["messages"][0]["content"]
+    assert "line 19 of app.py" in prompt
+    assert "package-lock.json (+2000 -0)" in prompt
+    assert "line 0 of package-lock.json" not in prompt
+
+
+def test_diff_budget_leaves_room_for_estimated_counts(cache_dir):
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"max_input_tokens": 32000}
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        assert LLMClient(model="ollama/llama3").get_diff_token_budget() == int((32000 - 1500) * 0.8)
+
+
+def test_packing_does_not_depend_on_litellm_being_loaded(cache_dir, monkeypatch):
+    diff = "".join(make_file_diff(f"file{i}.py", 100) for i in range(20))
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {"max_input_tokens": 8000}
+    fake_litellm.token_counter.side_effect = lambda model, text: len(text)
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        before = LLMClient(model="ollama/llama3").prepare_diff(diff)
+        # As if the background import of litellm had finished in the meantime
+        monkeypatch.setattr(llm_client, "_litellm", fake_litellm)
+        after = LLMClient(model="ollama/llama3").prepare_diff(diff)
+
+    assert before == after
+    fake_litellm.token_counter.assert_not_called()
+
+
+def collect_fields(events):
+    fields = {}
+    for field, text in events:
+        fields[field] = fields.get(field, "") + text
+    return fields
+
+
+def test_stream_parser_decodes_fields_incrementally():
+    response = '```json\n{"title": "feat: add \\"x\\" \\u00e9", "description": "Line 1\\nLine 2"}\n```'
+    events = []
+    parser = SummaryStreamParser(lambda field, text: events.append((field, text)))
+    for char in response:
+        parser.feed(char)
+
+    assert collect_fields(events) == {"title": 'feat: add "x" \u00e9', "description": "Line 1\nLine 2"}
+    # The title is reported character by character, before the description starts
+    assert events[0] == ("title", "f")
+    assert [field for field, _ in events].index("description") > 10
+
+
+def test_stream_parser_ignores_non_json():
+    events = []
+    SummaryStreamParser(lambda field, text: events.append((field, text))).feed("feat: plain text answer")
+    assert events == []
+
+
+def test_generate_commit_summary_streams(cache_dir):
+    response = '{"title": "feat: stream", "description": "Streams output"}'
+    chunks = []
+    for start in range(0, len(response), 5):
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = response[start:start + 5]
+        chunks.append(chunk)
+
+    fake_litellm = MagicMock()
+    fake_litellm.get_model_info.return_value = {}
+    fake_litellm.completion.return_value = iter(chunks)
+    events = []
+    with patch.object(llm_client, 'get_litellm', return_value=fake_litellm):
+        result = LLMClient(model="ollama/llama3").generate_commit_summary(
+            "diff", "msg", True, {}, on_stream=lambda field, text: events.append((field, text)))
+
+    assert fake_litellm.completion.call_args.kwargs["stream"] is True
+    assert result == {"title": "feat: stream", "description": "Streams output"}
+    assert collect_fields(events) == result
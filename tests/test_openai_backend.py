@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from penify_hook.llm_client import LLMClient
+from penify_hook.openai_backend import endpoint_url, server_model_name
+
+SUMMARY = '{"title": "feat: add x", "description": "Adds x"}'
+
+
+class FakeServer(BaseHTTPRequestHandler):
+    requests = []
+    reject_response_format = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._send_json({"data": [{"id": "qwen", "max_model_len": 32768}]})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeServer.requests.append((self.path, dict(self.headers), body))
+        if FakeServer.reject_response_format and "response_format" in body:
+            self.send_response(400)
+            self.end_headers()
+            self.wfile.write(b'{"error": "response_format is not supported"}')
+            return
+        if not body["stream"]:
+            self._send_json({"choices": [{"message": {"role": "assistant", "content": SUMMARY}}]})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for piece in (SUMMARY[:15], SUMMARY[15:]):
+            self.wfile.write(f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send_json(self, data):
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("PENIFY_CACHE_DIR", str(tmp_path))
+    FakeServer.requests = []
+    FakeServer.reject_response_format = False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeServer)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def make_client(api_base):
+    return LLMClient(model="openai/qwen", api_base=api_base, api_key="secret", backend="openai")
+
+
+def test_summary_from_openai_compatible_server(server):
+    client = make_client(server)
+
+    assert client.generate_commit_summary("+x = 1\n", "msg", True, {}) == {"title": "feat: add x", "description": "Adds x"}
+    path, headers, body = FakeServer.requests[-1]
+    assert path == "/v1/chat/completions"
+    assert headers["Authorization"] == "Bearer secret"
+    assert body["model"] == "qwen"
+    assert body["response_format"]["json_schema"]["schema"]["required"] == ["title", "description"]
+    # The context window comes from the server's model list
+    assert client.get_model_info() == {"max_input_tokens": 32768}
+
+
+def test_streamed_summary(server):
+    streamed = []
+    result = make_client(server + "/v1").generate_commit_summary(
+        "+x = 1\n", "msg", True, {}, on_stream=lambda field, text: streamed.append((field, text)))
+
+    assert result["title"] == "feat: add x"
+    assert "".join(text for field, text in streamed if field == "description") == "Adds x"
+
+
+def test_response_format_is_dropped_when_rejected(server):
+    FakeServer.reject_response_format = True
+
+    assert make_client(server).generate_commit_summary("+x = 1\n", "msg", True, {})["title"] == "feat: add x"
+    assert "response_format" not in FakeServer.requests[-1][2]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        LLMClient(model="qwen", backend="grpc")
+
+
+def test_urls_and_model_names():
+    assert endpoint_url("http://localhost:11434", "chat/completions") == "http://localhost:11434/v1/chat/completions"
+    assert endpoint_url("http://gpu1:8000/v1/", "models") == "http://gpu1:8000/v1/models"
+    assert server_model_name("ollama/llama3") == "llama3"
+    assert server_model_name("Qwen/Qwen2.5-7B") == "Qwen/Qwen2.5-7B"
+
+
+def test_openai_backend_does_not_import_litellm(server):
+    code = ("import sys; from penify_hook.llm_client import LLMClient; "
+            f"LLMClient(model='openai/qwen', api_base='{server}', backend='openai').generate_commit_summary('+x\\n', 'm', True, {{}}); "
+            "print('litellm' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            env=dict(os.environ))
+    assert result.stdout.strip() == "False", result.stderr
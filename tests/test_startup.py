@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the handler that needs them
+HEAVY_MODULES = {"git", "litellm", "jira", "requests", "tqdm", "pkg_resources", "webbrowser", "http.server"}
+
+# Generous ceiling on import time after interpreter start-up, in microseconds.
+# A regression that pulls a heavy dependency back in costs several times this.
+IMPORT_BUDGET_US = 150_000
+
+
+def import_times(*argv):
+    """Run the CLI with -X importtime and return {module: cumulative_us} for top-level imports
+    made after site, along with the set of every imported module."""
+    env = dict(os.environ, PENIFY_NO_DAEMON="1", PYTHONPATH=REPO_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "penify_hook.main", *argv],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    top_level = {}
+    imported = set()
+    after_site = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.add(name.strip())
+        if not name.startswith("  "):
+            if after_site:
+                top_level[name.strip()] = int(cumulative)
+            elif name.strip() == "site":
+                after_site = True
+    return top_level, imported
+
+
+@pytest.mark.parametrize("argv", [
+    ["--version"],
+    ["--help"],
+    ["commit", "--help"],
+    ["docgen", "--help"],
+    ["config", "--help"],
+])
+def test_cli_startup_does_not_import_heavy_modules(argv):
+    top_level, imported = import_times(*argv)
+
+    assert not HEAVY_MODULES & imported
+    assert sum(top_level.values()) < IMPORT_BUDGET_US, sorted(top_level.items(), key=lambda item: -item[1])[:10]
@@ -0,0 +1,18 @@
+from penify_hook.utils import evict_cached_client, get_cached_client
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_clients_with_list_and_dict_arguments_are_reused():
+    kwargs = dict(model="ollama/llama3", diff_ignore=["docs/*"], routes=[{"max_lines": 50, "model": "small"}],
+                  endpoints=[{"api_base": "http://a"}, {"api_base": "http://b"}])
+    first = get_cached_client(FakeClient, **kwargs)
+
+    # Equal configuration read again on the next run
+    assert get_cached_client(FakeClient, **{k: (list(v) if isinstance(v, list) else v) for k, v in kwargs.items()}) is first
+    assert get_cached_client(FakeClient, **dict(kwargs, diff_ignore=["tests/*"])) is not first
+    evict_cached_client(first)
+    assert get_cached_client(FakeClient, **kwargs) is not first
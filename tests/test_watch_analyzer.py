@@ -0,0 +1,50 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+
+from penify_hook.watch_analyzer import PollingWatcher, WatchDocGenHook, get_changed_lines
+
+
+def test_get_changed_lines_reports_inserted_and_replaced_lines():
+    old = "a\nb\nc\n"
+    new = "a\nB\nc\nd\n"
+    assert get_changed_lines(old, new) == [2, 4]
+
+
+def test_get_changed_lines_reports_deletions_at_following_line():
+    assert get_changed_lines("a\nb\nc\n", "a\nc\n") == [2]
+    assert get_changed_lines("a\nb\n", "a\nb\n") == []
+
+
+def test_polling_watcher_detects_modified_files(tmp_path):
+    target = tmp_path / "module.py"
+    target.write_text("x = 1\n")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+
+    assert watcher.wait(timeout=0) == set()
+    os.utime(target, ns=(0, 1))
+    assert watcher.wait(timeout=0.1) == {str(target)}
+
+
+@pytest.fixture
+def repo(make_repo, tmp_path):
+    make_repo(files={"module.py": "def a():\n    pass\n"})
+    return tmp_path
+
+
+def test_process_file_sends_lines_changed_since_last_documented_version(repo):
+    api_client = MagicMock()
+    api_client.get_supported_file_types.return_value = ["py"]
+    api_client.send_file_for_docstring_generation.side_effect = lambda path, content, lines, details: content + "# documented\n"
+    analyzer = WatchDocGenHook(str(repo), api_client)
+    module = repo / "module.py"
+
+    module.write_text("def a():\n    pass\n\ndef b():\n    pass\n")
+    assert analyzer.process_file(str(module)) is True
+    path, _, lines, _ = api_client.send_file_for_docstring_generation.call_args[0]
+    assert path == "module.py"
+    assert lines == [3, 4, 5]
+
+    # Our own write does not trigger another request
+    assert analyzer.process_file(str(module)) is False
+    assert api_client.send_file_for_docstring_generation.call_count == 1
@@ -0,0 +1,66 @@
+import http.server
+import json
+import threading
+import pytest
+
+from penify_hook.workspace_analyzer import WorkspaceDocGenHook, discover_git_repos
+
+
+class FakePenifyAPI(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._reply(["py"])
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self._reply({"modified_content": payload["content"] + "# documented\n"})
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture
+def fake_api():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakePenifyAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_discover_git_repos_stops_at_repository_roots(tmp_path, make_repo):
+    make_repo(tmp_path / "service-a")
+    make_repo(tmp_path / "team" / "service-b")
+    (tmp_path / "service-a" / "vendored" / ".git").mkdir(parents=True)
+    (tmp_path / ".hidden" / "repo" / ".git").mkdir(parents=True)
+    (tmp_path / "worktree").mkdir()
+    (tmp_path / "worktree" / ".git").write_text("gitdir: /elsewhere\n")
+
+    assert discover_git_repos(str(tmp_path)) == [
+        str(tmp_path / "service-a"),
+        str(tmp_path / "team" / "service-b"),
+        str(tmp_path / "worktree"),
+    ]
+
+
+def test_workspace_run_documents_each_repo(tmp_path, fake_api, make_repo):
+    repo = make_repo(tmp_path / "a", {"one.py": "x = 1\n"})
+    # Only the files of the last commit are documented
+    (tmp_path / "a" / "two.py").write_text("y = 2\n")
+    repo.index.add(["two.py"])
+    repo.index.commit("add two.py")
+    make_repo(tmp_path / "b", {"three.py": "z = 3\n"})
+
+    results = WorkspaceDocGenHook(str(tmp_path), fake_api, "token", jobs=2, max_api_requests=1).run()
+
+    by_repo = {result['repo']: result for result in results}
+    assert by_repo[str(tmp_path / "a")]['summary'] == {'processed': 1, 'updated': 1, 'failed': 0}
+    assert by_repo[str(tmp_path / "b")]['status'] == 'success'
+    assert (tmp_path / "a" / "two.py").read_text() == "y = 2\n# documented\n"